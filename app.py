@@ -1,36 +1,84 @@
 import streamlit as st
+import math
+import os
 import time
-import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from math import pi
-from io import BytesIO
-
-import plotly.express as px
-import plotly.graph_objects as go
-
-# ----- PDF (opcional con reportlab) -----
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-    from reportlab.lib import colors
-    from reportlab.lib.utils import ImageReader
-
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
+import tempfile
+from dataclasses import astuple
+from importlib.util import find_spec
 
-# ----- Google Sheets -----
-try:
-    import gspread
-    from oauth2client.service_account import ServiceAccountCredentials
+# Solo lo que necesita la portada; pandas, plotly y lo que depende de ellos
+# se importan después de ella (ver MÓDULOS DEL SIMULADOR y benchmarks/arranque.py)
+from purificacion import Muestra, evaluar
+from purificacion.anomalias import PSI_DERIVA, cargar_distribucion
+from purificacion.colonias import COLONIAS_ECATEPEC
+from purificacion.incertidumbre import SORTEOS, monte_carlo
+from purificacion.interpretacion import LIMITES_NOM127, RIESGO_ACEPTABLE
+from purificacion.modelo import cargar_modelo
+from purificacion.motor import CATALOGO, FILTROS, PARAMETROS
+from purificacion.optimizador import MAX_ETAPAS, cadena_optima
+from purificacion.sensibilidad import RESOLUCION, barrer
+from purificacion.sheets import GSPREAD_AVAILABLE, EscritorSheets, hoja_google
+from purificacion.simulacion import avance, simular
 
-    GSPREAD_AVAILABLE = True
-except ImportError:
-    GSPREAD_AVAILABLE = False
-def log_to_google_sheets(row_dict):
+# ----- PDF (opcional con reportlab; se importa solo al generar un reporte) -----
+REPORTLAB_AVAILABLE = find_spec("reportlab") is not None
+
+
+PYARROW_AVAILABLE = find_spec("pyarrow") is not None
+
+
+def descarga_bajo_demanda(estado, clave, escribir, boton, etiqueta, nombre_archivo, mime):
+    """
+    Botón que genera un archivo grande solo cuando se pide y, ya generado,
+    su descarga. ``escribir(destino)`` escribe en un archivo temporal binario;
+    el resultado se reutiliza mientras ``clave`` no cambie.
+    """
+    clave_actual, ruta = st.session_state.get(estado, (None, None))
+    if clave_actual != clave:
+        if st.button(boton, key=f"boton_{estado}"):
+            destino = tempfile.NamedTemporaryFile(suffix=os.path.splitext(nombre_archivo)[1], delete=False)
+            with destino, st.spinner("Generando archivo…"):
+                escribir(destino)
+            if ruta is not None and os.path.exists(ruta):
+                os.remove(ruta)
+            st.session_state[estado] = (clave, destino.name)
+            st.rerun()
+        return
+
+    with open(ruta, "rb") as f:
+        st.download_button(
+            label=etiqueta, data=f, file_name=nombre_archivo, mime=mime, key=f"descarga_{estado}"
+        )
+
+
+def reporte_campana(origen, clave, tabla, nombre_archivo):
+    """
+    Reporte consolidado de una campaña bajo demanda (puede tener miles de
+    páginas). ``tabla`` es una función que devuelve el DataFrame o los
+    bloques de la campaña.
     """
-    Envía una fila con resultados a una hoja de cálculo de Google Sheets.
+
+    def escribir(destino):
+        from purificacion.campana import generar_pdf_campana
+
+        generar_pdf_campana(tabla(), destino)
+
+    descarga_bajo_demanda(
+        f"campana_{origen}",
+        clave,
+        escribir,
+        "📚 Preparar reporte de campaña",
+        "⬇️ Descargar reporte de campaña (resumen, colonias y una página por muestra)",
+        nombre_archivo,
+        "application/pdf",
+    )
+
+
+# ----- Google Sheets -----
+@st.cache_resource(show_spinner=False)
+def escritor_sheets():
+    """
+    Un escritor en segundo plano por proceso (cliente y hoja se reutilizan).
     Requiere:
     - Haber creado un Service Account en Google Cloud.
     - Haber puesto el JSON del servicio en st.secrets["gcp_service_account"].
@@ -38,39 +86,38 @@ def log_to_google_sheets(row_dict):
       compartido con el correo del service account.
     """
     if not GSPREAD_AVAILABLE:
-        return
-
+        return None
     try:
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive",
-        ]
-        creds = ServiceAccountCredentials.from_json_keyfile_dict(
-            st.secrets["gcp_service_account"], scope
-        )
-        client = gspread.authorize(creds)
-
-        sh = client.open("Historial_Purificacion_Ecatepec")
-        ws = sh.sheet1
-
-        # Aseguramos orden de columnas
-        columnas = [
-            "pH",
-            "Turbidez_NTU",
-            "Coliformes_NMP_100ml",
-            "Metales_ppm",
-            "TDS_mgL",
-            "Olor",
-            "Nivel_contaminacion_%",
-            "Filtro_recomendado",
-            "Purificacion_recomendada_%",
-            "TDS_filtrado_mgL",
-        ]
-        fila = [row_dict.get(col, "") for col in columnas]
-        ws.append_row(fila)
-    except Exception:
-        # No tiramos la app, solo ignoramos si falla
-        pass
+        credenciales = dict(st.secrets["gcp_service_account"])
+    except (KeyError, FileNotFoundError):
+        return None
+    return EscritorSheets(lambda: hoja_google(credenciales))
+
+
+def log_to_google_sheets(row_dict):
+    """
+    Encola una fila con resultados para Google Sheets. El envío se hace por
+    lotes en segundo plano, así que nunca bloquea la interfaz.
+    """
+    escritor = escritor_sheets()
+    if escritor is not None:
+        escritor.encolar(row_dict)
+
+
+# ----- Historial persistente -----
+TAMANOS_PAGINA_HISTORIAL = [25, 50, 100, 250, 500]
+
+
+@st.cache_resource(show_spinner=False)
+def almacen_historial():
+    """Un almacén SQLite por proceso; lo comparten todas las sesiones."""
+    return AlmacenHistorial()
+
+
+@st.cache_resource(show_spinner=False)
+def monitor_sitios():
+    """Agregados por sitio del proceso; se cargan una vez y se actualizan al guardar."""
+    return MonitorSitios(almacen_historial())
 
 # Fondo con estilo visual moderno (CSS)
 page_bg = """
@@ -130,18 +177,6 @@ st.markdown(
 st.write("---")
 
 # ----- ESTADO PARA HISTORIAL Y DATOS COMPARTIDOS -----
-if "historial" not in st.session_state:
-    st.session_state["historial"] = []
-if "df_filtros" not in st.session_state:
-    st.session_state["df_filtros"] = None
-if "fig_filtros" not in st.session_state:
-    st.session_state["fig_filtros"] = None
-if "fig_radar" not in st.session_state:
-    st.session_state["fig_radar"] = None
-if "fig_before_after" not in st.session_state:
-    st.session_state["fig_before_after"] = None
-if "tds_info" not in st.session_state:
-    st.session_state["tds_info"] = None
 if "started" not in st.session_state:
     st.session_state["started"] = False
 
@@ -159,12 +194,72 @@ tds = st.sidebar.slider("Sólidos disueltos totales (TDS) (mg/L)", 50, 1500, 650
 
 olor = st.sidebar.selectbox("¿Olor desagradable?", ["No", "Sí"])
 
+sitio = st.sidebar.text_input(
+    "Punto de muestreo (opcional)", placeholder="p. ej. ECA-014",
+    help="ID de la toma o pozo; las simulaciones de un mismo sitio se siguen en el tiempo en el Historial.",
+).strip() or None
+
+SIN_UBICACION = "Sin ubicación"
+colonia = st.sidebar.selectbox("Colonia (opcional)", [SIN_UBICACION] + sorted(COLONIAS_ECATEPEC))
+ubicacion = None
+if colonia != SIN_UBICACION:
+    lat_colonia, lon_colonia = COLONIAS_ECATEPEC[colonia]
+    with st.sidebar.expander("📍 Coordenadas exactas"):
+        st.caption("Por defecto, el centro aproximado de la colonia.")
+        latitud = st.number_input("Latitud", value=lat_colonia, step=0.001, format="%.5f", key=f"lat_{colonia}")
+        longitud = st.number_input("Longitud", value=lon_colonia, step=0.001, format="%.5f", key=f"lon_{colonia}")
+    ubicacion = {"Colonia": colonia, "Latitud": latitud, "Longitud": longitud}
+
+volumen_diario = st.sidebar.number_input(
+    "Volumen a tratar por día (L)", min_value=10, max_value=10_000_000, value=200, step=100,
+    help="Unos cientos de litros en una casa; cientos de miles en un sistema municipal.",
+)
+
 boton = st.sidebar.button("Iniciar Simulación")
 
 # ----- CÁLCULOS BASE -----
-# Normalización simple de parámetros para un índice global
-score = (turbidez / 50 + coliformes / 2000 + metales / 2 + tds / 1000) / 4
-nivel = max(0.0, min(score * 100, 100.0))  # Nivel general de contaminación (0-100)
+# Todo el análisis lo hace el motor (índice, filtros, riesgo e interpretación).
+# Resultados y figuras se guardan en caché por combinación de parámetros, con
+# expulsión LRU, para que cambiar de pestaña o descargar no recalcule nada.
+MAX_ANALISIS_EN_CACHE = 256
+MAX_FIGURAS_EN_CACHE = 32
+
+
+@st.cache_resource(max_entries=MAX_ANALISIS_EN_CACHE, show_spinner=False)
+def analizar(entrada):
+    # El filtro recomendado lo elige el modelo entrenado con el dataset de Ecatepec
+    return evaluar(Muestra(*entrada), cargar_modelo())
+
+
+@st.cache_resource(max_entries=MAX_ANALISIS_EN_CACHE, show_spinner=False)
+def incertidumbre(entrada):
+    # Semilla de la muestra: los mismos parámetros siempre dan los mismos intervalos
+    muestra = Muestra(*entrada)
+    return monte_carlo(muestra, cargar_modelo(), semilla=int(muestra.id, 16))
+
+
+@st.cache_resource(max_entries=MAX_FIGURAS_EN_CACHE, show_spinner=False)
+def construir_figuras(entrada):
+    return figuras_analisis(analizar(entrada))
+
+
+@st.cache_resource(max_entries=MAX_FIGURAS_EN_CACHE, show_spinner="Evaluando la malla…")
+def construir_barrido(eje_x, eje_y, fijos, olor, resolucion):
+    # La clave no incluye los valores actuales de los ejes: moverlos no recalcula la malla
+    barrido = barrer(eje_x, eje_y, dict(fijos), olor, cargar_modelo(), resolucion)
+    return barrido, figuras_barrido(barrido)
+
+
+@st.cache_resource(max_entries=1, show_spinner="Indexando las muestras con ubicación…")
+def indice_geo(total):
+    # ``total`` solo forma la clave: al guardar una entrada se vuelve a indexar
+    return indice_del_historial(almacen_historial())
+
+
+# Cada nivel de las reglas de interpretación se muestra con su aviso e ícono
+AVISOS = {"success": st.success, "info": st.info, "warning": st.warning, "error": st.error}
+ICONOS = {"success": "✔", "info": "ℹ", "warning": "⚠️", "error": "❌"}
+ICONOS_CONCLUSION = {"success": "🟢", "info": "🟡", "warning": "🟠", "error": "🔴"}
 
 # ----- LANDING PAGE -----
 if not st.session_state["started"]:
@@ -207,10 +302,51 @@ if not st.session_state["started"]:
 
     st.stop()  # No sigue al resto del código hasta que presionen el botón
 
+# ----- MÓDULOS DEL SIMULADOR -----
+# Se importan al entrar al simulador: la portada no espera a pandas ni a plotly.
+# Las funciones en caché de arriba los usan, pero solo se llaman desde aquí abajo.
+import pandas as pd  # noqa: E402
+import plotly.graph_objects as go  # noqa: E402
+
+from purificacion.carga import TAMANO_BLOQUE, procesar_csv  # noqa: E402
+from purificacion.costos import costos_por_litro  # noqa: E402
+from purificacion.geo import RIESGO_RESIDUAL, indice_del_historial, rectangulo  # noqa: E402
+from purificacion.graficas import figura_mapa, figuras_analisis, figuras_barrido  # noqa: E402
+from purificacion.historial import (  # noqa: E402
+    ORDENES,
+    AlmacenHistorial,
+    Consulta,
+    csv_por_bloques,
+    parquet_por_bloques,
+)
+from purificacion.monitoreo import LIMITE_TDS, MonitorSitios  # noqa: E402
+
+# ----- ANÁLISIS DE LA MUESTRA -----
+# También después de la portada: con el artefacto del modelo frío o vencido,
+# cargar_modelo() entrena el árbol, y eso no debe retrasar la primera página.
+entrada = (ph, turbidez, coliformes, metales, tds, olor)
+resultado = analizar(entrada)
+nivel = resultado.nivel  # Nivel general de contaminación (0-100)
+interpretacion = resultado.interpretacion
+modelo_filtros = cargar_modelo()
+
 # ----- TABS -----
-tab_analisis, tab_sim, tab_filtros, tab_tds, tab_hist = st.tabs(
-    ["🔎 Análisis inicial", "⚙️ Simulación", "🧪 Filtros y comparativa", "💠 Enfoque TDS", "📂 Historial y reportes"]
+(
+    tab_analisis, tab_sim, tab_filtros, tab_tds, tab_hist, tab_carga, tab_sensibilidad, tab_mapa
+) = st.tabs(
+    [
+        "🔎 Análisis inicial",
+        "⚙️ Simulación",
+        "🧪 Filtros y comparativa",
+        "💠 Enfoque TDS",
+        "📂 Historial y reportes",
+        "📦 Carga masiva",
+        "🗺️ Sensibilidad",
+        "🌎 Mapa",
+    ]
 )
+figuras = construir_figuras(entrada)
+
 # ===========================
 # TAB 1: ANÁLISIS INICIAL
 # ===========================
@@ -231,16 +367,9 @@ with tab_analisis:
         st.subheader("🧪 Índice global de contaminación")
         st.metric("Nivel general de contaminación", f"{nivel:.1f} %")
 
-        # Clasificación de TDS básica
-        if tds <= 500:
-            clase_tds = "Aceptable para consumo según NOM-127 (≤ 500 mg/L)."
-            st.success(f"TDS actual: {tds} mg/L — {clase_tds}")
-        elif tds <= 900:
-            clase_tds = "Alta mineralización (posible sabor desagradable)."
-            st.warning(f"TDS actual: {tds} mg/L — {clase_tds}")
-        else:
-            clase_tds = "No recomendable para consumo directo (> 900 mg/L)."
-            st.error(f"TDS actual: {tds} mg/L — {clase_tds}")
+        # Clasificación de TDS según la NOM-127
+        clase_tds = interpretacion.tds_nom127
+        AVISOS[clase_tds.nivel](f"TDS actual: {tds} mg/L — {clase_tds.texto}")
 
     st.info(
         "Este análisis es una aproximación basada en los parámetros ingresados. "
@@ -249,39 +378,8 @@ with tab_analisis:
     
     st.write("### 🧠 Interpretación experta de parámetros")
 
-    # Interpretación de turbidez
-    if turbidez < 1:
-        st.success("✔ La turbidez es excelente. El agua está visualmente limpia y permite una desinfección UV altamente eficiente.")
-    elif turbidez < 5:
-        st.info("ℹ La turbidez es aceptable, pero puede interferir ligeramente con la desinfección UV si aumenta.")
-    else:
-        st.error("⚠️ La turbidez es alta. Refleja presencia de partículas suspendidas, arcillas o microorganismos. Se recomienda prefiltración inmediata.")
-    
-    # Interpretación coliformes
-    if coliformes == 0:
-        st.success("✔ No hay coliformes fecales. El agua no presenta contaminación biológica detectable.")
-    elif coliformes < 200:
-        st.warning("⚠️ Hay baja presencia de coliformes fecales. Requiere desinfección UV para garantizar potabilidad.")
-    else:
-        st.error("❌ Alto nivel de coliformes. El agua NO es apta para consumo sin un tratamiento intensivo (UV obligatorio).")
-    
-    # Interpretación metales
-    if metales < 0.01:
-        st.success("✔ Metales pesados dentro de los límites recomendados por la NOM-127.")
-    elif metales < 0.05:
-        st.warning("⚠️ Metales moderados. Es recomendable nanofiltración o adsorción nanotecnológica.")
-    else:
-        st.error("❌ Metales pesados elevados. El agua puede contener arsénico, plomo u otros contaminantes peligrosos.")
-    
-    # Interpretación TDS
-    if tds < 300:
-        st.success("✔ Excelente calidad mineral del agua (TDS bajo).")
-    elif tds < 600:
-        st.info("ℹ Buena calidad del agua. Puede tener sabores minerales leves.")
-    elif tds < 900:
-        st.warning("⚠️ TDS alto. El agua puede tener sabor salado o amargo. No es ideal para consumo frecuente.")
-    else:
-        st.error("❌ TDS muy alto. El agua NO es apta para consumo humano directo.")
+    for tramo in interpretacion.parametros.values():
+        AVISOS[tramo.nivel](f"{ICONOS[tramo.nivel]} {tramo.texto}")
 
 
 # ===========================
@@ -290,33 +388,78 @@ with tab_analisis:
 with tab_sim:
     st.subheader("⚙️ Simulación del proceso de purificación")
 
+    modo_instantaneo = st.checkbox(
+        "⚡ Modo instantáneo (mostrar el resultado sin animación)", key="sim_instantanea"
+    )
+
     if boton:
-        etapas = [
-            ("Pre-filtración", 2, "Eliminando sólidos grandes y residuos visibles…"),
-            ("Sedimentación", 3, "Separando partículas suspendidas…"),
-            ("Adsorción nanotecnológica", 4, "Capturando metales pesados…"),
-            ("Desinfección UV", 4, "Inactivando bacterias, virus y coliformes…"),
-            ("Pulido final", 2, "Mejorando olor, color y sabor…"),
-        ]
-
-        progreso_total = st.progress(0)
-        avance = 0
-
-        for nombre, tiempo, mensaje in etapas:
-            st.write(f"### 🔵 {nombre}")
-            st.write(mensaje)
-
-            for _ in range(tiempo):
-                time.sleep(0.7)
-                avance += (1 / sum(e[1] for e in etapas))
-                progreso_total.progress(min(avance, 1.0))
-
-            eficiencia_etapa = np.clip(np.random.normal(85, 10), 60, 99.9)
-            st.success(f"✔ Etapa completada — Eficiencia {eficiencia_etapa:.1f}%")
-
-        st.success("✅ Simulación completada.")
-    else:
+        # Las eficiencias se calculan de una vez; la semilla sale de la muestra,
+        # así los mismos parámetros siempre dan la misma simulación.
+        st.session_state["simulacion"] = {
+            "etapas": simular(int(resultado.muestra.id, 16)),
+            "inicio": time.monotonic(),
+        }
+
+    def mostrar_simulacion(etapas, completadas, fraccion):
+        st.progress(fraccion)
+        for i, etapa in enumerate(etapas[: completadas + 1]):
+            st.write(f"### 🔵 {etapa.nombre}")
+            st.write(etapa.mensaje)
+            if i < completadas:
+                st.success(f"✔ Etapa completada — Eficiencia {etapa.eficiencia:.1f}%")
+        if completadas == len(etapas):
+            st.success("✅ Simulación completada.")
+
+    @st.fragment(run_every=0.5)
+    def animar_simulacion():
+        sim = st.session_state["simulacion"]
+        fraccion, completadas = avance(sim["etapas"], time.monotonic() - sim["inicio"])
+        mostrar_simulacion(sim["etapas"], completadas, fraccion)
+        if completadas == len(sim["etapas"]):
+            # Rerun completo para dejar de refrescar el fragmento
+            sim["terminada"] = True
+            st.rerun()
+
+    sim = st.session_state.get("simulacion")
+    if sim is None:
         st.info("Presiona **'Iniciar Simulación'** en la barra lateral para ejecutar el proceso paso a paso.")
+    elif modo_instantaneo or sim.get("terminada"):
+        mostrar_simulacion(sim["etapas"], len(sim["etapas"]), 1.0)
+    else:
+        animar_simulacion()
+
+    # ===== INCERTIDUMBRE (MONTE CARLO) =====
+    st.write("---")
+    st.write("### 🎲 Incertidumbre de la estimación (Monte Carlo)")
+    st.caption(
+        f"{SORTEOS:,} sorteos con error de medición en cada contaminante y eficiencias variables "
+        "en el filtro elegido. Los intervalos son del 95 %."
+    )
+
+    if st.toggle("Calcular intervalos de confianza", key="sim_monte_carlo"):
+        inc = incertidumbre(entrada)
+
+        def rango(intervalo, formato="{:.1f}"):
+            bajo, medio, alto = intervalo
+            return f"{formato.format(medio)} ({formato.format(bajo)} – {formato.format(alto)})"
+
+        col_a, col_b, col_c = st.columns(3)
+        col_a.metric("Riesgo residual (%)", rango(inc.riesgo_global_despues))
+        col_b.metric("Purificación estimada (%)", rango(inc.purificacion))
+        col_c.metric("Prob. de riesgo aceptable", f"{inc.prob_aceptable:.0%}")
+
+        st.dataframe(
+            pd.DataFrame({
+                "Después del filtrado": {p: rango(inc.despues[p], "{:.3g}") for p in PARAMETROS},
+                "Riesgo residual (%)": {p: rango(inc.riesgo_despues[p]) for p in PARAMETROS},
+                "Prob. de cumplir NOM-127": {p: f"{inc.prob_nom127[p]:.0%}" for p in PARAMETROS},
+            }),
+            use_container_width=True,
+        )
+
+        st.write("**Filtro elegido en los sorteos:** " + " · ".join(
+            f"{filtro} {fraccion:.1%}" for filtro, fraccion in inc.filtros.items()
+        ))
 
 
 # ===========================
@@ -325,251 +468,128 @@ with tab_sim:
 with tab_filtros:
     st.subheader("🧪 Comparativa de filtros utilizados en México")
 
-    filtros = {
-        "Carbón activado": 0.70,
-        "Ósmosis inversa": 0.97,
-        "Zeolita": 0.80,
-        "Nano-fibras": 0.92,
-        "Ultrafiltración": 0.88,
-    }
-
-    tabla = []
-    for filtro, eficiencia in filtros.items():
-        purificacion = eficiencia * (100 - nivel)
-        tabla.append([filtro, eficiencia * 100, purificacion])
-
-    df = pd.DataFrame(tabla, columns=["Filtro", "Eficiencia base (%)", "Purificación estimada (%)"])
-
-    df_display = df.copy()
-    df_display["Eficiencia base (%)"] = df_display["Eficiencia base (%)"].map(lambda x: f"{x:.1f} %")
-    df_display["Purificación estimada (%)"] = df_display["Purificación estimada (%)"].map(lambda x: f"{x:.1f} %")
+    df = figuras["df_filtros"]
+    df_display = figuras["df_display"]
 
     st.dataframe(df_display, use_container_width=True)
 
-    mejor = df.iloc[df["Purificación estimada (%)"].idxmax()]
     st.write("---")
     st.success(
-        f"### ⭐ Filtro recomendado: **{mejor['Filtro']}**\n"
-        f"Purificación aproximada para tu caso: **{mejor['Purificación estimada (%)']:.1f} %**"
+        f"### ⭐ Filtro recomendado: **{resultado.filtro_recomendado}**\n"
+        f"Purificación aproximada para tu caso: **{resultado.purificacion_recomendada:.1f} %**"
     )
 
     # ===== INTERPRETACIÓN DEL FILTRO RECOMENDADO =====
     st.write("### 🧠 ¿Por qué se recomienda este filtro?")
     
-    filtro = mejor["Filtro"]
-    
-    if filtro == "Ósmosis inversa":
-        st.write("""
-        ✔ **La ósmosis inversa es el filtro más eficiente a nivel doméstico y municipal.**  
-        - Elimina hasta **99% de partículas**, metales y TDS.
-        - Es ideal cuando el agua tiene **altos niveles de salinidad, arsénico o metales pesados**.
-        - En Ecatepec se recomienda debido a la **dureza, sedimentos y TDS elevado**.
-        """)
-    elif filtro == "Carbón activado":
-        st.write("""
-        ✔ **Excelente para absorber olores, cloro y compuestos orgánicos volátiles (COVs).**  
-        - Ideal cuando el agua huele mal o tiene sabor desagradable.  
-        - No reduce mucho metales ni TDS.
-        """)
-    elif filtro == "Zeolita":
-        st.write("""
-        ✔ **La zeolita es un material natural que atrapa metales pesados y amonio.**  
-        - Útil para aguas con turbidez moderada y presencia de metales.
-        - Eficiente en sistemas municipales por su baja saturación.
-        """)
-    elif filtro == "Nano-fibras":
-        st.write("""
-        ✔ **Las nanofibras eliminan bacterias, virus y partículas submicrométricas.**  
-        - Muy utilizadas en investigación de potabilización.
-        - Logran altos niveles de remoción biológica sin químicos.
-        """)
-    elif filtro == "Ultrafiltración":
-        st.write("""
-        ✔ **La ultrafiltración retiene microorganismos y sólidos suspendidos.**  
-        - Ideal cuando hay **coliformes, turbidez y sedimentos**.
-        - Suele combinarse con carbón activado o UV.
-        """)
-    
-    st.info(f"📌 Este filtro se seleccionó porque obtuvo **{mejor['Purificación estimada (%)']:.1f}%** de purificación según tus parámetros.")
-
-    # --- Eficiencias REALISTAS por filtro ---
-    eficiencias_reales = {
-        "Carbón activado": {
-            "turbidez": 0.40,
-            "coliformes": 0.10,
-            "metales": 0.25,
-            "tds": 0.05
-        },
-        "Ósmosis inversa": {
-            "turbidez": 0.95,
-            "coliformes": 0.99,
-            "metales": 0.98,
-            "tds": 0.95
-        },
-        "Zeolita": {
-            "turbidez": 0.70,
-            "coliformes": 0.20,
-            "metales": 0.80,
-            "tds": 0.20
-        },
-        "Nano-fibras": {
-            "turbidez": 0.65,
-            "coliformes": 0.40,
-            "metales": 0.90,
-            "tds": 0.25
-        },
-        "Ultrafiltración": {
-            "turbidez": 0.85,
-            "coliformes": 0.99,
-            "metales": 0.40,
-            "tds": 0.20
-        }
-    }
-    
-    ef = eficiencias_reales[mejor["Filtro"]]
-    
-    # --- Cálculo con eficiencias específicas ---
-    turbidez_after = turbidez * (1 - ef["turbidez"])
-    coliformes_after = coliformes * (1 - ef["coliformes"])
-    metales_after = metales * (1 - ef["metales"])
-    tds_after = tds * (1 - ef["tds"])
-
-    # Guardar info de TDS para el PDF
-    st.session_state["tds_info"] = {
-        "tds_before": tds,
-        "tds_after": tds_after,
-        "filtro": mejor["Filtro"]
-    }
+    filtro = CATALOGO[resultado.filtro_recomendado]
+    st.write("\n".join([f"✔ **{filtro.resumen}**"] + [f"- {punto}" for punto in filtro.puntos]))
+
+    st.info(
+        "📌 Este filtro lo seleccionó el modelo entrenado con las muestras etiquetadas de "
+        "`dataset_filtros_entrenamiento.csv`. Su purificación estimada para tus parámetros es "
+        f"**{resultado.purificacion_recomendada:.1f}%**."
+    )
+    fuera_de_rango = cargar_distribucion().alertas(list(resultado.antes.values()))
+    if fuera_de_rango:
+        st.warning(
+            "⚠️ Muestra fuera de la distribución de entrenamiento:\n"
+            + "\n".join(f"- {a}" for a in fuera_de_rango)
+        )
+
+    # ===== COSTO POR LITRO =====
+    st.write(f"### 💰 Costo por litro para {volumen_diario:,} L/día")
+
+    ranking = costos_por_litro(list(resultado.antes.values()), volumen_diario)
+    mejor = ranking.mejor[0]
+    if mejor < 0:
+        st.warning(
+            f"Ningún filtro por sí solo deja el riesgo residual en {RIESGO_ACEPTABLE:.0f}% o menos; "
+            "revisa el tren de tratamiento más abajo."
+        )
+    else:
+        st.success(
+            f"El filtro más económico que deja el riesgo residual en {RIESGO_ACEPTABLE:.0f}% o menos es "
+            f"**{ranking.nombres[mejor]}**: **{ranking.costo_litro[0, mejor]:.3f} MXN/L**, "
+            f"con {ranking.unidades[mejor]} equipo(s) y cambio de cartucho cada "
+            f"{ranking.dias_por_cartucho[0, mejor]:.1f} días."
+        )
+    st.dataframe(
+        ranking.tabla().round({
+            "Costo (MXN/L)": 3,
+            "Litros por cartucho": 0,
+            "Reemplazo cada (días)": 1,
+            "Riesgo residual (%)": 1,
+        }),
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    # ===== TREN DE TRATAMIENTO =====
+    st.write("### 🔗 Tren de tratamiento más económico que cumple la NOM-127")
+
+    max_etapas = st.slider("Máximo de etapas en el tren", 1, MAX_ETAPAS, 3)
+    cadena = cadena_optima(resultado.antes, max_etapas)
+    if cadena is None:
+        st.error(
+            f"Ninguna combinación de hasta {max_etapas} etapa{'s' if max_etapas > 1 else ''} deja el agua dentro de los "
+            "límites de la NOM-127. Prueba con más etapas."
+        )
+    elif not cadena.etapas:
+        st.success("La muestra ya cumple los límites de la NOM-127; no requiere tratamiento.")
+    else:
+        st.success(f"**{cadena}** · costo relativo **{cadena.costo:.1f}**")
+        st.dataframe(
+            pd.DataFrame({
+                "Antes": resultado.antes,
+                "Después del tren": cadena.despues,
+                "Límite NOM-127": LIMITES_NOM127,
+            }),
+            use_container_width=True,
+        )
 
     # ===== ANÁLISIS DE RIESGO ANTES / DESPUÉS =====
     st.write("### ⚠️ Análisis de riesgo del agua antes y después del filtrado")
-    
-    # Normalizamos los contaminantes a un índice 0–100
-    def normalizar(valor, maximo):
-        return min(100, (valor / maximo) * 100)
-    
-    riesgo_before = {
-        "Turbidez": normalizar(turbidez, 50),
-        "Coliformes": normalizar(coliformes, 2000),
-        "Metales": normalizar(metales, 2),
-        "TDS": normalizar(tds, 1000),
-    }
-    
-    riesgo_after = {
-        "Turbidez": normalizar(turbidez_after, 50),
-        "Coliformes": normalizar(coliformes_after, 2000),
-        "Metales": normalizar(metales_after, 2),
-        "TDS": normalizar(tds_after, 1000),
-    }
-    
-    # ========= NUEVO ORDEN CORRECTO — AQUÍ SE DEFINEN BEFORE Y AFTER =========
-    labels = ["Turbidez (NTU)", "Coliformes (NMP/100ml)", "Metales (ppm)", "TDS (mg/L)"]
-    before = [turbidez, coliformes, metales, tds]
-    after = [turbidez_after, coliformes_after, metales_after, tds_after]
-    
-    # =========================================
-    #   CÁLCULO DE MEJORA REAL (corregido)
-    # =========================================
-    parametros = ["Turbidez", "Coliformes", "Metales", "TDS"]
-    mejoras = {}
-    
-    for i, p in enumerate(parametros):
-        if before[i] > 0:
-            reduccion = 100 * (1 - after[i] / before[i])
-        else:
-            reduccion = 0
-        mejoras[p] = max(0, reduccion)
-    
-    # Contaminante dominante después del filtrado
-    domina = parametros[after.index(max(after))]
-    
-    # Mejora total del agua
-    if sum(before) > 0:
-        mejora_total = 100 * (1 - sum(after) / sum(before))
-    else:
-        mejora_total = 0
-    
+
+    domina = resultado.domina
+
     # ===== INTERPRETACIÓN =====
     st.write("## 📝 Interpretación del análisis")
-    
-    for p in parametros:
-        st.write(f"• **{p}:** reducción aproximada de **{mejoras[p]:.1f}%**.")
-    
+
+    for p in PARAMETROS:
+        st.write(f"• **{p}:** reducción aproximada de **{resultado.mejoras[p]:.1f}%**.")
+
     st.warning(f"👉 El contaminante con mayor riesgo residual es: **{domina}**.")
-    st.success(f"🔵 Mejora global estimada de la calidad del agua: **{mejora_total:.1f}%**.")
-    
+    st.success(f"🔵 Mejora global estimada de la calidad del agua: **{resultado.mejora_total:.1f}%**.")
+
     # ===== INDICADORES GLOBALES =====
-    riesgo_global_before = sum(riesgo_before.values()) / 4
-    riesgo_global_after = sum(riesgo_after.values()) / 4
-    
-    st.metric("📉 Reducción de riesgo total (%)", f"{(100 - riesgo_global_after):.1f}%")
+    st.metric("📉 Reducción de riesgo total (%)", f"{(100 - resultado.riesgo_global_despues):.1f}%")
     
     # ===== GRÁFICAS PIE =====
     st.write("### 🥧 Distribución del riesgo por contaminante")
     
-    df_riesgo = pd.DataFrame({
-        "Contaminante": list(riesgo_before.keys()),
-        "Antes (%)": list(riesgo_before.values()),
-        "Después (%)": list(riesgo_after.values())
-    })
-    
-    fig_pie = px.pie(df_riesgo, names="Contaminante", values="Antes (%)",
-                     title="Riesgo relativo antes del filtrado")
-    fig_pie.update_layout(template="plotly_dark")
+    fig_pie = figuras["fig_pie_before"]
     st.plotly_chart(fig_pie, use_container_width=True)
-    
-    fig_pie2 = px.pie(df_riesgo, names="Contaminante", values="Después (%)",
-                      title="Riesgo relativo después del filtrado")
-    fig_pie2.update_layout(template="plotly_dark")
+
+    fig_pie2 = figuras["fig_pie_after"]
     st.plotly_chart(fig_pie2, use_container_width=True)
-    
-    # Guardar para PDF
-    st.session_state["fig_pie_before"] = fig_pie
-    st.session_state["fig_pie_after"] = fig_pie2
-    st.session_state["riesgo_before"] = riesgo_before
-    st.session_state["riesgo_after"] = riesgo_after
 
     
     # ----- GRÁFICA DE BARRAS (FILTROS) - PLOTLY -----
     st.write("## 📈 Eficiencia y purificación estimada por filtro")
     
-    df_plot = df.copy()
-    fig = px.bar(
-        df_plot,
-        x="Filtro",
-        y=["Eficiencia base (%)", "Purificación estimada (%)"],
-        barmode="group",
-        labels={"value": "Porcentaje (%)", "variable": "Métrica"},
-        title="Comparativa de filtros utilizados en México",
-    )
-    fig.update_layout(template="plotly_dark", legend_title_text="Métrica")
+    fig = figuras["fig_filtros"]
     st.plotly_chart(fig, use_container_width=True)
 
 
     # ----- RADAR CHART -----
     st.write("## 🧬 Perfil de contaminación del agua (Radar)")
 
-    categorias = ["Turbidez", "Coliformes", "Metales", "TDS"]
-    valores_before = [
-        turbidez / 50,
-        coliformes / 2000,
-        metales / 2,
-        tds / 1000,
-    ]
-    valores_before += valores_before[:1]
-
-    angles = [n / float(len(categorias)) * 2 * pi for n in range(len(categorias))]
-    angles += angles[:1]
-
-    fig2 = plt.figure(figsize=(6, 6))
-    ax2 = plt.subplot(111, polar=True)
-    plt.xticks(angles[:-1], categorias, color="white")
-    ax2.plot(angles, valores_before, linewidth=2)
-    ax2.fill(angles, valores_before, alpha=0.3)
-    st.pyplot(fig2)
+    radar_png = figuras["radar_png"]
+    st.image(radar_png)
     st.info(
         f"El radar muestra que antes del filtrado el parámetro dominante era "
-        f"**{parametros[before.index(max(before))]}**, mientras que después del filtrado "
+        f"**{resultado.dominante_antes}**, mientras que después del filtrado "
         f"el principal riesgo residual es **{domina}**."
     )
 
@@ -580,184 +600,39 @@ with tab_filtros:
     st.write("## 🧾 Conclusión final del análisis de calidad del agua")
     
     # Evaluación del riesgo final
-    if riesgo_global_after <= 10:
-        conclusion = """
-        🟢 **El agua presenta excelente calidad tras el proceso de filtrado.**
-        Puede considerarse apta para consumo humano directo siempre que se mantenga
-        un mantenimiento adecuado en el sistema de filtración.
-        """
-    elif riesgo_global_after <= 25:
-        conclusion = """
-        🟡 **El agua alcanza un nivel aceptable después del filtrado.**
-        Es adecuada para la mayoría de usos domésticos, aunque se recomienda
-        monitorear su calidad periódicamente.
-        """
-    elif riesgo_global_after <= 45:
-        conclusion = """
-        🟠 **El agua sigue teniendo un riesgo moderado.**
-        Aunque la filtración mejoró notablemente la calidad, se recomienda
-        un proceso adicional como carbón activado + UV o añadir ósmosis inversa.
-        """
-    else:
-        conclusion = """
-        🔴 **El agua continúa siendo de riesgo elevado incluso después del filtrado.**
-        No es recomendable para consumo humano. Se requiere tratamiento avanzado
-        (ósmosis inversa, nanofiltración o un sistema industrial).
-        """
-    
-    st.write(conclusion)
-    
+    conclusion = interpretacion.conclusion
+    st.write(f"{ICONOS_CONCLUSION[conclusion.nivel]} **{conclusion.texto}** {conclusion.detalle}")
+
     # Comentario sobre el contaminante dominante
     st.info(f"📌 **Contaminante crítico residual:** {domina}")
-    
-    # Recomendación final
-    if domina == "TDS":
-        st.write("""
-        💧 *Recomendación:* Se necesita un sistema que reduzca sales disueltas.  
-        → Ósmosis inversa o intercambio iónico son las mejores opciones.
-        """)
-    elif domina == "Metales":
-        st.write("""
-        ⚙️ *Recomendación:* Adsorción nanotecnológica (TiO₂, grafeno, carbón activado modificado).
-        Ideal para remover arsénico, plomo o aluminio.
-        """)
-    elif domina == "Coliformes":
-        st.write("""
-        🦠 *Recomendación:* Desinfección UV o luz UVC + posfiltrado.  
-        Los microorganismos siguen representando el mayor riesgo.
-        """)
-    elif domina == "Turbidez":
-        st.write("""
-        🌫️ *Recomendación:* Prefiltrado con zeolita o fibra sintética.  
-        La turbidez alta indica presencia de sedimentos y sólidos suspendidos.
-        """)
+    st.write(f"💧 *Recomendación:* {interpretacion.recomendacion}")
 
-    
     # ===== INTERPRETACIÓN AUTOMÁTICA DEL RADAR =====
     st.write("### 🧠 Interpretación del perfil de contaminación")
-    
-    interpretaciones = []
-    
-    # Turbidez
-    if turbidez < 1:
-        interpretaciones.append("✔ La turbidez es muy baja. El agua está visualmente clara.")
-    elif turbidez < 5:
-        interpretaciones.append("ℹ La turbidez es moderada y podría afectar ligeramente la desinfección UV.")
-    else:
-        interpretaciones.append("⚠️ Alta turbidez. Refleja partículas, sedimentos o microorganismos.")
-    
-    # Coliformes
-    if coliformes == 0:
-        interpretaciones.append("✔ No se detectan coliformes fecales.")
-    elif coliformes < 200:
-        interpretaciones.append("⚠️ Hay presencia leve de coliformes. Se recomienda desinfección UV.")
-    else:
-        interpretaciones.append("❌ Coliformes muy altos. El agua NO es potable sin tratamiento intensivo.")
-    
-    # Metales
-    if metales < 0.01:
-        interpretaciones.append("✔ Metales pesados dentro de límites seguros según NOM-127.")
-    elif metales < 0.05:
-        interpretaciones.append("⚠️ Metales moderados. Sugiere riesgo bajo pero requiere monitoreo.")
-    else:
-        interpretaciones.append("❌ Metales peligrosamente elevados. Podría incluir plomo o arsénico.")
-    
-    # TDS
-    if tds < 300:
-        interpretaciones.append("✔ TDS muy bajo. Agua con excelente calidad mineral.")
-    elif tds < 600:
-        interpretaciones.append("ℹ TDS moderado. Sabor mineral aceptable.")
-    elif tds < 900:
-        interpretaciones.append("⚠️ TDS elevado. Sabor salado o amargo probable.")
-    else:
-        interpretaciones.append("❌ TDS extremadamente alto. Agua NO apta para consumo.")
-    
-    # Mostrar interpretación
-    for item in interpretaciones:
-        st.write(item)
+    for tramo in interpretacion.parametros.values():
+        st.write(f"{ICONOS[tramo.nivel]} {tramo.breve}")
+
 
-    
     # ----- GRÁFICA ANTES vs DESPUÉS -----
     st.write("## 🔄 Comparativa de contaminantes antes y después del filtrado")
 
-    labels = ["Turbidez (NTU)", "Coliformes (NMP/100ml)", "Metales (ppm)", "TDS (mg/L)"]
-    before = [turbidez, coliformes, metales, tds]
-    after = [turbidez_after, coliformes_after, metales_after, tds_after]
-
-    # =========================================
-    #   CÁLCULO DE MEJORA REAL (por contaminante)
-    # =========================================
-    mejoras = {}
-    
-    parametros = ["Turbidez", "Coliformes", "Metales", "TDS"]
-    
-    for i, p in enumerate(parametros):
-        if before[i] > 0:
-            reduccion = 100 * (1 - after[i] / before[i])
-        else:
-            reduccion = 0
-        mejoras[p] = max(0, reduccion)
-    
-    # Contaminante dominante después del filtrado
-    domina = parametros[after.index(max(after))]
-    
-    # Índice total de mejora del agua
-    if sum(before) > 0:
-        mejora_total = 100 * (1 - sum(after) / sum(before))
-    else:
-        mejora_total = 0
-
-    
-    x = np.arange(len(labels))
-    width = 0.35
-
-    df_ba = pd.DataFrame(
-        {
-            "Parámetro": labels,
-            "Antes": before,
-            "Después": after,
-        }
-    )
-
-    fig3 = px.bar(
-        df_ba,
-        x="Parámetro",
-        y=["Antes", "Después"],
-        barmode="group",
-        title="Reducción de contaminantes tras el filtrado",
-    )
-    fig3.update_layout(template="plotly_dark", legend_title_text="Estado")
+    fig3 = figuras["fig_before_after"]
     st.plotly_chart(fig3, use_container_width=True)
 
 
-    # Guardar para el reporte
-    st.session_state["df_filtros"] = df
-    st.session_state["fig_filtros"] = fig
-    st.session_state["fig_radar"] = fig2
-    st.session_state["fig_before_after"] = fig3
-
     # ----- GUARDAR EN HISTORIAL (cuando haya simulación) -----
     if boton:
-        entry = {
-            "pH": ph,
-            "Turbidez_NTU": turbidez,
-            "Coliformes_NMP_100ml": coliformes,
-            "Metales_ppm": metales,
-            "TDS_mgL": tds,
-            "Olor": olor,
-            "Nivel_contaminacion_%": nivel,
-            "Filtro_recomendado": mejor["Filtro"],
-            "Purificacion_recomendada_%": round(mejor["Purificación estimada (%)"], 1),
-            "TDS_filtrado_mgL": round(tds_after, 2),
-        }
-    
-        st.session_state["historial"].append(entry)
-    
+        entry = resultado.entrada_historial()
+        entry["Sitio"] = sitio
+        if ubicacion is not None:
+            entry.update(ubicacion)
+
+        for alerta in monitor_sitios().agregar(entry):
+            if alerta.tipo != "fuera de rango":  # ya se avisó arriba
+                st.warning(f"🚨 Alerta: {alerta}")
+
         # Si luego activas Google Sheets, con esto sube automáticamente
-        try:
-            log_to_google_sheets(entry)
-        except:
-            pass
+        log_to_google_sheets(entry)
 
 
 # ===========================
@@ -766,50 +641,27 @@ with tab_filtros:
 with tab_tds:
     st.subheader("💠 Enfoque especializado en TDS (Sólidos disueltos totales)")
 
-    info_tds = st.session_state.get("tds_info", None)
-
     col_a, col_b = st.columns(2)
 
     with col_a:
         st.write("### 🔹 Situación actual del TDS")
         st.write(f"**TDS inicial:** {tds} mg/L")
 
-        if tds <= 500:
-            st.success("El TDS se encuentra dentro de los valores recomendados por la NOM-127 (≤ 500 mg/L).")
-        elif tds <= 900:
-            st.warning("El TDS supera el valor recomendado. Puede haber sabor salado/amarargo y sedimentos.")
-        else:
-            st.error("El TDS es muy elevado (> 900 mg/L). El agua no es recomendable para consumo directo.")
+        clase_tds = interpretacion.tds_nom127
+        AVISOS[clase_tds.nivel](f"**Clasificación NOM-127:** {clase_tds.texto}")
 
     with col_b:
-        if info_tds is not None:
-            tds_after_local = info_tds["tds_after"]
-            reduccion = 100 * (1 - tds_after_local / tds) if tds > 0 else 0
-            st.write("### 🔹 Efecto del filtro recomendado sobre el TDS")
-            st.write(f"**Filtro recomendado:** {info_tds['filtro']}")
-            st.metric("TDS después del filtrado (estimado)", f"{tds_after_local:.2f} mg/L")
-            st.write(f"Reducción aproximada de TDS: **{reduccion:.1f}%**")
-        else:
-            st.info("Aún no se ha calculado un filtro recomendado. Ve primero a la pestaña **'Filtros y comparativa'**.")
+        tds_after_local = resultado.despues["TDS"]
+        reduccion = resultado.mejoras["TDS"]
+        st.write("### 🔹 Efecto del filtro recomendado sobre el TDS")
+        st.write(f"**Filtro recomendado:** {resultado.filtro_recomendado}")
+        st.metric("TDS después del filtrado (estimado)", f"{tds_after_local:.2f} mg/L")
+        st.write(f"Reducción aproximada de TDS: **{reduccion:.1f}%**")
 
     # Gráfica simple de TDS antes / después
-    if info_tds is not None:
-        st.write("---")
-        st.write("### 📉 Gráfica de TDS antes y después del filtrado")
-        df_tds = pd.DataFrame(
-            {"Estado": ["Antes", "Después"], "TDS (mg/L)": [tds, info_tds["tds_after"]]}
-        )
-        fig_tds = px.bar(
-            df_tds,
-            x="Estado",
-            y="TDS (mg/L)",
-            title="Cambio en TDS tras el filtrado",
-            color="Estado",
-        )
-        fig_tds.update_layout(template="plotly_dark", showlegend=False)
-        st.plotly_chart(fig_tds, use_container_width=True)
-        
-        st.session_state["fig_tds"] = fig_tds
+    st.write("---")
+    st.write("### 📉 Gráfica de TDS antes y después del filtrado")
+    st.plotly_chart(figuras["fig_tds"], use_container_width=True)
 
 # ===========================
 # TAB 5: HISTORIAL Y REPORTES
@@ -817,355 +669,326 @@ with tab_tds:
 with tab_hist:
     st.subheader("📂 Historial de simulaciones")
 
-    if len(st.session_state["historial"]) == 0:
+    almacen = almacen_historial()
+    total_historial = almacen.total()
+    pagina_hist = None
+
+    if total_historial == 0:
         st.info("Aún no hay simulaciones guardadas. Ejecuta una simulación y revisa la pestaña de 'Filtros y comparativa'.")
     else:
-        df_hist = pd.DataFrame(st.session_state["historial"])
-        st.dataframe(df_hist, use_container_width=True)
-
-        # ----- DESCARGAR CSV -----
-        csv_bytes = df_hist.to_csv(index=False).encode("utf-8")
-        st.download_button(
-            label="⬇️ Descargar historial en CSV",
-            data=csv_bytes,
-            file_name="historial_purificacion_ecatepec.csv",
-            mime="text/csv",
-            
+        # ----- FILTROS Y ORDEN (se resuelven en SQLite) -----
+        col_f0, col_f1, col_f2, col_f3, col_f4, col_f5 = st.columns([2, 2, 2, 2, 1, 1])
+        with col_f0:
+            sitio_hist = st.selectbox("Sitio", ["Todos"] + monitor_sitios().sitios())
+        with col_f1:
+            filtro_hist = st.selectbox("Filtro recomendado", ["Todos"] + list(FILTROS))
+        with col_f2:
+            tds_hist = st.slider("TDS (mg/L)", 0, 1500, (0, 1500), step=10)
+        with col_f3:
+            orden_hist = st.selectbox(
+                "Ordenar por", list(ORDENES), format_func=lambda o: ORDENES[o]
+            )
+        with col_f4:
+            descendente_hist = st.toggle("Descendente", value=True)
+        with col_f5:
+            tamano_pagina = st.selectbox("Filas por página", TAMANOS_PAGINA_HISTORIAL, index=1)
+
+        consulta = Consulta(
+            filtro=None if filtro_hist == "Todos" else filtro_hist,
+            sitio=None if sitio_hist == "Todos" else sitio_hist,
+            tds_min=tds_hist[0] if tds_hist[0] > 0 else None,
+            tds_max=tds_hist[1] if tds_hist[1] < 1500 else None,
+            orden=orden_hist,
+            descendente=descendente_hist,
         )
-    import matplotlib.pyplot as plt
-
-    def plotly_to_matplotlib(fig_plotly):
-        """
-        Convierte una figura de Plotly a una figura equivalente de Matplotlib.
-        Funciona bien con gráficas de barras, líneas y categorías.
-        """
-        import matplotlib.pyplot as plt
-    
-        fig_dict = fig_plotly.to_dict()
-        plt_fig, ax = plt.subplots(figsize=(6, 4))
-    
-        for trace in fig_dict["data"]:
-            x = trace.get("x", [])
-            y = trace.get("y", [])
-            name = trace.get("name", "")
-    
-            # Convertir a listas normales
-            if hasattr(x, "tolist"):
-                x = x.tolist()
-            if hasattr(y, "tolist"):
-                y = y.tolist()
-    
-            # Omitir trazas vacías
-            if y is None or len(y) == 0:
-                continue
-    
-            # Detectar categorías
-            usar_xticks = False
-            if len(x) > 0 and isinstance(x[0], str):
-                x_ticks = x
-                x = list(range(len(x_ticks)))
-                usar_xticks = True
-    
-            # Conversión de Y a float
-            try:
-                y = [float(i) for i in y]
-            except:
-                continue
-    
-            # Dibujar según tipo
-            tipo = trace.get("type", "")
-            if tipo == "bar":
-                ax.bar(x, y, label=name)
-            else:
-                ax.plot(x, y, label=name)
-    
-            # Poner categorías
-            if usar_xticks:
-                ax.set_xticks(x)
-                ax.set_xticklabels(x_ticks, rotation=45, ha="right")
-    
-        # Títulos
-        layout = fig_dict.get("layout", {})
-        ax.set_title(layout.get("title", {}).get("text", ""))
-        ax.set_xlabel(layout.get("xaxis", {}).get("title", {}).get("text", ""))
-        ax.set_ylabel(layout.get("yaxis", {}).get("title", {}).get("text", ""))
-    
-        if any([t.get("name") for t in fig_dict["data"]]):
-            ax.legend()
-    
-        plt.tight_layout()
-        return plt_fig
 
+        # ----- PÁGINA ACTUAL -----
+        # Guardamos los cursores de las páginas visitadas para poder regresar
+        if st.session_state.get("hist_consulta") != (consulta, tamano_pagina):
+            st.session_state["hist_consulta"] = (consulta, tamano_pagina)
+            st.session_state["hist_cursores"] = [None]
+        cursores = st.session_state["hist_cursores"]
+
+        pagina_hist, siguiente = almacen.pagina(consulta, tamano_pagina, cursores[-1])
+        st.caption(f"{total_historial:,} simulaciones guardadas · página {len(cursores)}")
+        st.dataframe(pagina_hist, use_container_width=True)
+
+        col_ant, col_sig = st.columns(2)
+        with col_ant:
+            if st.button("⬅️ Anterior", disabled=len(cursores) == 1):
+                cursores.pop()
+                st.rerun()
+        with col_sig:
+            if st.button("Siguiente ➡️", disabled=siguiente is None):
+                cursores.append(siguiente)
+                st.rerun()
+
+        # ----- EXPORTAR (se genera por bloques solo cuando se pide) -----
+        formatos = ["CSV", "Parquet"] if PYARROW_AVAILABLE else ["CSV"]
+        formato_hist = st.radio("Formato de exportación", formatos, horizontal=True)
+        exportar = csv_por_bloques if formato_hist == "CSV" else parquet_por_bloques
+
+        def escribir_exportacion(destino):
+            for trozo in exportar(almacen.bloques(TAMANO_BLOQUE, consulta)):
+                destino.write(trozo)
+
+        extension = formato_hist.lower()
+        descarga_bajo_demanda(
+            "hist_exportacion",
+            (consulta, formato_hist, total_historial),
+            escribir_exportacion,
+            f"📦 Preparar exportación en {formato_hist} (con los filtros actuales)",
+            f"⬇️ Descargar historial en {formato_hist}",
+            f"historial_purificacion_ecatepec.{extension}",
+            "text/csv" if extension == "csv" else "application/vnd.apache.parquet",
+        )
 
-
-    
-    def fig_to_image_reader(fig_local):
-        buf = BytesIO()
-    
-        # Si es figura de Matplotlib
-        if hasattr(fig_local, "savefig"):
-            fig_local.savefig(buf, format="png", dpi=120, bbox_inches="tight")
-            buf.seek(0)
-            return ImageReader(buf)
-    
-        # Si es Plotly
-        try:
-            import plotly.io as pio
-            img_bytes = pio.to_image(fig_local, format="png", engine="json")
-            buf.write(img_bytes)
-            buf.seek(0)
-            return ImageReader(buf)
-        except:
-            raise ValueError("Error convirtiendo figura Plotly a PNG")
-    
-    
-    def generar_pdf(
-        datos,
-        df_filtros_local,
-        fig_filtros_local,
-        fig_radar_local,
-        fig_before_after_local,
-        info_tds_local,
-    ):
-        buffer = BytesIO()
-        c = canvas.Canvas(buffer, pagesize=letter)
-        width, height = letter
-    
-        # ---------- TÍTULO ----------
-        c.setFillColor(colors.darkblue)
-        c.setFont("Helvetica-Bold", 18)
-        c.drawString(50, height - 50, "Reporte de Purificación de Agua – Ecatepec")
-        c.setFillColor(colors.black)
-    
-        # ---------- DATOS ----------
-        y = height - 90
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, y, "1. Datos del agua analizada")
-        y -= 20
-        c.setFont("Helvetica", 10)
-    
-        lineas = [
-            f"pH: {datos['pH']}",
-            f"Turbidez (NTU): {datos['Turbidez_NTU']}",
-            f"Coliformes (NMP/100ml): {datos['Coliformes_NMP_100ml']}",
-            f"Metales (ppm): {datos['Metales_ppm']}",
-            f"TDS (mg/L): {datos['TDS_mgL']}",
-            f"Olor desagradable: {datos['Olor']}",
-            f"Nivel de contaminación: {datos['Nivel_contaminacion_%']:.1f} %",
-        ]
-    
-        for linea in lineas:
-            c.drawString(60, y, linea)
-            y -= 14
-    
-        # ---------- TABLA FILTROS ----------
-        y -= 10
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, y, "2. Comparativa de filtros utilizados")
-        y -= 20
-    
-        # Encabezado
-        c.setFillColor(colors.darkblue)
-        c.rect(50, y - 15, 500, 18, fill=1)
-        c.setFillColor(colors.white)
-        c.drawString(55, y - 12, "Filtro")
-        c.drawString(220, y - 12, "Eficiencia (%)")
-        c.drawString(390, y - 12, "Purificación (%)")
-    
-        c.setFillColor(colors.black)
-        y -= 25
-        c.setFont("Helvetica", 9)
-    
-        for _, fila in df_filtros_local.iterrows():
-            if y < 120:
-                c.showPage()
-                y = height - 80
-            c.drawString(55, y, str(fila["Filtro"]))
-            c.drawString(220, y, f"{fila['Eficiencia base (%)']:.1f}")
-            c.drawString(390, y, f"{fila['Purificación estimada (%)']:.1f}")
-            y -= 14
-    
-        # ---------- GRÁFICAS ----------
-        c.showPage()
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 50, "3. Gráficas de análisis")
-    
-        # ----- Filtros -----
-        fig_filtros_mpl = plotly_to_matplotlib(fig_filtros_local)
-        img_filtros = fig_to_image_reader(fig_filtros_mpl)
-        
-        # ----- Radar (mpl) -----
-        img_radar = fig_to_image_reader(fig_radar_local)
-        
-        # ----- ANTES / DESPUES -----
-        fig_ba_mpl = plotly_to_matplotlib(fig_before_after_local)
-        img_ba = fig_to_image_reader(fig_ba_mpl)
-
-    
-        c.drawImage(img_filtros, 50, height - 350, width=500, height=250)
-        c.drawImage(img_radar, 150, 50, width=300, height=220)
-    
-        # ---------- BEFORE / AFTER ----------
-        c.showPage()
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 50, "4. Comparativa antes/después del filtrado")
-        c.drawImage(img_ba, 50, 200, width=500, height=300)
-    
-       # ---------- TDS ----------
-        c.showPage()
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 50, "5. Análisis especializado de TDS")
-
-        y = height - 90
-        c.setFont("Helvetica", 10)
-
-        tds_before = info_tds_local["tds_before"]
-        tds_after = info_tds_local["tds_after"]
-        reduccion = 100 * (1 - tds_after / tds_before)
-
-        tds_lineas = [
-            f"TDS inicial: {tds_before:.2f} mg/L",
-            f"TDS tras filtrado: {tds_after:.2f} mg/L",
-            f"Reducción estimada: {reduccion:.1f} %",
-        ]
-
-        for l in tds_lineas:
-            c.drawString(60, y, l)
-            y -= 16
-
-
-        # ---------- CONCLUSIÓN FINAL ----------
-        c.showPage()
-        c.setFont("Helvetica-Bold", 12)
-        c.drawString(50, height - 50, "6. Conclusión final del análisis")
-
-        y = height - 90
-        c.setFont("Helvetica", 10)
-
-        # Interpretación del riesgo global
-        try:
-            riesgo_before_local = st.session_state["riesgo_before"]
-            riesgo_after_local = st.session_state["riesgo_after"]
-        except:
-            riesgo_before_local = {}
-            riesgo_after_local = {}
-
-        if len(riesgo_after_local) > 0:
-            riesgo_global_after = sum(riesgo_after_local.values()) / 4
-        else:
-            riesgo_global_after = 0
-
-        # Texto según riesgo
-        if riesgo_global_after <= 10:
-            conclusion_text = (
-                "El agua presenta excelente calidad tras el proceso de filtrado.\n"
-                "Puede considerarse apta para consumo humano directo.\n"
-                "Se recomienda mantener el sistema de filtración en buen estado."
-            )
-        elif riesgo_global_after <= 25:
-            conclusion_text = (
-                "El agua alcanza un nivel aceptable después del filtrado.\n"
-                "Adecuada para la mayoría de usos domésticos.\n"
-                "Aun así se aconseja monitoreo periódico."
-            )
-        elif riesgo_global_after <= 45:
-            conclusion_text = (
-                "El agua mantiene un riesgo moderado tras el filtrado.\n"
-                "Se recomienda aplicar tratamientos adicionales como ósmosis inversa\n"
-                "o desinfección UV."
-            )
-        else:
-            conclusion_text = (
-                "El agua continúa con un riesgo elevado incluso después del filtrado.\n"
-                "No se recomienda para consumo humano.\n"
-                "Se requiere tratamiento avanzado (ósmosis inversa o nanofiltración)."
+    # ===============================
+    #     MONITOREO POR SITIO
+    # ===============================
+    monitor = monitor_sitios()
+    if monitor.sitios():
+        st.write("---")
+        st.subheader("📍 Monitoreo por punto de muestreo")
+        st.caption(
+            f"Agregados de las últimas {monitor.ventana} muestras de cada sitio; se actualizan al "
+            f"guardar cada simulación. Excedencia: TDS > {LIMITE_TDS:.0f} mg/L (NOM-127)."
+        )
+        resumen_sitios = monitor.resumen()
+        st.dataframe(resumen_sitios.round(2), use_container_width=True, hide_index=True)
+
+        sitio_serie = st.selectbox("Serie de TDS del sitio", monitor.sitios(), key="sitio_serie")
+        serie = monitor.serie(sitio_serie)
+        serie["Límite NOM-127"] = LIMITE_TDS
+        st.line_chart(serie)
+
+    psi = monitor.psi()
+    if not pd.isna(list(psi.values())).all():
+        st.caption(
+            f"Deriva de las muestras recientes respecto al dataset de entrenamiento (PSI; "
+            f"más de {PSI_DERIVA:g} indica que el modelo se usa fuera de su distribución)."
+        )
+        for col, (parametro, valor) in zip(st.columns(len(psi)), psi.items()):
+            col.metric(
+                f"PSI {parametro}", f"{valor:.2f}", "deriva" if valor > PSI_DERIVA else None, delta_color="inverse"
             )
 
-        # Escribir texto línea por línea
-        for linea in conclusion_text.split("\n"):
-            c.drawString(60, y, linea)
-            y -= 16
-            if y < 100:
-                c.showPage()
-                y = height - 80
-
-        # Contaminante dominante
-        try:
-            dominante = max(riesgo_after_local, key=riesgo_after_local.get)
-        except:
-            dominante = "—"
-
-        y -= 10
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(60, y, f"Contaminante residual dominante: {dominante}")
-        y -= 20
-
-        # Recomendación específica por contaminante
-        recomendaciones = {
-            "TDS": "Se recomienda ósmosis inversa o intercambio iónico.",
-            "Metales": "Se recomienda nanofiltración o adsorción nanotecnológica.",
-            "Coliformes": "Se recomienda desinfección UV o UVC.",
-            "Turbidez": "Se recomienda prefiltración de sedimentos o zeolita.",
-        }
+    @st.cache_data(max_entries=32, show_spinner="Generando reporte PDF…")
+    def reporte_pdf(entrada):
+        """PDF de una simulación; se guarda en caché por sus parámetros (ID)."""
+        from purificacion.reporte import pdf_resultado
 
-        recomendacion = recomendaciones.get(dominante, "Sin recomendación específica.")
-        c.setFont("Helvetica", 10)
-        c.drawString(60, y, f"Recomendación final: {recomendacion}")
-
-        # ---------- FIN ----------
-        c.showPage()
-        c.save()
-        buffer.seek(0)
-        return buffer
+        return pdf_resultado(analizar(entrada))
 
 
     # ===============================
     #           GENERAR PDF
     # ===============================
     st.write("---")
-    st.subheader("📄 Generar reporte PDF de la última simulación (con enfoque TDS)")
-    
+    st.subheader("📄 Generar reporte PDF de una simulación (con enfoque TDS)")
+
     # 1) Si NO hay historial → no podemos generar PDF
-    if len(st.session_state["historial"]) == 0:
+    if total_historial == 0:
         st.warning("Aún no puedes generar el PDF porque no hay simulaciones guardadas.")
+    elif not REPORTLAB_AVAILABLE:
+        st.warning("Para generar el PDF instala `reportlab` (ver requirements.txt).")
     else:
-        # 2) Cargar historial
-        df_hist = pd.DataFrame(st.session_state["historial"])
-    
-        # 3) Validar que existan datos para todas las gráficas
-        if (
-            st.session_state["df_filtros"] is None
-            or st.session_state["fig_filtros"] is None
-            or st.session_state["fig_radar"] is None
-            or st.session_state["fig_before_after"] is None
-            or st.session_state["tds_info"] is None
-        ):
-            st.warning(
-                "Aún no hay datos completos para el reporte (filtros, gráficas y TDS). "
-                "Ve a la pestaña **'Filtros y comparativa'** primero."
-            )
-    
+        # 2) Elegir la simulación de la página actual (por defecto la primera)
+        if pagina_hist.empty:
+            st.info("Ninguna simulación coincide con los filtros del historial.")
         else:
-            # --- TODO OK, GENERAMOS EL PDF ---
-            ultima = df_hist.iloc[-1]   # AHORA df_hist sí existe
-            df_filtros = st.session_state["df_filtros"]
-            fig_filtros = st.session_state["fig_filtros"]
-            fig_radar = st.session_state["fig_radar"]
-            fig_before_after = st.session_state["fig_before_after"]
-            info_tds = st.session_state["tds_info"]
-    
-            pdf_buffer = generar_pdf(
-                ultima,
-                df_filtros,
-                fig_filtros,
-                fig_radar,
-                fig_before_after,
-                info_tds,
+            n_pdf = st.selectbox(
+                "Simulación",
+                options=list(pagina_hist.index),
+                format_func=lambda n: (
+                    f"#{n} — {pagina_hist.at[n, 'ID']} — {pagina_hist.at[n, 'Filtro_recomendado']}"
+                ),
             )
-    
-            st.download_button(
-                label="⬇️ Descargar reporte PDF con tablas, gráficas y enfoque TDS",
-                data=pdf_buffer,
-                file_name="reporte_purificacion_ecatepec_TDS.pdf",
-                mime="application/pdf",
+            muestra_pdf = Muestra.desde_historial(almacen.entrada(n_pdf))
+            entrada_pdf = astuple(muestra_pdf)
+
+            # 3) El PDF solo se construye cuando se pide; después queda en caché por ID
+            if st.session_state.get("pdf_solicitado") != muestra_pdf.id:
+                if st.button("📄 Preparar reporte PDF"):
+                    st.session_state["pdf_solicitado"] = muestra_pdf.id
+                    st.rerun()
+            else:
+                st.download_button(
+                    label="⬇️ Descargar reporte PDF con tablas, gráficas y enfoque TDS",
+                    data=reporte_pdf(entrada_pdf),
+                    file_name=f"reporte_purificacion_ecatepec_TDS_{muestra_pdf.id}.pdf",
+                    mime="application/pdf",
+                )
+
+        # 4) Reporte consolidado de todas las simulaciones del historial
+        st.write("---")
+        st.subheader("📚 Reporte de campaña")
+        st.caption("Resumen general, agregados por colonia y una página compacta por simulación.")
+        reporte_campana(
+            "historial",
+            total_historial,  # el historial solo crece
+            lambda: almacen.bloques(TAMANO_BLOQUE),
+            "reporte_campana_purificacion_ecatepec.pdf",
+        )
+
+
+# ===========================
+# TAB 6: CARGA MASIVA
+# ===========================
+with tab_carga:
+    st.subheader("📦 Carga masiva de muestras (CSV)")
+    st.write(
+        "Sube un CSV con las columnas **turbidez, coliformes, metales, tds** y opcionalmente **olor** "
+        "(mismo formato que `dataset_filtros_entrenamiento.csv`). El archivo se procesa por bloques, "
+        "así que puede tener cientos de miles de filas."
+    )
+
+    archivo = st.file_uploader("Archivo CSV de muestras", type=["csv"])
+
+    def descartar_resultado_carga():
+        # El CSV de resultados vive en un temporal: se borra al cambiar o quitar el archivo
+        ruta_anterior, _ = st.session_state.pop("carga_resultado", (None, None))
+        st.session_state.pop("carga_clave", None)
+        if ruta_anterior is not None and os.path.exists(ruta_anterior):
+            os.remove(ruta_anterior)
+
+    if archivo is None:
+        descartar_resultado_carga()
+    else:
+        # Procesamos una sola vez por archivo; los reruns reutilizan el resultado
+        clave_carga = (archivo.file_id, archivo.size)
+        if st.session_state.get("carga_clave") != clave_carga:
+            descartar_resultado_carga()
+            barra = st.progress(0.0, text="Procesando bloques…")
+
+            def actualizar_progreso(filas, fraccion):
+                barra.progress(fraccion, text=f"{filas:,} muestras procesadas")
+
+            salida = tempfile.NamedTemporaryFile(
+                mode="w", suffix=".csv", delete=False, encoding="utf-8", newline=""
             )
+            try:
+                with salida:
+                    total = procesar_csv(
+                        archivo,
+                        salida,
+                        total_bytes=archivo.size,
+                        progreso=actualizar_progreso,
+                        modelo=modelo_filtros,
+                    )
+            except ValueError as e:
+                os.remove(salida.name)
+                st.error(f"No se pudo procesar el archivo: {e}")
+            except BaseException:
+                # También si un rerun interrumpe el procesamiento
+                os.remove(salida.name)
+                raise
+            else:
+                barra.progress(1.0, text=f"{total:,} muestras procesadas")
+                st.session_state["carga_clave"] = clave_carga
+                st.session_state["carga_resultado"] = (salida.name, total)
+
+        if st.session_state.get("carga_clave") == clave_carga:
+            ruta_resultado, total = st.session_state["carga_resultado"]
+            st.success(f"✅ {total:,} muestras evaluadas.")
+            with open(ruta_resultado, "rb") as f:
+                st.download_button(
+                    label="⬇️ Descargar resultados en CSV",
+                    data=f,
+                    file_name="resultados_carga_masiva.csv",
+                    mime="text/csv",
+                )
+
+            if REPORTLAB_AVAILABLE:
+                # Se lee por bloques del archivo de resultados, sin cargarlo completo
+                reporte_campana(
+                    "carga",
+                    clave_carga,
+                    lambda: pd.read_csv(ruta_resultado, chunksize=TAMANO_BLOQUE),
+                    "reporte_campana_carga_masiva.pdf",
+                )
+
+
+# ===========================
+# TAB 7: SENSIBILIDAD
+# ===========================
+with tab_sensibilidad:
+    st.subheader("🗺️ Sensibilidad a dos parámetros")
+    st.write(
+        "Evalúa una malla sobre todo el rango de dos parámetros, con los otros dos y el olor "
+        "fijos en los valores de la barra lateral, y muestra cómo cambian el filtro recomendado, "
+        "el riesgo residual y el nivel de contaminación."
+    )
+
+    col_x, col_y, col_res = st.columns(3)
+    eje_x = col_x.selectbox("Eje horizontal", PARAMETROS, index=PARAMETROS.index("TDS"))
+    opciones_y = [p for p in PARAMETROS if p != eje_x]
+    eje_y = col_y.selectbox(
+        "Eje vertical", opciones_y, index=opciones_y.index("Metales") if "Metales" in opciones_y else 0
+    )
+    resolucion = col_res.select_slider("Resolución", [50, 100, 200, 300], value=RESOLUCION)
+
+    fijos = tuple((p, resultado.antes[p]) for p in PARAMETROS if p not in (eje_x, eje_y))
+    barrido, figuras_sens = construir_barrido(
+        eje_x, eje_y, fijos, 1.0 if olor == "Sí" else 0.0, resolucion
+    )
+    st.caption(
+        f"Malla de {resolucion}×{resolucion} muestras · fijos: "
+        + ", ".join(f"{p} = {valor:g}" for p, valor in fijos)
+        + f" · olor: {olor}. La ✖ marca tu muestra."
+    )
+
+    for clave in ("fig_filtro", "fig_riesgo", "fig_nivel"):
+        # Copia de la figura en caché con la muestra actual marcada
+        fig = go.Figure(figuras_sens[clave])
+        fig.add_scatter(
+            x=[resultado.antes[eje_x]],
+            y=[resultado.antes[eje_y]],
+            mode="markers",
+            marker=dict(symbol="x", size=12, color="white"),
+            hoverinfo="skip",
+            showlegend=False,
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
+
+# ===========================
+# TAB 8: MAPA
+# ===========================
+with tab_mapa:
+    st.subheader("🌎 Mapa de contaminación por colonia")
+    indice = indice_geo(almacen_historial().total())
+
+    if not len(indice):
+        st.info("Aún no hay simulaciones con ubicación. Elige una colonia en la barra lateral al guardar.")
+    else:
+        col_centro, col_radio, col_celda, col_color = st.columns(4)
+        centro_mapa = col_centro.selectbox(
+            "Centrar en", sorted(COLONIAS_ECATEPEC), index=sorted(COLONIAS_ECATEPEC).index("San Cristóbal Centro")
+        )
+        radio_km = col_radio.slider("Radio de la vista (km)", 1, 15, 6)
+        tamano_km = col_celda.select_slider("Celda (km)", [0.25, 0.5, 1.0, 2.0], value=0.5)
+        columna_color = col_color.radio(
+            "Color", ["Nivel_contaminacion_%", RIESGO_RESIDUAL],
+            format_func=lambda c: "Nivel de contaminación" if c == "Nivel_contaminacion_%" else "Riesgo residual",
+        )
+
+        lat_c, lon_c = COLONIAS_ECATEPEC[centro_mapa]
+        en_vista = indice.en_vista(*rectangulo(lat_c, lon_c, radio_km))
+        celdas = indice.celdas(tamano_km, filas=en_vista)
+        st.caption(
+            f"{len(en_vista):,} de {len(indice):,} muestras con ubicación en la vista, "
+            f"agregadas en {len(celdas):,} celdas de {tamano_km:g} km."
+        )
+        titulo = (
+            "Nivel de contaminación medio (%)"
+            if columna_color == "Nivel_contaminacion_%"
+            else "Riesgo residual medio tras el filtro (%)"
+        )
+        zoom = 14 - math.log2(radio_km)
+        st.plotly_chart(figura_mapa(celdas, columna_color, titulo, (lat_c, lon_c), zoom), use_container_width=True)
+
+        k = st.number_input("Muestras más cercanas al centro", min_value=1, max_value=100, value=10)
+        filas, distancias = indice.cercanos(lat_c, lon_c, int(k))
+        cercanas = indice.tabla.iloc[filas].assign(Distancia_km=distancias.round(2))
+        st.dataframe(cercanas.round(2), use_container_width=True)
@@ -0,0 +1,99 @@
+"""
+Mide el arranque de la app: corre ``app.py`` con ``AppTest`` en un proceso
+nuevo bajo ``python -X importtime`` y reporta cuánto tardan en importarse
+los módulos que carga la primera página (sin contar streamlit, que ya está
+cargado), agrupados por paquete, y cuáles de los paquetes pesados entraron.
+Con ``--iniciada`` mide la página del simulador (después de la portada).
+
+Sale con código 1 si la portada pasa del presupuesto o carga un paquete
+que solo deben cargar las funciones que lo usan.
+
+Uso: python benchmarks/arranque.py [PRESUPUESTO_MS] [--iniciada]
+"""
+
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARCA = "----- app.py -----"
+PRESUPUESTO_MS = 400.0
+MOSTRAR = 12
+
+# Paquetes que la portada no debe importar (y quién los necesita)
+PESADOS = {
+    "pandas": "historial, tablas y carga masiva",
+    "plotly": "gráficas interactivas",
+    "matplotlib": "gráfica de radar",
+    "reportlab": "reporte PDF",
+    "gspread": "registro en Google Sheets",
+    "oauth2client": "registro en Google Sheets",
+    "pyarrow": "exportación a Parquet",
+}
+
+PROGRAMA = """
+import sys, time
+from streamlit.testing.v1 import AppTest
+sys.stderr.write({marca!r} + "\\n")
+at = AppTest.from_file("app.py", default_timeout=300)
+at.session_state["started"] = {iniciada}
+inicio = time.perf_counter()
+at.run()
+print((time.perf_counter() - inicio) * 1000)
+if at.exception:
+    raise SystemExit(at.exception[0].message)
+"""
+
+LINEA = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|( *)(\S+)")
+
+
+def importaciones(iniciada: bool):
+    """Módulos importados por la app: [(módulo, propio_us, acumulado_us, nivel)] y su tiempo total (ms)."""
+    orden = [sys.executable, "-X", "importtime", "-c", PROGRAMA.format(marca=MARCA, iniciada=iniciada)]
+    proceso = subprocess.run(orden, cwd=RAIZ, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise SystemExit(proceso.stderr[-2000:])
+    _, _, despues = proceso.stderr.partition(MARCA)
+    modulos = []
+    for linea in despues.splitlines():
+        m = LINEA.match(linea)
+        if m:
+            propio, acumulado, sangria, modulo = m.groups()
+            modulos.append((modulo, int(propio), int(acumulado), (len(sangria) - 1) // 2))
+    return modulos, float(proceso.stdout.split()[-1])
+
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    presupuesto = float(argumentos[0]) if argumentos else PRESUPUESTO_MS
+    iniciada = "--iniciada" in sys.argv
+
+    modulos, ejecucion_ms = importaciones(iniciada)
+    total_ms = sum(propio for _, propio, _, _ in modulos) / 1000
+    por_paquete = defaultdict(int)
+    for modulo, propio, _, _ in modulos:
+        por_paquete[modulo.split(".")[0]] += propio
+
+    pagina = "simulador" if iniciada else "portada"
+    print(f"{pagina}: {len(modulos)} módulos importados en {total_ms:.0f} ms "
+          f"(primera ejecución de app.py: {ejecucion_ms:.0f} ms)")
+    print("Por paquete:")
+    for paquete, propio in sorted(por_paquete.items(), key=lambda x: -x[1])[:MOSTRAR]:
+        print(f"  {paquete:<24} {propio / 1000:8.1f} ms")
+    print("Importados directamente por la app (acumulado):")
+    directos = [(m, acumulado) for m, _, acumulado, nivel in modulos if nivel == 0]
+    for modulo, acumulado in sorted(directos, key=lambda x: -x[1])[:MOSTRAR]:
+        print(f"  {modulo:<40} {acumulado / 1000:8.1f} ms")
+
+    cargados = [p for p in PESADOS if p in por_paquete]
+    for paquete in cargados:
+        print(f"Cargó {paquete} ({por_paquete[paquete] / 1000:.0f} ms), que solo necesita: {PESADOS[paquete]}")
+    if not iniciada and (cargados or total_ms > presupuesto):
+        print(f"La portada excede el presupuesto de {presupuesto:.0f} ms o carga paquetes pesados")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Prueba de carga del servicio HTTP (``purificacion.servidor``): levanta el
+servidor en otro proceso, abre C conexiones keep-alive que mandan muestras
+aleatorias a ``POST /evaluar`` una tras otra, y reporta la latencia p50/p99,
+las solicitudes por segundo y el tamaño medio de los microlotes. Con
+``--comparar`` repite la prueba sin agrupar (lotes de una fila).
+
+Uso: python benchmarks/carga_api.py [CLIENTES] [SOLICITUDES] [--comparar]
+"""
+
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HOST = "127.0.0.1"
+
+
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+def cuerpo_aleatorio(rng) -> bytes:
+    return json.dumps({
+        "turbidez": round(float(rng.uniform(0.1, 50)), 2),
+        "coliformes": round(float(rng.uniform(0, 2000)), 1),
+        "metales": round(float(rng.uniform(0, 2)), 3),
+        "tds": round(float(rng.uniform(50, 1500)), 1),
+        "olor": "Sí" if rng.random() < 0.5 else "No",
+    }).encode("utf-8")
+
+
+async def solicitar(lector, escritor, metodo: str, ruta: str, cuerpo: bytes = b"") -> bytes:
+    escritor.write(
+        f"{metodo} {ruta} HTTP/1.1\r\nHost: {HOST}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(cuerpo)}\r\n\r\n".encode("latin-1") + cuerpo
+    )
+    await escritor.drain()
+    estado = await lector.readline()
+    largo = 0
+    while True:
+        linea = await lector.readline()
+        if linea == b"\r\n":
+            break
+        if linea.lower().startswith(b"content-length:"):
+            largo = int(linea.split(b":")[1])
+    datos = await lector.readexactly(largo)
+    if b" 200 " not in estado:
+        raise RuntimeError(f"{estado!r}: {datos[:200]!r}")
+    return datos
+
+
+async def esperar_servidor(puerto: int, tiempo_maximo: float = 60.0) -> None:
+    limite = time.monotonic() + tiempo_maximo
+    while True:
+        try:
+            lector, escritor = await asyncio.open_connection(HOST, puerto)
+            await solicitar(lector, escritor, "GET", "/salud")
+            escritor.close()
+            return
+        except OSError:
+            if time.monotonic() > limite:
+                raise
+            await asyncio.sleep(0.1)
+
+
+async def cliente(puerto: int, solicitudes: int, semilla: int, latencias: list) -> None:
+    rng = np.random.default_rng(semilla)
+    lector, escritor = await asyncio.open_connection(HOST, puerto)
+    try:
+        for _ in range(solicitudes):
+            cuerpo = cuerpo_aleatorio(rng)
+            inicio = time.perf_counter()
+            await solicitar(lector, escritor, "POST", "/evaluar", cuerpo)
+            latencias.append(time.perf_counter() - inicio)
+    finally:
+        escritor.close()
+
+
+async def prueba(puerto: int, clientes: int, solicitudes: int) -> dict:
+    await esperar_servidor(puerto)
+    por_cliente = max(1, solicitudes // clientes)
+    latencias = []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(cliente(puerto, por_cliente, i, latencias) for i in range(clientes)))
+    transcurrido = time.perf_counter() - inicio
+
+    lector, escritor = await asyncio.open_connection(HOST, puerto)
+    salud = json.loads(await solicitar(lector, escritor, "GET", "/salud"))
+    escritor.close()
+    p50, p99 = np.percentile(latencias, [50, 99]) * 1000
+    return {
+        "solicitudes": len(latencias),
+        "p50": p50,
+        "p99": p99,
+        "rps": len(latencias) / transcurrido,
+        "muestras_por_lote": salud["muestras_por_lote"],
+    }
+
+
+def correr(clientes: int, solicitudes: int, max_lote=None) -> dict:
+    puerto = puerto_libre()
+    orden = [sys.executable, "-m", "purificacion.servidor", "--puerto", str(puerto)]
+    if max_lote is not None:
+        orden += ["--max-lote", str(max_lote)]
+    servidor = subprocess.Popen(orden, cwd=RAIZ, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        return asyncio.run(prueba(puerto, clientes, solicitudes))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+
+def main():
+    argumentos = [a for a in sys.argv[1:] if not a.startswith("--")]
+    clientes = int(argumentos[0]) if len(argumentos) > 0 else 1000
+    solicitudes = int(argumentos[1]) if len(argumentos) > 1 else 20_000
+
+    casos = [("microlotes", None)]
+    if "--comparar" in sys.argv:
+        casos.append(("sin agrupar", 1))
+    for nombre, max_lote in casos:
+        r = correr(clientes, solicitudes, max_lote)
+        print(
+            f"{nombre}: {r['solicitudes']:,} solicitudes con {clientes} clientes · "
+            f"p50 {r['p50']:.1f} ms · p99 {r['p99']:.1f} ms · {r['rps']:,.0f} solicitudes/s · "
+            f"{r['muestras_por_lote']:.1f} muestras por lote"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Mide el índice espacial con N muestras repartidas en Ecatepec: construcción,
+consultas de vista, vecinos más cercanos y agregación en celdas, y verifica
+las consultas contra un recorrido completo.
+
+Uso: python benchmarks/indice_geo.py [N] [CONSULTAS] [K]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.geo import RIESGO_RESIDUAL, IndiceGeo, a_km, rectangulo  # noqa: E402
+
+# Cuadro que contiene al municipio
+LATITUDES = (19.49, 19.66)
+LONGITUDES = (-99.10, -98.97)
+
+
+def muestras_aleatorias(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return pd.DataFrame({
+        "Latitud": rng.uniform(*LATITUDES, n),
+        "Longitud": rng.uniform(*LONGITUDES, n),
+        "Nivel_contaminacion_%": rng.uniform(0, 100, n),
+        RIESGO_RESIDUAL: rng.uniform(0, 60, n),
+    })
+
+
+def percentiles(tiempos):
+    p50, p99 = np.percentile(tiempos, [50, 99]) * 1000
+    return f"p50 {p50:.2f} ms, p99 {p99:.2f} ms"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    consultas = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    k = int(sys.argv[3]) if len(sys.argv) > 3 else 10
+
+    tabla = muestras_aleatorias(n)
+    inicio = time.perf_counter()
+    indice = IndiceGeo(tabla)
+    print(f"{n:,} muestras indexadas en {(time.perf_counter() - inicio) * 1000:.1f} ms "
+          f"(celda de {indice.tamano_celda_km:g} km)")
+
+    rng = np.random.default_rng(1)
+    x, y = a_km(tabla["Latitud"].to_numpy(), tabla["Longitud"].to_numpy())
+    lat, lon = tabla["Latitud"].to_numpy(), tabla["Longitud"].to_numpy()
+    t_vista, t_cercanos, t_celdas, en_vista = [], [], [], []
+    for _ in range(consultas):
+        punto = (rng.uniform(*LATITUDES), rng.uniform(*LONGITUDES))
+        cuadro = rectangulo(*punto, rng.uniform(0.5, 6))
+
+        inicio = time.perf_counter()
+        filas = indice.en_vista(*cuadro)
+        t_vista.append(time.perf_counter() - inicio)
+        en_vista.append(len(filas))
+
+        inicio = time.perf_counter()
+        indice.celdas(0.5, filas=filas)
+        t_celdas.append(time.perf_counter() - inicio)
+
+        inicio = time.perf_counter()
+        _, distancias = indice.cercanos(*punto, k)
+        t_cercanos.append(time.perf_counter() - inicio)
+
+        # Recorrido completo
+        dentro = (lat >= cuadro[0]) & (lat <= cuadro[1]) & (lon >= cuadro[2]) & (lon <= cuadro[3])
+        assert np.array_equal(np.sort(filas), np.flatnonzero(dentro))
+        px, py = a_km(*punto)
+        assert np.allclose(distancias, np.sort(np.hypot(x - px, y - py))[:k])
+
+    print(f"Vista ({np.mean(en_vista):,.0f} muestras en promedio): {percentiles(t_vista)}")
+    print(f"{k} más cercanos: {percentiles(t_cercanos)}")
+    print(f"Agregación en celdas de 0.5 km: {percentiles(t_celdas)}; "
+          f"todo el municipio en {len(indice.celdas(0.5)):,} celdas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+"""
+Mide el tiempo de ``monte_carlo`` y verifica que es reproducible con la
+misma semilla y que la mediana se acerca a la evaluación puntual.
+
+Uso: python benchmarks/monte_carlo.py [SORTEOS] [REPETICIONES]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion import Muestra, cargar_modelo, evaluar  # noqa: E402
+from purificacion.incertidumbre import SORTEOS, monte_carlo  # noqa: E402
+
+
+def main():
+    sorteos = int(sys.argv[1]) if len(sys.argv) > 1 else SORTEOS
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    modelo = cargar_modelo()
+    muestra = Muestra(7.0, 10.0, 500, 0.4, 650, "No")
+    monte_carlo(muestra, modelo, 1000, semilla=0)  # calentamiento
+
+    tiempos = []
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = monte_carlo(muestra, modelo, sorteos, semilla=i)
+        tiempos.append(time.perf_counter() - inicio)
+
+    assert monte_carlo(muestra, modelo, sorteos, semilla=7) == monte_carlo(muestra, modelo, sorteos, semilla=7)
+    puntual = evaluar(muestra, modelo)
+    bajo, _, alto = resultado.riesgo_global_despues
+    assert bajo <= puntual.riesgo_global_despues <= alto
+
+    tiempos = np.array(tiempos) * 1000
+    print(
+        f"{sorteos:,} sorteos: mediana {np.median(tiempos):.0f} ms, máx. {tiempos.max():.0f} ms; "
+        f"riesgo residual {resultado.riesgo_global_despues[1]:.1f} "
+        f"[{bajo:.1f}, {alto:.1f}] (puntual {puntual.riesgo_global_despues:.1f})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Mide el tiempo por consulta del optimizador de trenes de tratamiento sobre un
+catálogo ampliado con cartuchos aleatorios, y verifica contra la búsqueda
+exhaustiva en un catálogo chico.
+
+Uso: python benchmarks/optimizador_cadenas.py [ETAPAS] [K] [CONSULTAS]
+"""
+
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.catalogo import CONTAMINANTES, Filtro, cargar_catalogo  # noqa: E402
+from purificacion.interpretacion import LIMITES_NOM127  # noqa: E402
+from purificacion.motor import PARAMETROS  # noqa: E402
+from purificacion.optimizador import Optimizador  # noqa: E402
+
+
+def catalogo_ampliado(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    catalogo = list(cargar_catalogo())
+    extra = [
+        Filtro(
+            f"Cartucho {i + 1}",
+            {c: float(rng.uniform(0, 0.999)) if rng.random() < 0.6 else 0.0 for c in CONTAMINANTES},
+            round(float(rng.uniform(0.5, 6)), 2),
+            int(rng.integers(0, 10)),
+        )
+        for i in range(max(0, n - len(catalogo)))
+    ]
+    return catalogo + extra
+
+
+def muestras_aleatorias(n, semilla=1):
+    rng = np.random.default_rng(semilla)
+    return [
+        {
+            "Turbidez": rng.uniform(0.1, 50),
+            "Coliformes": rng.uniform(0, 2000),
+            "Metales": rng.uniform(0, 2),
+            "TDS": rng.uniform(50, 1500),
+        }
+        for _ in range(n)
+    ]
+
+
+def costo_exhaustivo(catalogo, antes, k):
+    mejor = None
+    for r in range(1, k + 1):
+        for etapas in itertools.combinations(catalogo, r):
+            cumple = True
+            for p, c in zip(PARAMETROS, CONTAMINANTES):
+                valor = antes[p]
+                for etapa in etapas:
+                    valor *= 1 - etapa.eficiencias[c]
+                cumple = cumple and valor <= LIMITES_NOM127[p] * (1 - 1e-9)
+            costo = sum(e.costo for e in etapas)
+            if cumple and (mejor is None or costo < mejor):
+                mejor = costo
+    return mejor
+
+
+def comprobar(n=100, k=3):
+    optimizador = Optimizador()
+    for antes in muestras_aleatorias(n, semilla=2):
+        cadena = optimizador.mejor_cadena(antes, k)
+        esperado = costo_exhaustivo(list(cargar_catalogo()), antes, k)
+        assert (cadena is None) == (esperado is None)
+        assert cadena is None or np.isclose(cadena.costo, esperado)
+
+
+def main():
+    etapas = int(sys.argv[1]) if len(sys.argv) > 1 else 48
+    k = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    consultas = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    comprobar()
+    optimizador = Optimizador(catalogo_ampliado(etapas))
+    muestras = muestras_aleatorias(consultas)
+
+    inicio = time.perf_counter()
+    tiempos = []
+    for antes in muestras:
+        t = time.perf_counter()
+        optimizador.mejor_cadena(antes, k)
+        tiempos.append(time.perf_counter() - t)
+    transcurrido = time.perf_counter() - inicio
+
+    tiempos = np.array(tiempos) * 1000
+    print(
+        f"{etapas} etapas, k={k}: {consultas} consultas en {transcurrido:.2f} s "
+        f"(p50 {np.percentile(tiempos, 50):.1f} ms, p99 {np.percentile(tiempos, 99):.1f} ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Mide el ordenamiento por costo por litro de un catálogo ampliado con
+cartuchos aleatorios para N muestras, y verifica el cálculo vectorizado
+contra uno escalar en algunas muestras.
+
+Uso: python benchmarks/ranking_costos.py [N] [FILTROS] [VOLUMEN]
+"""
+
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.catalogo import CONTAMINANTES, Catalogo, Filtro  # noqa: E402
+from purificacion.costos import HORAS_OPERACION, MG_POR_UNIDAD, VIDA_EQUIPO_DIAS, costos_por_litro  # noqa: E402
+from purificacion.motor import CATALOGO  # noqa: E402
+
+
+def catalogo_ampliado(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    extra = [
+        Filtro(
+            f"Cartucho {i + 1}",
+            {c: float(rng.uniform(0, 0.99)) for c in CONTAMINANTES},
+            1.0,
+            0,
+            eficiencia_base=0.5,
+            precio_cartucho=float(rng.uniform(100, 2000)),
+            vida_litros=float(rng.uniform(2000, 30000)),
+            capacidad_g={c: float(rng.uniform(10, 2000)) for c in ("turbidez", "metales", "tds")},
+            caudal_lpm=float(rng.uniform(0.3, 20)),
+            precio_equipo=float(rng.uniform(500, 8000)),
+            costo_operacion_litro=float(rng.uniform(0, 0.05)),
+        )
+        for i in range(max(0, n - len(CATALOGO)))
+    ]
+    return Catalogo(list(CATALOGO) + extra)
+
+
+def muestras_aleatorias(n, semilla=1):
+    rng = np.random.default_rng(semilla)
+    return np.column_stack([
+        rng.uniform(0.1, 50, n),
+        rng.uniform(0, 2000, n),
+        rng.uniform(0, 2, n),
+        rng.uniform(50, 1500, n),
+    ])
+
+
+def costo_escalar(filtro, antes, volumen):
+    litros = filtro.vida_litros
+    for c, valor, mg in zip(CONTAMINANTES, antes, MG_POR_UNIDAD):
+        retenido = valor * filtro.eficiencias[c] * mg / 1000
+        if retenido > 0 and c in filtro.capacidad_g:
+            litros = min(litros, filtro.capacidad_g[c] / retenido)
+    unidades = max(1, math.ceil(volumen / (filtro.caudal_lpm * 60 * HORAS_OPERACION)))
+    return (
+        filtro.precio_cartucho / litros
+        + filtro.costo_operacion_litro
+        + unidades * filtro.precio_equipo / (VIDA_EQUIPO_DIAS * volumen)
+    )
+
+
+def comprobar(catalogo, x, ranking, volumen, n=20):
+    for i in range(n):
+        for j, filtro in enumerate(catalogo):
+            assert np.isclose(ranking.costo_litro[i, j], costo_escalar(filtro, x[i], volumen))
+        costos = ranking.costo_litro[i, ranking.orden[i]]
+        cumple = ranking.cumple[i, ranking.orden[i]]
+        assert (np.diff(cumple.astype(int)) <= 0).all()
+        assert (np.diff(costos[cumple]) >= 0).all()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    filtros = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    volumen = float(sys.argv[3]) if len(sys.argv) > 3 else 500_000
+
+    catalogo = catalogo_ampliado(filtros)
+    x = muestras_aleatorias(n)
+
+    inicio = time.perf_counter()
+    ranking = costos_por_litro(x, volumen, catalogo)
+    transcurrido = time.perf_counter() - inicio
+
+    comprobar(catalogo, x, ranking, volumen)
+    print(
+        f"{n} muestras × {len(catalogo)} filtros en {transcurrido * 1000:.0f} ms "
+        f"({n * len(catalogo) / transcurrido:,.0f} combinaciones/s); "
+        f"sin filtro que cumpla: {(ranking.mejor < 0).sum()}"
+    )
+
+
+if __name__ == "__main__":
+    main()
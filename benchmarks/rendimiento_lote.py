@@ -0,0 +1,54 @@
+"""
+Mide cuántas muestras por segundo procesa ``evaluar_lote`` en un solo núcleo
+y verifica que coincide con el cálculo escalar de ``evaluar``.
+
+Uso: python benchmarks/rendimiento_lote.py [N]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion import Muestra, evaluar  # noqa: E402
+from purificacion.lote import evaluar_lote  # noqa: E402
+
+
+def muestras_aleatorias(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    return np.column_stack([
+        rng.uniform(0.1, 50, n),
+        rng.uniform(0, 2000, n),
+        rng.uniform(0, 2, n),
+        rng.uniform(50, 1500, n),
+        rng.integers(0, 2, n),
+    ])
+
+
+def comprobar(x, lote, n=500):
+    for i in range(n):
+        r = evaluar(Muestra(7.0, *x[i, :4]))
+        assert np.isclose(r.nivel, lote.nivel[i])
+        assert r.filtro_recomendado == lote.filtro_recomendado[i]
+        assert np.allclose(list(r.despues.values()), lote.despues[i])
+        assert np.isclose(r.riesgo_global_despues, lote.riesgo_global_despues[i])
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    x = muestras_aleatorias(n)
+
+    evaluar_lote(x[:1000])  # calentamiento
+    inicio = time.perf_counter()
+    lote = evaluar_lote(x)
+    transcurrido = time.perf_counter() - inicio
+
+    comprobar(x, lote)
+    print(f"{n} muestras en {transcurrido * 1000:.1f} ms → {n / transcurrido:,.0f} muestras/s")
+
+
+if __name__ == "__main__":
+    main()
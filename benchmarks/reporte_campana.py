@@ -0,0 +1,58 @@
+"""
+Mide el tiempo del reporte de campaña para N muestras aleatorias repartidas
+en colonias, y la memoria máxima del proceso principal.
+
+Uso: python benchmarks/reporte_campana.py [N] [PROCESOS]
+"""
+
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.campana import PYPDF_AVAILABLE, generar_pdf_campana  # noqa: E402
+
+COLONIAS = ["San Cristóbal", "Jardines de Morelos", "Ciudad Azteca", "Guadalupe Victoria", "Santa Clara"]
+
+
+def bloques_aleatorios(n, tamano=1000, semilla=0):
+    rng = np.random.default_rng(semilla)
+    for inicio in range(0, n, tamano):
+        k = min(tamano, n - inicio)
+        yield pd.DataFrame({
+            "turbidez": rng.uniform(0.1, 50, k),
+            "coliformes": rng.uniform(0, 2000, k),
+            "metales": rng.uniform(0, 2, k),
+            "tds": rng.uniform(50, 1500, k),
+            "olor": rng.integers(0, 2, k),
+            "colonia": rng.choice(COLONIAS, k),
+        })
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    procesos = int(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "campana.pdf")
+        inicio = time.perf_counter()
+        generar_pdf_campana(bloques_aleatorios(n), ruta, procesos)
+        transcurrido = time.perf_counter() - inicio
+        tamano = os.path.getsize(ruta)
+
+    memoria = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(
+        f"{n} muestras en {transcurrido:.2f} s ({n / transcurrido:,.0f} páginas/s), "
+        f"{tamano / 1e6:.1f} MB, memoria máx. {memoria:.0f} MB"
+        f"{'' if PYPDF_AVAILABLE else ' (sin pypdf: en serie)'}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Prueba de resistencia del ciclo de vida de figuras.
+
+Simula muchos reruns de la app rasterizando el radar con ``radar_png`` (la
+única figura de matplotlib que dibuja la app; las barras son de plotly y el
+PDF las dibuja con reportlab) con parámetros distintos, y comprueba que la
+memoria residente del proceso se mantiene estable y que pyplot no acumula
+figuras.
+
+Uso: python benchmarks/soak_figuras.py [reruns]
+"""
+
+import gc
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion import Muestra, evaluar  # noqa: E402
+from purificacion.graficas import radar_png  # noqa: E402
+
+# Crecimiento máximo tolerado después del calentamiento
+MARGEN_MB = 25
+
+
+def rss_mb() -> float:
+    """Memoria residente actual del proceso (Linux)."""
+    with open("/proc/self/statm") as f:
+        paginas = int(f.read().split()[1])
+    return paginas * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+
+def main():
+    reruns = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    rng = np.random.default_rng(0)
+    calentamiento = min(200, reruns // 10)
+    base = None
+    inicio = time.perf_counter()
+
+    for i in range(reruns):
+        muestra = Muestra(
+            7.0, rng.uniform(0.1, 50), rng.uniform(0, 2000), rng.uniform(0, 2), rng.uniform(50, 1500)
+        )
+        resultado = evaluar(muestra)
+        radar_png(resultado)
+
+        if i == calentamiento:
+            gc.collect()
+            base = rss_mb()
+        if i % max(1, reruns // 10) == 0:
+            print(f"rerun {i:>6}: {rss_mb():.1f} MB", flush=True)
+
+    gc.collect()
+    final = rss_mb()
+    transcurrido = time.perf_counter() - inicio
+    print(f"{reruns:,} reruns en {transcurrido / 60:.1f} min ({transcurrido / reruns * 1000:.0f} ms cada uno)")
+    print(f"RSS tras calentamiento: {base:.1f} MB, final: {final:.1f} MB")
+
+    plt = sys.modules.get("matplotlib.pyplot")
+    abiertas = len(plt.get_fignums()) if plt is not None else 0
+    assert abiertas == 0, f"pyplot tiene {abiertas} figuras abiertas"
+    assert final - base < MARGEN_MB, f"la memoria creció {final - base:.1f} MB"
+    print("OK: memoria estable")
+
+
+if __name__ == "__main__":
+    main()
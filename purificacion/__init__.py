@@ -0,0 +1,33 @@
+"""Motor de purificación de agua – Ecatepec."""
+
+from .catalogo import Catalogo, Filtro, cargar_catalogo
+from .motor import (
+    EFICIENCIAS_REALES,
+    FILTROS,
+    MAXIMOS,
+    PARAMETROS,
+    Muestra,
+    Resultado,
+    evaluar,
+    nivel_contaminacion,
+)
+from .lote import ResultadoLote, evaluar_lote
+from .modelo import ModeloFiltros, cargar_modelo
+
+__all__ = [
+    "Catalogo",
+    "EFICIENCIAS_REALES",
+    "FILTROS",
+    "Filtro",
+    "MAXIMOS",
+    "ModeloFiltros",
+    "PARAMETROS",
+    "Muestra",
+    "Resultado",
+    "ResultadoLote",
+    "cargar_catalogo",
+    "cargar_modelo",
+    "evaluar",
+    "evaluar_lote",
+    "nivel_contaminacion",
+]
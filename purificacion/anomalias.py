@@ -0,0 +1,236 @@
+"""
+Detección de anomalías y deriva en las muestras que van llegando.
+
+Por sitio, cada contaminante lleva una media y una varianza exponenciales
+(EWMA) sobre ``log1p`` del valor (los coliformes varían en órdenes de
+magnitud). Una muestra nueva se compara con ese estado antes de
+incorporarla:
+
+* **salto**: el valor queda a más de ``Z_SALTO`` desviaciones de la media;
+* **deriva**: un CUSUM de dos lados acumula los desvíos pequeños pero
+  persistentes y avisa al pasar de ``CUSUM_H``.
+
+La actualización se recorta a ``Z_SALTO`` desviaciones para que un pico
+aislado no infle la varianza y tape los siguientes. Todo es O(1) por
+muestra y no guarda la serie.
+
+Aparte, las muestras se comparan con ``dataset_filtros_entrenamiento.csv``:
+cada una, contra el rango de cada contaminante en el entrenamiento (fuera
+de él, el árbol de recomendación extrapola con la hoja del borde), y el
+flujo completo, con el índice de estabilidad poblacional (PSI) entre los
+deciles del entrenamiento y un histograma con olvido exponencial de las
+muestras recientes.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .modelo import CARACTERISTICAS, RUTA_DATASET
+from .motor import PARAMETROS
+
+# Campos del historial con cada contaminante, en el orden de PARAMETROS
+CAMPOS_CONTAMINANTES = ["Turbidez_NTU", "Coliformes_NMP_100ml", "Metales_ppm", "TDS_mgL"]
+
+# ----- detector por sitio -----
+# Peso de la muestra nueva: la media sigue al sitio en ~10 muestras y la
+# varianza, más lenta, no se encoge con unas cuantas lecturas parecidas
+ALFA_MEDIA = 0.1
+ALFA_VARIANZA = 0.05
+Z_SALTO = 4.0
+CUSUM_K = 0.5  # holgura, en desviaciones
+CUSUM_H = 5.0  # umbral de alarma, en desviaciones acumuladas
+MIN_MUESTRAS = 5  # antes de esto el sitio solo aprende
+SIGMA_MINIMA = 0.05  # en log1p: ~5 %, para series casi constantes
+
+# ----- comparación con el entrenamiento -----
+TOLERANCIA_RANGO = 0.05  # fracción del rango de entrenamiento
+CUANTILES = 10
+MEMORIA_DERIVA = 500  # muestras: el histograma olvida con factor 1 - 1/500
+MIN_MUESTRAS_DERIVA = 100
+PSI_DERIVA = 0.25  # PSI > 0.25: cambio importante de distribución
+
+
+@dataclass(frozen=True)
+class Alerta:
+    """Un aviso sobre una muestra o sobre el flujo de muestras."""
+
+    tipo: str  # "salto", "deriva al alza", "deriva a la baja", "fuera de rango", "deriva de la entrada"
+    parametro: str
+    valor: float  # la medición, o el PSI en "deriva de la entrada"
+    referencia: float  # media del sitio, límite del rango o umbral del PSI
+    sitio: Optional[str] = None
+
+    def __str__(self) -> str:
+        donde = f"{self.sitio}: " if self.sitio else ""
+        if self.tipo == "salto":
+            return f"{donde}salto de {self.parametro} a {self.valor:g} (habitual ≈ {self.referencia:.3g})"
+        if self.tipo in ("deriva al alza", "deriva a la baja"):
+            return (
+                f"{donde}{self.tipo} sostenida de {self.parametro} "
+                f"(último {self.valor:g}, habitual ≈ {self.referencia:.3g})"
+            )
+        if self.tipo == "fuera de rango":
+            return (
+                f"{self.parametro} = {self.valor:g} está fuera del rango de entrenamiento "
+                f"(límite {self.referencia:.4g}); la recomendación del modelo es una extrapolación"
+            )
+        return (
+            f"las muestras recientes de {self.parametro} ya no se parecen al entrenamiento "
+            f"(PSI {self.valor:.2f} > {self.referencia:g})"
+        )
+
+
+class DetectorSitio:
+    """EWMA y CUSUM de los cuatro contaminantes de un sitio."""
+
+    def __init__(self):
+        self.n = 0
+        self.media = np.zeros(len(PARAMETROS))  # en log1p
+        self.varianza = np.zeros(len(PARAMETROS))
+        self.cusum_alto = np.zeros(len(PARAMETROS))
+        self.cusum_bajo = np.zeros(len(PARAMETROS))
+
+    def observar(self, valores, sitio: Optional[str] = None) -> List[Alerta]:
+        """Revisa una muestra (4,) en el orden de PARAMETROS y la incorpora."""
+        valores = np.asarray(valores, dtype=float)
+        v = np.log1p(np.maximum(valores, 0.0))
+        if self.n == 0:
+            self.media[:] = v
+            self.n = 1
+            return []
+
+        sigma = np.maximum(np.sqrt(self.varianza), SIGMA_MINIMA)
+        z = (v - self.media) / sigma
+        recortado = np.clip(z, -Z_SALTO, Z_SALTO)
+
+        alertas = []
+        if self.n >= MIN_MUESTRAS:
+            self.cusum_alto = np.maximum(0.0, self.cusum_alto + recortado - CUSUM_K)
+            self.cusum_bajo = np.maximum(0.0, self.cusum_bajo - recortado - CUSUM_K)
+            habitual = np.expm1(self.media)
+            for j, parametro in enumerate(PARAMETROS):
+                if abs(z[j]) > Z_SALTO:
+                    tipo = "salto"
+                elif self.cusum_alto[j] > CUSUM_H:
+                    tipo = "deriva al alza"
+                elif self.cusum_bajo[j] > CUSUM_H:
+                    tipo = "deriva a la baja"
+                else:
+                    continue
+                alertas.append(Alerta(tipo, parametro, float(valores[j]), float(habitual[j]), sitio))
+                self.cusum_alto[j] = self.cusum_bajo[j] = 0.0
+
+        # EWMA con el desvío recortado
+        desvio = recortado * sigma
+        self.media += ALFA_MEDIA * desvio
+        self.varianza = (1 - ALFA_VARIANZA) * (self.varianza + ALFA_VARIANZA * desvio ** 2)
+        self.n += 1
+        return alertas
+
+
+class DistribucionEntrenamiento:
+    """Rango y cuantiles de cada contaminante en el dataset de entrenamiento."""
+
+    def __init__(self, datos: np.ndarray):
+        datos = np.asarray(datos, dtype=float)
+        self.minimo = datos.min(axis=0)
+        self.maximo = datos.max(axis=0)
+        holgura = TOLERANCIA_RANGO * (self.maximo - self.minimo)
+        self.desde = self.minimo - holgura
+        self.hasta = self.maximo + holgura
+        # Bordes interiores de los cuantiles (4 × CUANTILES - 1)
+        cortes = np.linspace(0, 1, CUANTILES + 1)[1:-1]
+        self.bordes = np.quantile(datos, cortes, axis=0).T
+        self.esperado = np.array([
+            np.bincount(self.cuantil(datos[:, j], j), minlength=CUANTILES) / len(datos)
+            for j in range(datos.shape[1])
+        ])
+
+    def cuantil(self, valores, j: int) -> np.ndarray:
+        """Cuantil de entrenamiento (0 a CUANTILES - 1) de los valores del contaminante ``j``."""
+        return np.searchsorted(self.bordes[j], valores, side="right")
+
+    def fuera_de_rango(self, datos) -> np.ndarray:
+        """(N × 4) True donde el valor sale del rango de entrenamiento."""
+        datos = np.atleast_2d(np.asarray(datos, dtype=float))[:, :len(PARAMETROS)]
+        return (datos < self.desde) | (datos > self.hasta)
+
+    def alertas(self, valores) -> List[Alerta]:
+        """Avisos de una muestra (4,) fuera del rango de entrenamiento."""
+        valores = np.asarray(valores, dtype=float)
+        fuera = self.fuera_de_rango(valores)[0]
+        return [
+            Alerta(
+                "fuera de rango",
+                parametro,
+                float(valores[j]),
+                float(self.minimo[j] if valores[j] < self.desde[j] else self.maximo[j]),
+            )
+            for j, parametro in enumerate(PARAMETROS)
+            if fuera[j]
+        ]
+
+
+def leer_distribucion(ruta: str = RUTA_DATASET) -> DistribucionEntrenamiento:
+    import pandas as pd
+
+    datos = pd.read_csv(ruta, usecols=CARACTERISTICAS[:len(PARAMETROS)])
+    return DistribucionEntrenamiento(datos[CARACTERISTICAS[:len(PARAMETROS)]].to_numpy(dtype=float))
+
+
+@lru_cache(maxsize=None)
+def cargar_distribucion(ruta: str = RUTA_DATASET) -> DistribucionEntrenamiento:
+    """Distribución de entrenamiento del proceso (se lee una sola vez)."""
+    return leer_distribucion(ruta)
+
+
+class DerivaEntrada:
+    """
+    Histograma con olvido exponencial de las muestras recientes sobre los
+    cuantiles del entrenamiento, y su PSI contra el entrenamiento.
+    """
+
+    def __init__(self, distribucion: DistribucionEntrenamiento, memoria: int = MEMORIA_DERIVA):
+        self.distribucion = distribucion
+        self.olvido = 1.0 - 1.0 / memoria
+        self.conteos = np.zeros_like(distribucion.esperado)
+        self.peso = 0.0  # suma de pesos de las muestras (igual en cada fila)
+        self.n = 0
+        self.en_deriva = np.zeros(len(PARAMETROS), dtype=bool)
+        self._filas = np.arange(len(PARAMETROS))
+
+    def observar(self, valores) -> List[Alerta]:
+        """Incorpora una muestra (4,); avisa de los contaminantes que acaban de entrar en deriva."""
+        valores = np.asarray(valores, dtype=float)
+        cuantil = [self.distribucion.cuantil(valores[j], j) for j in self._filas]
+        self.conteos *= self.olvido
+        self.conteos[self._filas, cuantil] += 1.0
+        self.peso = self.peso * self.olvido + 1.0
+        self.n += 1
+
+        psi = self.psi()
+        en_deriva = psi > PSI_DERIVA
+        nuevas = en_deriva & ~self.en_deriva
+        self.en_deriva = en_deriva
+        return [
+            Alerta("deriva de la entrada", parametro, float(psi[j]), PSI_DERIVA)
+            for j, parametro in enumerate(PARAMETROS)
+            if nuevas[j]
+        ]
+
+    def psi(self) -> np.ndarray:
+        """PSI (4,) de las muestras recientes contra el entrenamiento; NaN si aún son pocas."""
+        if self.n < MIN_MUESTRAS_DERIVA:
+            return np.full(len(PARAMETROS), np.nan)
+        # Se suaviza para que un cuantil vacío no dé logaritmo de cero
+        reciente = np.maximum(self.conteos / self.peso, 1e-4)
+        esperado = np.maximum(self.distribucion.esperado, 1e-4)
+        return ((reciente - esperado) * np.log(reciente / esperado)).sum(axis=1)
+
+
+def valores_entrada(entrada: Dict[str, object]) -> np.ndarray:
+    """Contaminantes (4,) de una entrada del historial, en el orden de PARAMETROS."""
+    return np.array([entrada[campo] for campo in CAMPOS_CONTAMINANTES], dtype=float)
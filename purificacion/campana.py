@@ -0,0 +1,532 @@
+"""
+Reporte PDF consolidado de una campaña de muestreo.
+
+Una campaña son cientos o miles de muestras (el historial de la app, una
+carga masiva o un archivo de la línea de comandos). El reporte abre con un
+resumen general, la distribución de filtros recomendados y los agregados por
+colonia, y sigue con una página compacta por muestra.
+
+Las muestras se leen por bloques. Las páginas por muestra se dibujan por
+partes de ``MUESTRAS_POR_PARTE`` en procesos aparte, cada parte a su propio
+archivo temporal, mientras el proceso principal solo acumula los agregados
+del resumen. Al final se dibuja el resumen y se unen las partes en orden con
+pypdf. Así la memoria de dibujo no crece con el número de muestras.
+
+pypdf es opcional: sin él todo se dibuja en serie sobre un solo canvas (y
+los bloques se juntan en memoria para poder poner el resumen al principio).
+"""
+
+import os
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from .carga import COLUMNAS_REQUERIDAS, PH_POR_DEFECTO, columna_olor
+from .interpretacion import RIESGO_ACEPTABLE
+from .lote import NOMBRES_FILTROS, evaluar_lote
+from .modelo import cargar_modelo
+from .motor import ETIQUETAS, PARAMETROS, Muestra, Resultado, evaluar
+from .reporte import REPORTLAB_AVAILABLE
+
+if REPORTLAB_AVAILABLE:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+
+# ----- unión de partes (opcional con pypdf) -----
+try:
+    from pypdf import PdfReader
+    from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+TITULO_CAMPANA = "Reporte de campaña – Purificación de Agua Ecatepec"
+MUESTRAS_POR_PARTE = 250
+SIN_COLONIA = "Sin colonia"
+
+# Columnas del historial de la app → columnas de la carga masiva
+COLUMNAS_HISTORIAL = {
+    "pH": "ph",
+    "Turbidez_NTU": "turbidez",
+    "Coliformes_NMP_100ml": "coliformes",
+    "Metales_ppm": "metales",
+    "TDS_mgL": "tds",
+    "Olor": "olor",
+    "Colonia": "colonia",
+}
+
+# (numero, ph, turbidez, coliformes, metales, tds, olor, colonia)
+FilaPagina = Tuple[int, float, float, float, float, float, str, str]
+
+
+def normalizar_tabla(bloque: pd.DataFrame) -> pd.DataFrame:
+    """Acepta columnas del historial o de la carga masiva y valida las requeridas."""
+    bloque = bloque.rename(columns=COLUMNAS_HISTORIAL)
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in bloque.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+    return bloque
+
+
+def _colonias(bloque: pd.DataFrame) -> np.ndarray:
+    if "colonia" not in bloque.columns:
+        return np.full(len(bloque), SIN_COLONIA, dtype=object)
+    colonia = bloque["colonia"].astype("string").str.strip()
+    return colonia.mask(colonia == "").fillna(SIN_COLONIA).to_numpy(dtype=object)
+
+
+# ----- resumen de la campaña -----
+class ResumenCampana:
+    """Agregados por colonia que se acumulan bloque a bloque."""
+
+    def __init__(self):
+        self.muestras = 0
+        self.con_colonia = False
+        self._parciales: List[pd.DataFrame] = []
+        self._conteos: List[pd.DataFrame] = []
+
+    def agregar(self, bloque: pd.DataFrame, colonias: np.ndarray) -> None:
+        if len(bloque) == 0:
+            return
+        x = np.column_stack(
+            [bloque[COLUMNAS_REQUERIDAS].to_numpy(dtype=float), columna_olor(bloque)]
+        )
+        lote = evaluar_lote(x, cargar_modelo())
+        tabla = pd.DataFrame({
+            "colonia": colonias,
+            "nivel": lote.nivel,
+            "purificacion": lote.purificacion_recomendada,
+            "riesgo_antes": lote.riesgo_global_antes,
+            "riesgo_despues": lote.riesgo_global_despues,
+            "no_aceptable": lote.riesgo_global_despues > RIESGO_ACEPTABLE,
+            "filtro": lote.filtro_recomendado,
+        })
+        grupos = tabla.groupby("colonia")
+        self._parciales.append(grupos.agg(
+            muestras=("nivel", "size"),
+            suma_nivel=("nivel", "sum"),
+            max_nivel=("nivel", "max"),
+            suma_purificacion=("purificacion", "sum"),
+            suma_riesgo_antes=("riesgo_antes", "sum"),
+            suma_riesgo_despues=("riesgo_despues", "sum"),
+            no_aceptables=("no_aceptable", "sum"),
+        ))
+        self._conteos.append(pd.crosstab(tabla["colonia"], tabla["filtro"]))
+        self.muestras += len(tabla)
+        self.con_colonia = self.con_colonia or "colonia" in bloque.columns
+
+    def por_colonia(self) -> pd.DataFrame:
+        """Una fila por colonia con medias, máximos y el filtro más recomendado."""
+        if not self._parciales:
+            return pd.DataFrame()
+        sumas = pd.concat(self._parciales).groupby(level=0).agg({
+            "muestras": "sum",
+            "suma_nivel": "sum",
+            "max_nivel": "max",
+            "suma_purificacion": "sum",
+            "suma_riesgo_antes": "sum",
+            "suma_riesgo_despues": "sum",
+            "no_aceptables": "sum",
+        })
+        conteo = self.conteo_filtros_por_colonia()
+        return pd.DataFrame({
+            "Muestras": sumas["muestras"],
+            "Nivel medio %": sumas["suma_nivel"] / sumas["muestras"],
+            "Nivel máx. %": sumas["max_nivel"],
+            "Purificación media %": sumas["suma_purificacion"] / sumas["muestras"],
+            "Riesgo antes %": sumas["suma_riesgo_antes"] / sumas["muestras"],
+            "Riesgo después %": sumas["suma_riesgo_despues"] / sumas["muestras"],
+            "No aceptables": sumas["no_aceptables"].astype(int),
+            "Filtro más recomendado": conteo.idxmax(axis=1),
+        }).sort_values("Nivel medio %", ascending=False)
+
+    def conteo_filtros_por_colonia(self) -> pd.DataFrame:
+        conteo = pd.concat(self._conteos).fillna(0).groupby(level=0).sum()
+        return conteo.reindex(columns=[f for f in NOMBRES_FILTROS if f in conteo.columns])
+
+
+def _tabla_pdf(c, y, columnas_x, encabezados, filas, height):
+    """Tabla con encabezado azul que continúa en páginas nuevas; devuelve la y final."""
+
+    def encabezado(y):
+        c.setFillColor(colors.darkblue)
+        c.rect(40, y - 15, 532, 18, fill=1, stroke=0)
+        c.setFillColor(colors.white)
+        c.setFont("Helvetica-Bold", 8)
+        for x, texto in zip(columnas_x, encabezados):
+            c.drawString(x, y - 11, texto)
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", 8)
+        return y - 28
+
+    y = encabezado(y)
+    for valores in filas:
+        if y < 50:
+            c.showPage()
+            y = encabezado(height - 50)
+        for x, texto in zip(columnas_x, valores):
+            c.drawString(x, y, texto)
+        y -= 12
+    return y
+
+
+def dibujar_resumen(c, resumen: ResumenCampana, titulo: str = TITULO_CAMPANA) -> None:
+    """Páginas de resumen: totales, filtros recomendados y agregados por colonia."""
+    width, height = letter
+    tabla = resumen.por_colonia()
+    n = resumen.muestras
+
+    c.setFillColor(colors.darkblue)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(40, height - 50, titulo)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 9)
+    c.drawString(40, height - 66, f"Generado: {datetime.now():%Y-%m-%d %H:%M}")
+
+    y = height - 95
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(40, y, "1. Resumen general")
+    y -= 18
+    c.setFont("Helvetica", 10)
+    if n == 0:
+        c.drawString(50, y, "La campaña no tiene muestras.")
+        c.showPage()
+        return
+
+    muestras = tabla["Muestras"]
+    lineas = [
+        f"Muestras analizadas: {n:,}",
+        f"Colonias: {len(tabla) if resumen.con_colonia else '—'}",
+        f"Nivel de contaminación medio: {(tabla['Nivel medio %'] * muestras).sum() / n:.1f} %"
+        f" (máximo {tabla['Nivel máx. %'].max():.1f} %)",
+        f"Purificación media con el filtro recomendado: {(tabla['Purificación media %'] * muestras).sum() / n:.1f} %",
+        f"Riesgo global medio: {(tabla['Riesgo antes %'] * muestras).sum() / n:.1f} % antes y "
+        f"{(tabla['Riesgo después %'] * muestras).sum() / n:.1f} % después del filtrado",
+        f"Muestras con riesgo residual mayor a {RIESGO_ACEPTABLE:.0f} %: "
+        f"{tabla['No aceptables'].sum():,} ({100 * tabla['No aceptables'].sum() / n:.1f} %)",
+    ]
+    for linea in lineas:
+        c.drawString(50, y, linea)
+        y -= 14
+
+    y -= 12
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(40, y, "2. Filtros recomendados")
+    y -= 18
+    conteo = resumen.conteo_filtros_por_colonia().sum()
+    y = _tabla_pdf(
+        c, y, [45, 250, 350],
+        ["Filtro", "Muestras", "% de la campaña"],
+        [[str(f), f"{int(k):,}", f"{100 * k / n:.1f}"] for f, k in conteo.items()],
+        height,
+    )
+
+    if resumen.con_colonia:
+        y -= 12
+        if y < 120:
+            c.showPage()
+            y = height - 50
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(40, y, "3. Agregados por colonia")
+        y -= 18
+        _tabla_pdf(
+            c, y, [45, 185, 230, 285, 340, 390, 445, 485],
+            ["Colonia", "Muestras", "Nivel %", "Máx. %", "Riesgo %", "Tras filtro", "No acep.", "Filtro"],
+            [
+                [
+                    str(colonia)[:26],
+                    f"{int(fila['Muestras']):,}",
+                    f"{fila['Nivel medio %']:.1f}",
+                    f"{fila['Nivel máx. %']:.1f}",
+                    f"{fila['Riesgo antes %']:.1f}",
+                    f"{fila['Riesgo después %']:.1f}",
+                    f"{int(fila['No aceptables']):,}",
+                    str(fila["Filtro más recomendado"]),
+                ]
+                for colonia, fila in tabla.iterrows()
+            ],
+            height,
+        )
+    c.showPage()
+
+
+# ----- páginas por muestra -----
+def dibujar_pagina_muestra(c, numero: int, resultado: Resultado, colonia: str = "") -> None:
+    """Página compacta de una muestra: datos, riesgo por contaminante y filtros."""
+    width, height = letter
+    m = resultado.muestra
+
+    c.setFillColor(colors.darkblue)
+    c.rect(40, height - 72, 532, 30, fill=1, stroke=0)
+    c.setFillColor(colors.white)
+    c.setFont("Helvetica-Bold", 13)
+    c.drawString(50, height - 62, f"Muestra {numero}  ·  ID {m.id}")
+    if colonia and colonia != SIN_COLONIA:
+        c.setFont("Helvetica", 11)
+        c.drawRightString(562, height - 62, colonia)
+    c.setFillColor(colors.black)
+
+    y = height - 100
+    c.setFont("Helvetica", 10)
+    for linea in [
+        f"Nivel de contaminación: {resultado.nivel:.1f} %      pH: {m.ph}      Olor desagradable: {m.olor}",
+        f"Filtro recomendado: {resultado.filtro_recomendado} "
+        f"(purificación estimada {resultado.purificacion_recomendada:.1f} %)",
+        f"Riesgo global: {resultado.riesgo_global_antes:.1f} % antes y "
+        f"{resultado.riesgo_global_despues:.1f} % después del filtrado",
+        f"Conclusión: {resultado.interpretacion.conclusion.texto}",
+    ]:
+        c.drawString(50, y, linea)
+        y -= 15
+
+    # Contaminantes antes/después con barras de riesgo (0–100 %)
+    y -= 10
+    y = _tabla_pdf(
+        c, y, [45, 160, 240, 320],
+        ["Contaminante", "Antes", "Después", "Riesgo antes / después (%)"],
+        [], height,
+    )
+    formatos = {"Turbidez": "{:.2f}", "Coliformes": "{:.0f}", "Metales": "{:.3f}", "TDS": "{:.0f}"}
+    for p, etiqueta in zip(PARAMETROS, ETIQUETAS):
+        c.setFont("Helvetica", 9)
+        c.drawString(45, y, etiqueta)
+        c.drawString(160, y, formatos[p].format(resultado.antes[p]))
+        c.drawString(240, y, formatos[p].format(resultado.despues[p]))
+        for desplazamiento, riesgo, color in (
+            (4, resultado.riesgo_antes[p], colors.HexColor("#1f77b4")),
+            (-3, resultado.riesgo_despues[p], colors.HexColor("#ff7f0e")),
+        ):
+            c.setFillColor(color)
+            c.rect(320, y + desplazamiento - 1, 1.8 * riesgo, 5, fill=1, stroke=0)
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", 7)
+        c.drawString(510, y, f"{resultado.riesgo_antes[p]:.0f} / {resultado.riesgo_despues[p]:.0f}")
+        y -= 18
+
+    y -= 12
+    _tabla_pdf(
+        c, y, [45, 240, 400],
+        ["Filtro", "Eficiencia base (%)", "Purificación estimada (%)"],
+        [
+            [
+                f"{filtro}{'  (recomendado)' if filtro == resultado.filtro_recomendado else ''}",
+                f"{eficiencia:.1f}",
+                f"{purificacion:.1f}",
+            ]
+            for filtro, eficiencia, purificacion in resultado.tabla_filtros
+        ],
+        height,
+    )
+
+
+def filas_paginas(bloque: pd.DataFrame, colonias: np.ndarray, primero: int) -> List[FilaPagina]:
+    """Datos mínimos de cada muestra para dibujar su página en otro proceso."""
+    if "ph" in bloque.columns:
+        ph = bloque["ph"].fillna(PH_POR_DEFECTO).to_numpy(dtype=float)
+    else:
+        ph = np.full(len(bloque), PH_POR_DEFECTO)
+    olor = np.where(columna_olor(bloque) > 0, "Sí", "No")
+    valores = bloque[COLUMNAS_REQUERIDAS].to_numpy(dtype=float)
+    return [
+        (primero + i, float(ph[i]), *map(float, valores[i]), str(olor[i]), str(colonias[i]))
+        for i in range(len(bloque))
+    ]
+
+
+def dibujar_paginas(c, filas: Iterable[FilaPagina]) -> None:
+    modelo = cargar_modelo()
+    for numero, ph, turbidez, coliformes, metales, tds, olor, colonia in filas:
+        resultado = evaluar(Muestra(ph, turbidez, coliformes, metales, tds, olor), modelo)
+        dibujar_pagina_muestra(c, numero, resultado, colonia)
+        c.showPage()
+
+
+def renderizar_parte(tarea: Tuple[str, List[FilaPagina]]) -> str:
+    """Trabajo de cada proceso: dibuja una parte de páginas en su archivo."""
+    ruta, filas = tarea
+    c = canvas.Canvas(ruta, pagesize=letter)
+    dibujar_paginas(c, filas)
+    c.save()
+    return ruta
+
+
+# ----- unión en flujo -----
+class _Salida:
+    """Archivo de salida que lleva la cuenta de bytes para la tabla xref."""
+
+    def __init__(self, archivo):
+        self.archivo = archivo
+        self.posicion = 0
+
+    def write(self, datos: bytes) -> int:
+        self.archivo.write(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+
+def unir_pdfs(rutas: List[str], destino) -> int:
+    """
+    Concatena los PDF de ``rutas`` en ``destino`` objeto por objeto.
+
+    A diferencia de ``PdfWriter.append``, no junta el documento completo en
+    memoria: cada parte se lee, se copian sus páginas (renumerando objetos) y
+    se descarta antes de abrir la siguiente. Devuelve el número de páginas.
+    """
+    propio = isinstance(destino, (str, os.PathLike))
+    archivo = open(destino, "wb") if propio else destino
+    try:
+        salida = _Salida(archivo)
+        salida.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        # 1 = catálogo y 2 = árbol de páginas; se escriben al final
+        desplazamientos = {}
+        paginas: List[int] = []
+        siguiente = 3
+
+        def escribir(numero, objeto):
+            desplazamientos[numero] = salida.posicion
+            salida.write(f"{numero} 0 obj\n".encode())
+            objeto.write_to_stream(salida)
+            salida.write(b"\nendobj\n")
+
+        for ruta in rutas:
+            lector = PdfReader(ruta)
+            nuevos = {}
+            pendientes = []
+
+            def renumerar(objeto):
+                nonlocal siguiente
+                if isinstance(objeto, IndirectObject):
+                    if objeto.idnum not in nuevos:
+                        nuevos[objeto.idnum] = siguiente
+                        siguiente += 1
+                        pendientes.append(objeto)
+                    return IndirectObject(nuevos[objeto.idnum], 0, None)
+                if isinstance(objeto, DictionaryObject):
+                    for clave, valor in list(objeto.items()):
+                        objeto[clave] = renumerar(valor)
+                elif isinstance(objeto, ArrayObject):
+                    for i, valor in enumerate(objeto):
+                        objeto[i] = renumerar(valor)
+                return objeto
+
+            for pagina in lector.pages:
+                del pagina[NameObject("/Parent")]
+                renumerar(pagina)
+                pagina[NameObject("/Parent")] = IndirectObject(2, 0, None)
+                numero = siguiente
+                siguiente += 1
+                escribir(numero, pagina)
+                paginas.append(numero)
+                while pendientes:
+                    referencia = pendientes.pop()
+                    escribir(nuevos[referencia.idnum], renumerar(referencia.get_object()))
+
+        desplazamientos[2] = salida.posicion
+        salida.write(
+            f"2 0 obj\n<< /Type /Pages /Count {len(paginas)} /Kids [".encode()
+            + " ".join(f"{n} 0 R" for n in paginas).encode()
+            + b"] >>\nendobj\n"
+        )
+        desplazamientos[1] = salida.posicion
+        salida.write(b"1 0 obj\n<< /Type /Catalog /Pages 2 0 R >>\nendobj\n")
+
+        inicio_xref = salida.posicion
+        salida.write(f"xref\n0 {siguiente}\n0000000000 65535 f \n".encode())
+        for numero in range(1, siguiente):
+            salida.write(f"{desplazamientos[numero]:010d} 00000 n \n".encode())
+        salida.write(
+            f"trailer\n<< /Size {siguiente} /Root 1 0 R >>\nstartxref\n{inicio_xref}\n%%EOF\n".encode()
+        )
+    finally:
+        if propio:
+            archivo.close()
+    return len(paginas)
+
+
+# ----- reporte completo -----
+def generar_pdf_campana(
+    tabla: Union[pd.DataFrame, Iterable[pd.DataFrame]],
+    destino,
+    procesos: Optional[int] = None,
+    titulo: str = TITULO_CAMPANA,
+    muestras_por_parte: int = MUESTRAS_POR_PARTE,
+) -> int:
+    """
+    Escribe en ``destino`` (ruta o archivo binario) el reporte de la campaña.
+
+    ``tabla`` es un DataFrame o un iterable de bloques con las columnas del
+    historial o de la carga masiva (turbidez, coliformes, metales, tds y
+    opcionalmente olor, ph y colonia). Devuelve el número de muestras.
+    """
+    bloques = [tabla] if isinstance(tabla, pd.DataFrame) else tabla
+    if not PYPDF_AVAILABLE:
+        return _campana_en_serie(bloques, destino, titulo)
+
+    procesos = procesos or os.cpu_count() or 1
+    resumen = ResumenCampana()
+
+    with tempfile.TemporaryDirectory(prefix="campana_") as directorio:
+
+        def tareas():
+            numero = 1
+            parte = 0
+            for bloque in bloques:
+                bloque = normalizar_tabla(bloque)
+                colonias = _colonias(bloque)
+                resumen.agregar(bloque, colonias)
+                filas = filas_paginas(bloque, colonias, numero)
+                numero += len(filas)
+                for i in range(0, len(filas), muestras_por_parte):
+                    parte += 1
+                    ruta = os.path.join(directorio, f"parte_{parte:06d}.pdf")
+                    yield ruta, filas[i:i + muestras_por_parte]
+
+        if procesos == 1:
+            partes = [renderizar_parte(tarea) for tarea in tareas()]
+        else:
+            # Ventana acotada de partes en vuelo, igual que la línea de comandos;
+            # el modelo se carga aquí para que los procesos no lo entrenen a la vez
+            cargar_modelo()
+            partes = []
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                en_vuelo = deque()
+                for tarea in tareas():
+                    en_vuelo.append(pool.submit(renderizar_parte, tarea))
+                    if len(en_vuelo) >= 2 * procesos:
+                        partes.append(en_vuelo.popleft().result())
+                while en_vuelo:
+                    partes.append(en_vuelo.popleft().result())
+
+        ruta_resumen = os.path.join(directorio, "resumen.pdf")
+        c = canvas.Canvas(ruta_resumen, pagesize=letter)
+        dibujar_resumen(c, resumen, titulo)
+        c.save()
+
+        unir_pdfs([ruta_resumen] + partes, destino)
+
+    return resumen.muestras
+
+
+def _campana_en_serie(bloques: Iterable[pd.DataFrame], destino, titulo: str) -> int:
+    """Sin pypdf: resumen y páginas en un solo canvas, en un solo proceso."""
+    bloques = [normalizar_tabla(b) for b in bloques]
+    resumen = ResumenCampana()
+    colonias = [_colonias(b) for b in bloques]
+    for bloque, col in zip(bloques, colonias):
+        resumen.agregar(bloque, col)
+
+    c = canvas.Canvas(destino, pagesize=letter)
+    dibujar_resumen(c, resumen, titulo)
+    numero = 1
+    for bloque, col in zip(bloques, colonias):
+        dibujar_paginas(c, filas_paginas(bloque, col, numero))
+        numero += len(bloque)
+    c.save()
+    return resumen.muestras
@@ -0,0 +1,84 @@
+"""
+Carga masiva de muestras desde CSV.
+
+El archivo se lee por bloques de tamaño fijo con ``pandas.read_csv`` y cada
+bloque se evalúa con ``evaluar_lote``, así la memoria no crece con el tamaño
+del archivo. El resultado se escribe bloque a bloque en el destino.
+"""
+
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .anomalias import cargar_distribucion
+from .lote import evaluar_lote
+
+COLUMNAS_REQUERIDAS = ["turbidez", "coliformes", "metales", "tds"]
+VALORES_OLOR = {"sí": 1.0, "si": 1.0, "no": 0.0}
+TAMANO_BLOQUE = 50_000
+# pH que se asume cuando el archivo no trae la columna (no interviene en el índice)
+PH_POR_DEFECTO = 7.0
+
+
+def columna_olor(bloque: pd.DataFrame) -> np.ndarray:
+    """Columna de olor como 0/1; acepta 0/1 o "Sí"/"No" y vale 0 si falta."""
+    if "olor" not in bloque.columns:
+        return np.zeros(len(bloque))
+    olor = bloque["olor"]
+    if olor.dtype == object:
+        olor = olor.astype(str).str.strip().str.lower().map(VALORES_OLOR)
+    return olor.fillna(0).to_numpy(dtype=float)
+
+
+def procesar_csv(
+    fuente,
+    destino,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    total_bytes: Optional[int] = None,
+    progreso: Optional[Callable[[int, float], None]] = None,
+    modelo=None,
+) -> int:
+    """
+    Evalúa un CSV con columnas turbidez, coliformes, metales, tds (y olor
+    opcional) y escribe en ``destino`` las columnas originales más los campos
+    del historial (Nivel_contaminacion_%, Filtro_recomendado,
+    Purificacion_recomendada_%, TDS_filtrado_mgL).
+
+    ``progreso(filas, fraccion)`` se llama después de cada bloque; la fracción
+    se estima con la posición en ``fuente`` cuando se conoce ``total_bytes``.
+    Si se pasa ``modelo`` se usa para elegir el filtro recomendado, y la
+    columna ``Fuera_de_distribucion`` marca las filas con algún contaminante
+    fuera del rango con que se entrenó. Devuelve el número de filas procesadas.
+    """
+    filas = 0
+    primero = True
+
+    for bloque in pd.read_csv(fuente, chunksize=tamano_bloque):
+        faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in bloque.columns]
+        if faltantes:
+            raise ValueError(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+
+        x = np.column_stack(
+            [bloque[COLUMNAS_REQUERIDAS].to_numpy(dtype=float), columna_olor(bloque)]
+        )
+        resultado = evaluar_lote(x, modelo)
+        for nombre, valores in resultado.columnas().items():
+            bloque[nombre] = valores
+        if modelo is not None:
+            bloque["Fuera_de_distribucion"] = cargar_distribucion().fuera_de_rango(x).any(axis=1)
+
+        bloque.to_csv(destino, index=False, header=primero)
+        primero = False
+        filas += len(bloque)
+
+        if progreso is not None:
+            fraccion = 0.0
+            if total_bytes:
+                try:
+                    fraccion = min(fuente.tell() / total_bytes, 1.0)
+                except (AttributeError, OSError):
+                    fraccion = 0.0
+            progreso(filas, fraccion)
+
+    return filas
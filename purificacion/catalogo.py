@@ -0,0 +1,156 @@
+"""
+Catálogo de filtros y etapas de tratamiento.
+
+Se lee una vez por proceso de ``catalogo_filtros.json`` (en la raíz del
+proyecto) y se guarda como matriz densa de eficiencias (filtros ×
+contaminantes), así que comparar todo el catálogo contra una muestra es una
+sola operación de NumPy. Agregar un cartucho es agregar una entrada al
+archivo: nombre, eficiencia por contaminante, costo relativo, posición en
+un tren, datos de operación (precios en MXN, vida y capacidad del cartucho,
+caudal) y los textos que muestra la app. Las entradas con
+``eficiencia_base`` entran en la comparativa de filtros; las demás solo se
+usan como etapas de un tren (ver ``optimizador``).
+"""
+
+import json
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_CATALOGO = os.path.join(_RAIZ, "catalogo_filtros.json")
+
+# Columnas de la matriz de eficiencias
+CONTAMINANTES: List[str] = ["turbidez", "coliformes", "metales", "tds"]
+
+INFINITO = float("inf")
+
+
+def _fraccion(nombre: str, campo: str, valor) -> float:
+    """Valor del JSON como fracción de 0 a 1; si no lo es, error con el filtro y el campo."""
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise ValueError(f"{nombre}: {campo} debe ser un número, no {valor!r}")
+    if not 0 <= valor <= 1:
+        raise ValueError(f"{nombre}: {campo} está fuera de 0–1 ({valor})")
+    return float(valor)
+
+
+@dataclass(frozen=True)
+class Filtro:
+    """Una entrada del catálogo."""
+
+    nombre: str
+    eficiencias: Dict[str, float]  # fracción removida de cada contaminante
+    costo: float  # relativo (Carbón activado = 1)
+    posicion: int  # orden de proceso dentro de un tren: menor va primero
+    eficiencia_base: Optional[float] = None  # None: solo como etapa de un tren
+    resumen: str = ""
+    puntos: Tuple[str, ...] = ()
+    # ----- operación (MXN) -----
+    precio_cartucho: float = 0.0  # por reemplazo del cartucho o medio filtrante
+    vida_litros: float = INFINITO  # vida nominal del cartucho
+    # Gramos retenidos por contaminante antes de saturarse; si falta, no limita
+    capacidad_g: Dict[str, float] = field(default_factory=dict)
+    caudal_lpm: float = INFINITO  # por equipo
+    precio_equipo: float = 0.0
+    costo_operacion_litro: float = 0.0  # energía, agua de rechazo, etc.
+
+    @classmethod
+    def desde_dict(cls, datos: Dict[str, object]) -> "Filtro":
+        nombre = datos.get("nombre")
+        if not nombre:
+            raise ValueError("Hay un filtro sin nombre en el catálogo")
+        eficiencias = datos.get("eficiencias", {})
+        faltan = [c for c in CONTAMINANTES if c not in eficiencias]
+        if faltan:
+            raise ValueError(f"{nombre}: faltan eficiencias para {', '.join(faltan)}")
+        eficiencias = {c: _fraccion(nombre, f"la eficiencia de {c}", eficiencias[c]) for c in CONTAMINANTES}
+        eficiencia_base = datos.get("eficiencia_base")
+        if eficiencia_base is not None:
+            eficiencia_base = _fraccion(nombre, "la eficiencia base", eficiencia_base)
+        capacidad = datos.get("capacidad_g", {})
+        desconocidos = [c for c in capacidad if c not in CONTAMINANTES]
+        if desconocidos:
+            raise ValueError(f"{nombre}: capacidad para contaminantes desconocidos: {', '.join(desconocidos)}")
+        if datos.get("caudal_lpm", INFINITO) <= 0:
+            raise ValueError(f"{nombre}: el caudal debe ser positivo")
+        return cls(
+            nombre=nombre,
+            eficiencias=eficiencias,
+            costo=float(datos.get("costo_relativo", 1.0)),
+            posicion=int(datos.get("posicion", 0)),
+            eficiencia_base=eficiencia_base,
+            resumen=datos.get("resumen", ""),
+            puntos=tuple(datos.get("puntos", ())),
+            precio_cartucho=float(datos.get("precio_cartucho", 0.0)),
+            vida_litros=float(datos.get("vida_litros", INFINITO)),
+            capacidad_g={c: float(g) for c, g in capacidad.items()},
+            caudal_lpm=float(datos.get("caudal_lpm", INFINITO)),
+            precio_equipo=float(datos.get("precio_equipo", 0.0)),
+            costo_operacion_litro=float(datos.get("costo_operacion_litro", 0.0)),
+        )
+
+
+class Catalogo:
+    """Filtros en un orden fijo, con sus datos como arreglos (una fila por filtro)."""
+
+    def __init__(self, filtros: Sequence[Filtro]):
+        self.filtros: Tuple[Filtro, ...] = tuple(filtros)
+        self.posicion_de: Dict[str, int] = {f.nombre: i for i, f in enumerate(self.filtros)}
+        if len(self.posicion_de) != len(self.filtros):
+            raise ValueError("El catálogo tiene filtros con nombre repetido")
+
+        self.nombres = np.array([f.nombre for f in self.filtros])
+        # Eficiencia por contaminante (F × 4)
+        self.matriz = np.array(
+            [[f.eficiencias[c] for c in CONTAMINANTES] for f in self.filtros], dtype=float
+        ).reshape(len(self.filtros), len(CONTAMINANTES))
+        self.costos = np.array([f.costo for f in self.filtros], dtype=float)
+        # Eficiencia base (F,); NaN en las etapas que no entran en la comparativa
+        self.eficiencia_base = np.array(
+            [np.nan if f.eficiencia_base is None else f.eficiencia_base for f in self.filtros],
+            dtype=float,
+        )
+
+        # Operación (F,) y capacidad por contaminante (F × 4, infinito si no limita)
+        self.precios_cartucho = np.array([f.precio_cartucho for f in self.filtros], dtype=float)
+        self.vida_litros = np.array([f.vida_litros for f in self.filtros], dtype=float)
+        self.capacidad_g = np.array(
+            [[f.capacidad_g.get(c, INFINITO) for c in CONTAMINANTES] for f in self.filtros], dtype=float
+        ).reshape(len(self.filtros), len(CONTAMINANTES))
+        self.caudales_lpm = np.array([f.caudal_lpm for f in self.filtros], dtype=float)
+        self.precios_equipo = np.array([f.precio_equipo for f in self.filtros], dtype=float)
+        self.costos_operacion = np.array([f.costo_operacion_litro for f in self.filtros], dtype=float)
+
+    def __len__(self) -> int:
+        return len(self.filtros)
+
+    def __iter__(self) -> Iterator[Filtro]:
+        return iter(self.filtros)
+
+    def __getitem__(self, nombre: str) -> Filtro:
+        return self.filtros[self.posicion_de[nombre]]
+
+    def comparables(self) -> "Catalogo":
+        """Solo los filtros de la comparativa (los que tienen eficiencia base)."""
+        return Catalogo([f for f in self.filtros if f.eficiencia_base is not None])
+
+    def despues(self, antes) -> np.ndarray:
+        """Contaminantes tras cada filtro: (F × 4) para una muestra (4,)."""
+        return np.asarray(antes, dtype=float)[None, :] * (1 - self.matriz)
+
+
+def leer_catalogo(ruta: str = RUTA_CATALOGO) -> Catalogo:
+    """Lee y valida un catálogo en JSON (``{"filtros": [...]}``)."""
+    with open(ruta, encoding="utf-8") as f:
+        datos = json.load(f)
+    return Catalogo([Filtro.desde_dict(d) for d in datos["filtros"]])
+
+
+@lru_cache(maxsize=None)
+def cargar_catalogo(ruta: str = RUTA_CATALOGO) -> Catalogo:
+    """Catálogo del proceso (se lee una sola vez)."""
+    return leer_catalogo(ruta)
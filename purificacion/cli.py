@@ -0,0 +1,253 @@
+"""
+Evaluación por lotes desde la línea de comandos.
+
+    python -m purificacion muestras.csv -o resultados.parquet --pdf lote
+    python -m purificacion campana.csv -o resultados.csv --pdf campana
+    python -m purificacion municipio.csv -o resultados.csv --volumen 500000
+
+Lee muestras de un CSV o JSONL (columnas turbidez, coliformes, metales, tds y
+opcionalmente olor y ph), aplica la misma evaluación y recomendación que la
+pestaña de Filtros y escribe los resultados en CSV o Parquet. Los bloques se
+reparten entre procesos. No importa Streamlit; plotly y reportlab solo se
+cargan si se piden PDFs, y pyarrow solo si la salida es Parquet. Con
+``--pdf campana`` se escribe un único reporte consolidado (ver ``campana``);
+con ``--volumen`` se agrega el filtro más económico por litro (ver ``costos``).
+"""
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .carga import COLUMNAS_REQUERIDAS, PH_POR_DEFECTO, TAMANO_BLOQUE, columna_olor
+from .costos import costos_por_litro
+from .lote import evaluar_lote
+from .modelo import cargar_modelo
+
+MODOS_PDF = ("ninguno", "muestra", "lote", "campana")
+
+
+def leer_bloques(ruta: str, tamano_bloque: int) -> Iterator[pd.DataFrame]:
+    """Bloques de muestras desde CSV o JSONL (según la extensión)."""
+    if ruta.endswith((".jsonl", ".ndjson")):
+        return pd.read_json(ruta, lines=True, chunksize=tamano_bloque)
+    return pd.read_csv(ruta, chunksize=tamano_bloque)
+
+
+def evaluar_bloque(bloque: pd.DataFrame, volumen_diario: Optional[float] = None) -> pd.DataFrame:
+    """
+    Agrega al bloque los campos del historial (mismo cálculo que la app) y,
+    si se da ``volumen_diario``, el filtro más económico y su costo por litro.
+    """
+    faltantes = [c for c in COLUMNAS_REQUERIDAS if c not in bloque.columns]
+    if faltantes:
+        raise ValueError(f"Faltan columnas: {', '.join(faltantes)}")
+
+    x = np.column_stack(
+        [bloque[COLUMNAS_REQUERIDAS].to_numpy(dtype=float), columna_olor(bloque)]
+    )
+    resultado = evaluar_lote(x, cargar_modelo())
+    bloque = bloque.copy()
+    for nombre, valores in resultado.columnas().items():
+        bloque[nombre] = valores
+    if volumen_diario is not None:
+        ranking = costos_por_litro(resultado.antes, volumen_diario)
+        mejor = ranking.mejor
+        hay = mejor >= 0
+        bloque["Filtro_economico"] = np.where(hay, ranking.nombres[mejor], "")
+        costo = ranking.costo_litro[np.arange(len(ranking)), mejor]
+        bloque["Costo_litro_MXN"] = np.where(hay, np.round(costo, 4), np.nan)
+    return bloque
+
+
+def escribir_archivo(ruta: str, datos: bytes) -> None:
+    """
+    Escribe ``datos`` en un temporal junto a ``ruta`` y lo renombra: si algo
+    falla, no queda un PDF vacío o a medias con el nombre final.
+    """
+    temporal = f"{ruta}.{os.getpid()}.tmp"
+    try:
+        with open(temporal, "wb") as f:
+            f.write(datos)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+
+def escribir_pdfs(bloque: pd.DataFrame, numero: int, modo: str, directorio: str) -> None:
+    """Un PDF por muestra o uno por bloque en ``directorio``."""
+    from . import reporte
+    from .motor import Muestra, evaluar
+
+    os.makedirs(directorio, exist_ok=True)
+    if modo == "lote":
+        ruta = os.path.join(directorio, f"lote_{numero:05d}.pdf")
+        escribir_archivo(ruta, reporte.generar_pdf_lote(bloque, titulo=f"Reporte de lote {numero}"))
+        return
+
+    modelo = cargar_modelo()
+    olor = columna_olor(bloque)
+    ph = bloque["ph"] if "ph" in bloque.columns else pd.Series(PH_POR_DEFECTO, index=bloque.index)
+    for i, (indice, fila) in enumerate(bloque.iterrows()):
+        muestra = Muestra(
+            float(ph[indice]),
+            float(fila["turbidez"]),
+            float(fila["coliformes"]),
+            float(fila["metales"]),
+            float(fila["tds"]),
+            "Sí" if olor[i] else "No",
+        )
+        ruta = os.path.join(directorio, f"muestra_{indice:07d}_{muestra.id}.pdf")
+        escribir_archivo(ruta, reporte.pdf_resultado(evaluar(muestra, modelo)))
+
+
+def procesar_bloque(tarea) -> pd.DataFrame:
+    """Trabajo de cada proceso: evaluar y, si se pidió, generar PDFs."""
+    bloque, numero, modo_pdf, dir_pdf, volumen_diario = tarea
+    resultado = evaluar_bloque(bloque, volumen_diario)
+    if modo_pdf in ("muestra", "lote"):
+        escribir_pdfs(resultado, numero, modo_pdf, dir_pdf)
+    return resultado
+
+
+def esquema_salida(bloque: pd.DataFrame):
+    """
+    Esquema Parquet de la salida, tomado del primer bloque resultado pero sin
+    depender de sus valores: los contaminantes y el pH son siempre reales
+    (un bloque puede traer solo enteros y el siguiente, decimales) y una
+    columna vacía en ese bloque se toma como texto en todos.
+    """
+    import pyarrow as pa
+
+    esquema = pa.Schema.from_pandas(bloque, preserve_index=False)
+    reales = set(COLUMNAS_REQUERIDAS) | {"ph"}
+    campos = []
+    for campo in esquema:
+        if campo.name in reales:
+            campo = campo.with_type(pa.float64())
+        elif bloque[campo.name].isna().all():
+            campo = campo.with_type(pa.string())
+        campos.append(campo)
+    return pa.schema(campos)
+
+
+class EscritorSalida:
+    """Escribe bloques de resultados en CSV o Parquet sin juntarlos en memoria."""
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        self.parquet = ruta.endswith(".parquet")
+        self._escritor = None
+        self._esquema = None
+        self._textos: List[str] = []
+        self._primero = True
+
+    def escribir(self, bloque: pd.DataFrame) -> None:
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            if self._escritor is None:
+                self._esquema = esquema_salida(bloque)
+                self._textos = [c.name for c in self._esquema if pa.types.is_string(c.type)]
+                self._escritor = pq.ParquetWriter(self.ruta, self._esquema)
+            bloque = bloque.astype({nombre: "string" for nombre in self._textos})
+            self._escritor.write_table(pa.Table.from_pandas(bloque, schema=self._esquema, preserve_index=False))
+        else:
+            bloque.to_csv(self.ruta, index=False, header=self._primero, mode="w" if self._primero else "a")
+        self._primero = False
+
+    def cerrar(self) -> None:
+        if self._escritor is not None:
+            self._escritor.close()
+
+
+def ejecutar(
+    entrada: str,
+    salida: str,
+    tamano_bloque: int = TAMANO_BLOQUE,
+    procesos: Optional[int] = None,
+    modo_pdf: str = "ninguno",
+    dir_pdf: str = "reportes",
+    volumen_diario: Optional[float] = None,
+) -> int:
+    """Procesa ``entrada`` completo y devuelve el número de muestras."""
+    procesos = procesos or os.cpu_count() or 1
+    tareas = (
+        (bloque, numero, modo_pdf, dir_pdf, volumen_diario)
+        for numero, bloque in enumerate(leer_bloques(entrada, tamano_bloque), start=1)
+    )
+    escritor = EscritorSalida(salida)
+    total = 0
+
+    try:
+        if procesos == 1:
+            for tarea in tareas:
+                resultado = procesar_bloque(tarea)
+                escritor.escribir(resultado)
+                total += len(resultado)
+        else:
+            # El modelo se carga (o se entrena y guarda) aquí y no en cada proceso
+            cargar_modelo()
+            # Ventana acotada de bloques en vuelo: memoria estable y orden preservado
+            with ProcessPoolExecutor(max_workers=procesos) as pool:
+                en_vuelo = deque()
+                for tarea in tareas:
+                    en_vuelo.append(pool.submit(procesar_bloque, tarea))
+                    if len(en_vuelo) >= 2 * procesos:
+                        resultado = en_vuelo.popleft().result()
+                        escritor.escribir(resultado)
+                        total += len(resultado)
+                while en_vuelo:
+                    resultado = en_vuelo.popleft().result()
+                    escritor.escribir(resultado)
+                    total += len(resultado)
+    finally:
+        escritor.cerrar()
+
+    if modo_pdf == "campana":
+        # Un solo reporte consolidado; sus páginas también se reparten entre procesos
+        from .campana import generar_pdf_campana
+
+        os.makedirs(dir_pdf, exist_ok=True)
+        generar_pdf_campana(
+            leer_bloques(entrada, tamano_bloque), os.path.join(dir_pdf, "campana.pdf"), procesos
+        )
+    return total
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m purificacion",
+        description="Evalúa muestras de agua por lotes y recomienda filtros.",
+    )
+    parser.add_argument("entrada", help="CSV o JSONL con turbidez, coliformes, metales, tds y olor")
+    parser.add_argument("-o", "--salida", required=True, help="archivo de resultados (.csv o .parquet)")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="muestras por bloque")
+    parser.add_argument("--procesos", type=int, default=None, help="procesos (por defecto, núcleos)")
+    parser.add_argument("--pdf", choices=MODOS_PDF, default="ninguno", help="generar PDF por muestra, por lote o uno consolidado de la campaña")
+    parser.add_argument("--dir-pdf", default="reportes", help="carpeta para los PDF")
+    parser.add_argument("--volumen", type=float, default=None, help="litros por día a tratar: agrega el filtro más económico y su costo por litro")
+    args = parser.parse_args(argv)
+    if args.volumen is not None and args.volumen <= 0:
+        parser.error("--volumen debe ser positivo")
+
+    inicio = time.perf_counter()
+    try:
+        total = ejecutar(
+            args.entrada, args.salida, args.bloque, args.procesos, args.pdf, args.dir_pdf, args.volumen
+        )
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    transcurrido = time.perf_counter() - inicio
+    print(f"{total} muestras evaluadas en {transcurrido:.2f} s → {args.salida}")
+    return 0
@@ -0,0 +1,25 @@
+"""
+Colonias de Ecatepec con su centroide aproximado.
+
+Va aparte de ``geo`` (que trae pandas y el historial) porque el formulario
+de la app lo necesita desde la portada.
+"""
+
+from typing import Dict, Tuple
+
+# Centroides aproximados (latitud, longitud) de colonias de Ecatepec
+COLONIAS_ECATEPEC: Dict[str, Tuple[float, float]] = {
+    "Ciudad Azteca": (19.5345, -99.0275),
+    "Ciudad Cuauhtémoc": (19.6430, -99.0020),
+    "Ejidos de San Cristóbal": (19.6120, -99.0400),
+    "Granjas Valle de Guadalupe": (19.5660, -99.0380),
+    "Guadalupe Victoria": (19.5540, -99.0470),
+    "Jardines de Morelos": (19.6130, -99.0050),
+    "Las Américas": (19.5850, -99.0300),
+    "Potrero del Rey": (19.5600, -99.0180),
+    "San Cristóbal Centro": (19.6015, -99.0505),
+    "San Pedro Xalostoc": (19.5270, -99.0750),
+    "Santa Clara Coatitla": (19.5560, -99.0640),
+    "Santa María Tulpetlac": (19.5710, -99.0640),
+    "Valle de Aragón 3ra Sección": (19.5090, -99.0460),
+}
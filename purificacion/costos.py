@@ -0,0 +1,118 @@
+"""
+Costo por litro de cada filtro según el volumen diario a tratar.
+
+Un cartucho se reemplaza cuando se satura con lo que retiene (gramos de
+turbidez, metales y TDS por litro filtrado, según la calidad de la muestra)
+o al llegar a su vida nominal, lo que ocurra primero. Con eso, el precio del
+cartucho, el costo de operación y los equipos en paralelo que pide el
+volumen diario (amortizados) se obtiene el costo por litro, y los filtros se
+ordenan del más barato que alcanza el objetivo de riesgo al más caro.
+
+Todo se calcula con arreglos muestras × filtros, así que ordenar un catálogo
+grande para miles de muestras es una sola pasada de NumPy.
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .catalogo import Catalogo
+from .interpretacion import RIESGO_ACEPTABLE
+from .lote import VECTOR_MAXIMOS
+from .motor import CATALOGO
+
+# mg/L retenidos por unidad de cada contaminante, en el orden de PARAMETROS:
+# turbidez como sólidos suspendidos (~1 mg/L por NTU), los coliformes no
+# suman masa, metales (ppm) y TDS ya están en mg/L.
+MG_POR_UNIDAD = np.array([1.0, 0.0, 1.0, 1.0])
+
+HORAS_OPERACION = 20  # por día
+VIDA_EQUIPO_DIAS = 5 * 365  # para amortizar el equipo
+
+
+@dataclass
+class RankingCostos:
+    """Resultado de ``costos_por_litro``: (N, F) salvo donde se indica."""
+
+    nombres: np.ndarray  # (F,)
+    unidades: np.ndarray  # (F,) equipos en paralelo para el volumen diario
+    litros_por_cartucho: np.ndarray
+    dias_por_cartucho: np.ndarray
+    costo_litro: np.ndarray  # MXN por litro
+    riesgo_despues: np.ndarray  # riesgo global tras el filtro (0–100)
+    cumple: np.ndarray  # riesgo_despues <= objetivo
+    orden: np.ndarray  # índices de filtro: primero los que cumplen, por costo
+
+    def __len__(self) -> int:
+        return len(self.costo_litro)
+
+    @property
+    def mejor(self) -> np.ndarray:
+        """(N,) índice del filtro más barato que cumple, o -1 si ninguno cumple."""
+        primero = self.orden[:, 0]
+        return np.where(self.cumple[np.arange(len(self)), primero], primero, -1)
+
+    def tabla(self, i: int = 0) -> pd.DataFrame:
+        """Ranking de una muestra, listo para mostrar."""
+        orden = self.orden[i]
+        return pd.DataFrame({
+            "Filtro": self.nombres[orden],
+            "Cumple objetivo": np.where(self.cumple[i, orden], "Sí", "No"),
+            "Costo (MXN/L)": self.costo_litro[i, orden],
+            "Litros por cartucho": self.litros_por_cartucho[i, orden],
+            "Reemplazo cada (días)": self.dias_por_cartucho[i, orden],
+            "Equipos": self.unidades[orden],
+            "Riesgo residual (%)": self.riesgo_despues[i, orden],
+        })
+
+
+def costos_por_litro(
+    antes,
+    volumen_diario: float,
+    catalogo: Optional[Catalogo] = None,
+    riesgo_objetivo: float = RIESGO_ACEPTABLE,
+    horas_operacion: float = HORAS_OPERACION,
+) -> RankingCostos:
+    """
+    Costo por litro de cada filtro del catálogo (por defecto, el de la
+    comparativa) para una muestra (4,) o una matriz N×4 de contaminantes en
+    el orden de PARAMETROS, tratando ``volumen_diario`` litros al día.
+    """
+    if volumen_diario <= 0:
+        raise ValueError("El volumen diario debe ser positivo")
+    catalogo = CATALOGO if catalogo is None else catalogo
+    antes = np.atleast_2d(np.asarray(antes, dtype=float))[:, :4]
+
+    # Gramos retenidos por litro (N, F, 4) y litros hasta saturar cada cartucho
+    retenido = antes[:, None, :] * catalogo.matriz[None, :, :] * (MG_POR_UNIDAD / 1000)
+    with np.errstate(divide="ignore"):
+        hasta_saturar = (catalogo.capacidad_g[None, :, :] / retenido).min(axis=2)
+    litros = np.minimum(hasta_saturar, catalogo.vida_litros[None, :])
+
+    # Equipos en paralelo para el caudal que pide el volumen diario
+    capacidad_diaria = catalogo.caudales_lpm * 60 * horas_operacion
+    unidades = np.maximum(1, np.ceil(volumen_diario / capacidad_diaria))
+    dias = litros / (volumen_diario / unidades)[None, :]
+
+    costo = (
+        catalogo.precios_cartucho[None, :] / litros
+        + catalogo.costos_operacion[None, :]
+        + (unidades * catalogo.precios_equipo / (VIDA_EQUIPO_DIAS * volumen_diario))[None, :]
+    )
+
+    despues = antes[:, None, :] * (1 - catalogo.matriz[None, :, :])
+    riesgo = np.minimum(100, despues / VECTOR_MAXIMOS * 100).sum(axis=2) / 4
+    cumple = riesgo <= riesgo_objetivo
+
+    return RankingCostos(
+        nombres=catalogo.nombres,
+        unidades=unidades.astype(int),
+        litros_por_cartucho=litros,
+        dias_por_cartucho=dias,
+        costo_litro=costo,
+        riesgo_despues=riesgo,
+        cumple=cumple,
+        orden=np.lexsort((costo, ~cumple), axis=-1),
+    )
@@ -0,0 +1,59 @@
+"""
+Ciclo de vida de figuras de matplotlib.
+
+Las figuras se crean con la API orientada a objetos (``matplotlib.figure.Figure``)
+en lugar de ``pyplot``, así no quedan registradas en el estado global y el
+recolector de basura puede liberarlas. Después de rasterizarlas se limpian de
+forma explícita, de modo que un servidor de larga duración no acumula memoria
+ni dispara el aviso de "más de 20 figuras abiertas".
+"""
+
+import sys
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Iterator
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+DPI_PANTALLA = 200
+DPI_PDF = 120
+
+
+def nueva_figura(figsize=(6, 4)) -> Figure:
+    """Figura independiente de pyplot con su propio canvas Agg."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def liberar(fig) -> None:
+    """Libera una figura; también cierra figuras creadas con pyplot."""
+    if fig is None:
+        return
+    # Solo consultamos pyplot si alguien ya lo importó
+    plt = sys.modules.get("matplotlib.pyplot")
+    if plt is not None and plt.fignum_exists(getattr(fig, "number", -1)):
+        plt.close(fig)
+    fig.clear()
+
+
+def rasterizar(fig, dpi: int = DPI_PDF, liberar_figura: bool = True) -> bytes:
+    """PNG de la figura; por defecto la libera después de dibujarla."""
+    buf = BytesIO()
+    try:
+        fig.savefig(buf, format="png", dpi=dpi, bbox_inches="tight")
+    finally:
+        if liberar_figura:
+            liberar(fig)
+    return buf.getvalue()
+
+
+@contextmanager
+def figura_temporal(figsize=(6, 4)) -> Iterator[Figure]:
+    """Figura que se libera al salir del bloque ``with``."""
+    fig = nueva_figura(figsize)
+    try:
+        yield fig
+    finally:
+        liberar(fig)
@@ -0,0 +1,225 @@
+"""
+Índice espacial de las muestras con ubicación.
+
+Las coordenadas se proyectan a kilómetros sobre un plano local centrado en
+Ecatepec (a escala de municipio el error es despreciable) y los puntos se
+ordenan por celda de una malla regular: cada celda es un tramo contiguo del
+arreglo ordenado, con su inicio en una tabla de desplazamientos. Una vista
+rectangular se resuelve con un corte por fila de celdas y los vecinos más
+cercanos revisan solo los anillos de celdas alrededor del punto, así que
+ambas consultas tardan milisegundos con decenas de miles de muestras. Para
+el mapa, las muestras se agregan en celdas del lado que se pida: el
+navegador recibe unos cientos de celdas y no cada punto.
+
+Las coordenadas de las colonias son centroides aproximados; sirven para
+ubicar una muestra cuando no se conoce el punto exacto.
+"""
+
+import math
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .colonias import COLONIAS_ECATEPEC
+from .historial import AlmacenHistorial, Consulta
+from .lote import MATRIZ_EFICIENCIAS, VECTOR_MAXIMOS
+from .motor import CATALOGO
+
+# Origen de la proyección (San Cristóbal Centro)
+CENTRO: Tuple[float, float] = COLONIAS_ECATEPEC["San Cristóbal Centro"]
+KM_POR_GRADO_LAT = 110.574
+KM_POR_GRADO_LON = 111.320 * math.cos(math.radians(CENTRO[0]))
+
+TAMANO_CELDA_KM = 0.5  # malla del índice
+# Si la malla tuviera más celdas que esto por punto (puntos muy dispersos),
+# se agranda la celda para que la tabla de desplazamientos no crezca de más
+MAX_CELDAS_POR_PUNTO = 4
+
+RIESGO_RESIDUAL = "Riesgo_residual_%"
+COLUMNAS_MAPA = [
+    "Fecha", "ID", "Sitio", "Colonia", "Latitud", "Longitud",
+    "Nivel_contaminacion_%", "Filtro_recomendado",
+]
+
+# Desplazamiento para combinar dos índices de celda (con signo) en una llave
+_DESPLAZAMIENTO = 1 << 20
+
+
+def a_km(lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+    """(x, y) en km respecto a ``CENTRO``."""
+    x = (np.asarray(lon, dtype=float) - CENTRO[1]) * KM_POR_GRADO_LON
+    y = (np.asarray(lat, dtype=float) - CENTRO[0]) * KM_POR_GRADO_LAT
+    return x, y
+
+
+def a_grados(x, y) -> Tuple[np.ndarray, np.ndarray]:
+    """(latitud, longitud) de un punto en km respecto a ``CENTRO``."""
+    return CENTRO[0] + np.asarray(y) / KM_POR_GRADO_LAT, CENTRO[1] + np.asarray(x) / KM_POR_GRADO_LON
+
+
+def rectangulo(lat: float, lon: float, radio_km: float) -> Tuple[float, float, float, float]:
+    """(lat_min, lat_max, lon_min, lon_max) del cuadro de ``radio_km`` alrededor del punto."""
+    grados_lat = radio_km / KM_POR_GRADO_LAT
+    grados_lon = radio_km / KM_POR_GRADO_LON
+    return lat - grados_lat, lat + grados_lat, lon - grados_lon, lon + grados_lon
+
+
+def riesgo_residual(tabla: pd.DataFrame) -> np.ndarray:
+    """
+    Riesgo global tras el filtro recomendado de cada entrada del historial
+    (el mismo cálculo de la pestaña de filtros); NaN si el filtro ya no está
+    en el catálogo.
+    """
+    antes = tabla[["Turbidez_NTU", "Coliformes_NMP_100ml", "Metales_ppm", "TDS_mgL"]].to_numpy(dtype=float)
+    indice = tabla["Filtro_recomendado"].map(CATALOGO.posicion_de).to_numpy(dtype=float)
+    conocido = ~np.isnan(indice)
+    eficiencias = np.zeros_like(antes)
+    eficiencias[conocido] = MATRIZ_EFICIENCIAS[indice[conocido].astype(int)]
+    riesgo = np.minimum(100, antes * (1 - eficiencias) / VECTOR_MAXIMOS * 100).sum(axis=1) / 4
+    return np.where(conocido, riesgo, np.nan)
+
+
+class IndiceGeo:
+    """
+    Malla de celdas sobre las filas de ``tabla`` (columnas ``Latitud`` y
+    ``Longitud``). Las consultas devuelven posiciones de fila en ``tabla``.
+    """
+
+    def __init__(self, tabla: pd.DataFrame, tamano_celda_km: float = TAMANO_CELDA_KM):
+        self.tabla = tabla
+        self.x, self.y = a_km(tabla["Latitud"].to_numpy(), tabla["Longitud"].to_numpy())
+        n = len(tabla)
+        self._x0 = float(self.x.min()) if n else 0.0
+        self._y0 = float(self.y.min()) if n else 0.0
+        ancho = float(self.x.max()) - self._x0 if n else 0.0
+        alto = float(self.y.max()) - self._y0 if n else 0.0
+
+        tamano = tamano_celda_km
+        while (ancho // tamano + 1) * (alto // tamano + 1) > MAX_CELDAS_POR_PUNTO * n + 1024:
+            tamano *= 2
+        self.tamano_celda_km = tamano
+        self._columnas = int(ancho // tamano) + 1
+        self._filas = int(alto // tamano) + 1
+
+        celda = (
+            ((self.y - self._y0) // tamano).astype(np.int64) * self._columnas
+            + ((self.x - self._x0) // tamano).astype(np.int64)
+        )
+        # Posición en ``tabla`` de cada punto, agrupados por celda
+        self._orden = np.argsort(celda, kind="stable")
+        self._xs = self.x[self._orden]
+        self._ys = self.y[self._orden]
+        # Los puntos de la celda c están en _orden[_inicio[c]:_inicio[c + 1]]
+        self._inicio = np.searchsorted(celda[self._orden], np.arange(self._filas * self._columnas + 1))
+
+    def __len__(self) -> int:
+        return len(self.tabla)
+
+    def _columna(self, x: float) -> int:
+        return math.floor((x - self._x0) / self.tamano_celda_km)
+
+    def _fila(self, y: float) -> int:
+        return math.floor((y - self._y0) / self.tamano_celda_km)
+
+    def _en_celdas(self, ix0: int, ix1: int, iy0: int, iy1: int) -> np.ndarray:
+        """Posiciones (en el arreglo ordenado) de los puntos en el rectángulo de celdas."""
+        ix0, ix1 = max(ix0, 0), min(ix1, self._columnas - 1)
+        iy0, iy1 = max(iy0, 0), min(iy1, self._filas - 1)
+        if ix0 > ix1 or iy0 > iy1:
+            return np.empty(0, dtype=np.int64)
+        # En cada fila de celdas, el tramo de ix0 a ix1 es contiguo
+        filas = np.arange(iy0, iy1 + 1) * self._columnas
+        desde, hasta = self._inicio[filas + ix0], self._inicio[filas + ix1 + 1]
+        return np.concatenate([np.arange(a, b) for a, b in zip(desde, hasta)])
+
+    # ----- consultas -----
+    def en_vista(self, lat_min: float, lat_max: float, lon_min: float, lon_max: float) -> np.ndarray:
+        """Filas dentro del rectángulo de coordenadas."""
+        x_min, y_min = a_km(lat_min, lon_min)
+        x_max, y_max = a_km(lat_max, lon_max)
+        if not len(self):
+            return np.empty(0, dtype=np.int64)
+        candidatos = self._en_celdas(
+            self._columna(x_min), self._columna(x_max), self._fila(y_min), self._fila(y_max)
+        )
+        xs, ys = self._xs[candidatos], self._ys[candidatos]
+        dentro = (xs >= x_min) & (xs <= x_max) & (ys >= y_min) & (ys <= y_max)
+        return self._orden[candidatos[dentro]]
+
+    def cercanos(self, lat: float, lon: float, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Las ``k`` filas más cercanas al punto, de la más cercana a la más
+        lejana, y su distancia en km.
+        """
+        k = min(k, len(self))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        x, y = (float(v) for v in a_km(lat, lon))
+        ix, iy = self._columna(x), self._fila(y)
+        tamano = self.tamano_celda_km
+        r = 0
+        while True:
+            candidatos = self._en_celdas(ix - r, ix + r, iy - r, iy + r)
+            todo = ix - r <= 0 and iy - r <= 0 and ix + r >= self._columnas - 1 and iy + r >= self._filas - 1
+            if len(candidatos) >= k:
+                distancias = np.hypot(self._xs[candidatos] - x, self._ys[candidatos] - y)
+                mas_cercanos = np.argpartition(distancias, k - 1)[:k]
+                # Distancia hasta el borde del cuadro revisado: lo que está
+                # más cerca que eso ya está entre los candidatos
+                cobertura = min(
+                    x - (self._x0 + (ix - r) * tamano),
+                    self._x0 + (ix + r + 1) * tamano - x,
+                    y - (self._y0 + (iy - r) * tamano),
+                    self._y0 + (iy + r + 1) * tamano - y,
+                )
+                if todo or distancias[mas_cercanos].max() <= cobertura:
+                    mas_cercanos = mas_cercanos[np.argsort(distancias[mas_cercanos], kind="stable")]
+                    return self._orden[candidatos[mas_cercanos]], distancias[mas_cercanos]
+            r = max(1, 2 * r)
+
+    def celdas(
+        self,
+        tamano_km: float,
+        columnas: Sequence[str] = ("Nivel_contaminacion_%", RIESGO_RESIDUAL),
+        filas: Optional[np.ndarray] = None,
+    ) -> pd.DataFrame:
+        """
+        Agrega las filas (todas o las de ``filas``) en celdas cuadradas de
+        ``tamano_km`` de lado: centro de la celda, número de muestras y media
+        de cada columna. La malla está anclada a ``CENTRO``, así que una
+        celda no cambia al mover la vista.
+        """
+        filas = np.arange(len(self)) if filas is None else np.asarray(filas)
+        ix = np.floor(self.x[filas] / tamano_km).astype(np.int64)
+        iy = np.floor(self.y[filas] / tamano_km).astype(np.int64)
+        llave = (ix + _DESPLAZAMIENTO) * (2 * _DESPLAZAMIENTO) + iy + _DESPLAZAMIENTO
+        llaves, grupo = np.unique(llave, return_inverse=True)
+        cx = (llaves // (2 * _DESPLAZAMIENTO) - _DESPLAZAMIENTO + 0.5) * tamano_km
+        cy = (llaves % (2 * _DESPLAZAMIENTO) - _DESPLAZAMIENTO + 0.5) * tamano_km
+        lat, lon = a_grados(cx, cy)
+
+        agregado = {"Latitud": lat, "Longitud": lon, "Muestras": np.bincount(grupo, minlength=len(llaves))}
+        for columna in columnas:
+            valores = self.tabla[columna].to_numpy(dtype=float)[filas]
+            validos = ~np.isnan(valores)
+            suma = np.bincount(grupo, weights=np.where(validos, valores, 0.0), minlength=len(llaves))
+            cuenta = np.bincount(grupo, weights=validos, minlength=len(llaves))
+            with np.errstate(invalid="ignore"):
+                agregado[columna] = suma / cuenta
+        return pd.DataFrame(agregado)
+
+
+def muestras_ubicadas(almacen: AlmacenHistorial) -> pd.DataFrame:
+    """Entradas del historial con coordenadas, con su riesgo residual (índice ``n``)."""
+    bloques = [
+        bloque.assign(**{RIESGO_RESIDUAL: riesgo_residual(bloque)})[COLUMNAS_MAPA + [RIESGO_RESIDUAL]]
+        for bloque in almacen.bloques(consulta=Consulta(con_ubicacion=True))
+    ]
+    if not bloques:
+        return pd.DataFrame(columns=COLUMNAS_MAPA + [RIESGO_RESIDUAL])
+    return pd.concat(bloques)
+
+
+def indice_del_historial(almacen: AlmacenHistorial, tamano_celda_km: float = TAMANO_CELDA_KM) -> IndiceGeo:
+    return IndiceGeo(muestras_ubicadas(almacen), tamano_celda_km)
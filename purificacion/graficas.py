@@ -0,0 +1,231 @@
+"""
+Figuras de la app construidas a partir de un ``Resultado``.
+
+Cada función solo depende del resultado del motor, así que la app puede
+guardarlas en caché por combinación de parámetros y no rehacerlas en cada
+rerun de Streamlit. El radar es la única figura de matplotlib: ``figuras``
+se importa dentro de ``radar_png`` para no cargar matplotlib con el módulo.
+"""
+
+from math import pi
+from typing import Dict, Optional
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from .motor import ETIQUETAS, MAXIMOS, PARAMETROS, Resultado
+from .sensibilidad import Barrido
+
+COLUMNAS_FILTROS = ["Filtro", "Eficiencia base (%)", "Purificación estimada (%)"]
+
+
+def tabla_filtros(resultado: Resultado) -> pd.DataFrame:
+    """Comparativa de filtros como DataFrame (se usa en la tabla y en el PDF)."""
+    return pd.DataFrame(resultado.tabla_filtros, columns=COLUMNAS_FILTROS)
+
+
+def tabla_filtros_formateada(df: pd.DataFrame) -> pd.DataFrame:
+    """Copia de la comparativa con los porcentajes como texto."""
+    df_display = df.copy()
+    df_display["Eficiencia base (%)"] = df_display["Eficiencia base (%)"].map(lambda x: f"{x:.1f} %")
+    df_display["Purificación estimada (%)"] = df_display["Purificación estimada (%)"].map(lambda x: f"{x:.1f} %")
+    return df_display
+
+
+def figuras_riesgo(resultado: Resultado):
+    """Pies de riesgo relativo antes y después del filtrado."""
+    df_riesgo = pd.DataFrame({
+        "Contaminante": list(resultado.riesgo_antes.keys()),
+        "Antes (%)": list(resultado.riesgo_antes.values()),
+        "Después (%)": list(resultado.riesgo_despues.values())
+    })
+
+    fig_pie = px.pie(df_riesgo, names="Contaminante", values="Antes (%)",
+                     title="Riesgo relativo antes del filtrado")
+    fig_pie.update_layout(template="plotly_dark")
+
+    fig_pie2 = px.pie(df_riesgo, names="Contaminante", values="Después (%)",
+                      title="Riesgo relativo después del filtrado")
+    fig_pie2.update_layout(template="plotly_dark")
+    return fig_pie, fig_pie2
+
+
+def figura_filtros(df: pd.DataFrame):
+    """Barras de eficiencia base y purificación estimada por filtro."""
+    fig = px.bar(
+        df,
+        x="Filtro",
+        y=["Eficiencia base (%)", "Purificación estimada (%)"],
+        barmode="group",
+        labels={"value": "Porcentaje (%)", "variable": "Métrica"},
+        title="Comparativa de filtros utilizados en México",
+    )
+    fig.update_layout(template="plotly_dark", legend_title_text="Métrica")
+    return fig
+
+
+def radar_png(resultado: Resultado, dpi: Optional[int] = None) -> bytes:
+    """
+    Perfil de contaminación antes del filtrado (matplotlib, polar) como PNG,
+    a ``DPI_PANTALLA`` si no se indica ``dpi``.
+
+    La figura se libera en cuanto se rasteriza; solo se conservan los bytes.
+    """
+    from .figuras import DPI_PANTALLA, figura_temporal, rasterizar
+
+    valores_before = [resultado.antes[p] / MAXIMOS[p] for p in PARAMETROS]
+    valores_before += valores_before[:1]
+
+    angles = [n / float(len(PARAMETROS)) * 2 * pi for n in range(len(PARAMETROS))]
+    angles += angles[:1]
+
+    with figura_temporal(figsize=(6, 6)) as fig2:
+        ax2 = fig2.add_subplot(111, polar=True)
+        ax2.set_xticks(angles[:-1])
+        ax2.set_xticklabels(PARAMETROS, color="white")
+        ax2.plot(angles, valores_before, linewidth=2)
+        ax2.fill(angles, valores_before, alpha=0.3)
+        return rasterizar(fig2, dpi=dpi or DPI_PANTALLA, liberar_figura=False)
+
+
+def figura_antes_despues(resultado: Resultado):
+    """Barras de cada contaminante antes y después del filtro recomendado."""
+    df_ba = pd.DataFrame(
+        {
+            "Parámetro": ETIQUETAS,
+            "Antes": list(resultado.antes.values()),
+            "Después": list(resultado.despues.values()),
+        }
+    )
+
+    fig3 = px.bar(
+        df_ba,
+        x="Parámetro",
+        y=["Antes", "Después"],
+        barmode="group",
+        title="Reducción de contaminantes tras el filtrado",
+    )
+    fig3.update_layout(template="plotly_dark", legend_title_text="Estado")
+    return fig3
+
+
+def figura_tds(resultado: Resultado):
+    """Barras de TDS antes y después del filtrado."""
+    df_tds = pd.DataFrame(
+        {"Estado": ["Antes", "Después"], "TDS (mg/L)": [resultado.antes["TDS"], resultado.despues["TDS"]]}
+    )
+    fig_tds = px.bar(
+        df_tds,
+        x="Estado",
+        y="TDS (mg/L)",
+        title="Cambio en TDS tras el filtrado",
+        color="Estado",
+    )
+    fig_tds.update_layout(template="plotly_dark", showlegend=False)
+    return fig_tds
+
+
+def figuras_analisis(resultado: Resultado) -> Dict[str, object]:
+    """Todas las tablas y figuras de las pestañas de análisis."""
+    df = tabla_filtros(resultado)
+    fig_pie, fig_pie2 = figuras_riesgo(resultado)
+    return {
+        "df_filtros": df,
+        "df_display": tabla_filtros_formateada(df),
+        "fig_pie_before": fig_pie,
+        "fig_pie_after": fig_pie2,
+        "fig_filtros": figura_filtros(df),
+        "radar_png": radar_png(resultado),
+        "fig_before_after": figura_antes_despues(resultado),
+        "fig_tds": figura_tds(resultado),
+    }
+
+
+def _mapa_calor(barrido: Barrido, z, titulo: str, **opciones):
+    etiquetas = dict(zip(PARAMETROS, ETIQUETAS))
+    fig = go.Figure(go.Heatmap(x=barrido.x, y=barrido.y, z=z, **opciones))
+    fig.update_layout(
+        template="plotly_dark",
+        title=titulo,
+        xaxis_title=etiquetas[barrido.eje_x],
+        yaxis_title=etiquetas[barrido.eje_y],
+    )
+    return fig
+
+
+def figuras_barrido(barrido: Barrido) -> Dict[str, object]:
+    """
+    Mapas de calor del filtro recomendado, el riesgo residual y el nivel.
+    Los valores van redondeados a un decimal para que la figura pese menos.
+    """
+    filtros = barrido.filtros
+    colores = px.colors.qualitative.Plotly
+    # Escala discreta: un color sólido por índice de filtro
+    escala = []
+    for i in range(len(filtros)):
+        color = colores[i % len(colores)]
+        escala += [(i / len(filtros), color), ((i + 1) / len(filtros), color)]
+
+    return {
+        "fig_filtro": _mapa_calor(
+            barrido,
+            barrido.indice_filtro,
+            "Filtro recomendado",
+            colorscale=escala,
+            zmin=-0.5,
+            zmax=len(filtros) - 0.5,
+            hovertemplate="%{x:.3g}, %{y:.3g}<extra></extra>",
+            colorbar=dict(tickvals=list(range(len(filtros))), ticktext=list(filtros)),
+        ),
+        "fig_riesgo": _mapa_calor(
+            barrido,
+            barrido.riesgo_global_despues.round(1),
+            "Riesgo residual tras el filtrado (%)",
+            colorscale="RdYlGn_r",
+            zmin=0,
+            zmax=100,
+            hovertemplate="%{x:.3g}, %{y:.3g}<br>Riesgo %{z:.1f} %<extra></extra>",
+        ),
+        "fig_nivel": _mapa_calor(
+            barrido,
+            barrido.nivel.round(1),
+            "Nivel de contaminación (%)",
+            colorscale="Viridis",
+            zmin=0,
+            zmax=100,
+            hovertemplate="%{x:.3g}, %{y:.3g}<br>Nivel %{z:.1f} %<extra></extra>",
+        ),
+    }
+
+
+def figura_mapa(celdas: pd.DataFrame, columna: str, titulo: str, centro, zoom: float = 12):
+    """
+    Celdas agregadas sobre el mapa: el color es la media de ``columna`` y
+    el tamaño crece con el número de muestras.
+    """
+    muestras = celdas["Muestras"].to_numpy()
+    fig = go.Figure(go.Scattermapbox(
+        lat=celdas["Latitud"].round(5),
+        lon=celdas["Longitud"].round(5),
+        mode="markers",
+        marker=dict(
+            size=8 + 22 * (muestras / max(1, muestras.max())) ** 0.5,
+            color=celdas[columna].round(1),
+            colorscale="RdYlGn_r",
+            cmin=0,
+            cmax=100,
+            opacity=0.8,
+            colorbar=dict(title="%"),
+        ),
+        customdata=muestras,
+        hovertemplate="%{marker.color:.1f} %<br>%{customdata} muestras<extra></extra>",
+    ))
+    fig.update_layout(
+        template="plotly_dark",
+        title=titulo,
+        mapbox=dict(style="open-street-map", center=dict(lat=centro[0], lon=centro[1]), zoom=zoom),
+        margin=dict(l=0, r=0, t=40, b=0),
+        height=550,
+    )
+    return fig
@@ -0,0 +1,116 @@
+"""
+Gráficas vectoriales para el PDF con ``reportlab.graphics``.
+
+Se dibujan directamente en el canvas a partir de los números del
+``Resultado`` (sin pasar por plotly, matplotlib ni PNG), así el reporte se
+genera más rápido, pesa menos y se ve nítido a cualquier zoom.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+from reportlab.graphics import renderPDF
+from reportlab.graphics.charts.barcharts import VerticalBarChart
+from reportlab.graphics.charts.legends import Legend
+from reportlab.graphics.charts.spider import SpiderChart
+from reportlab.graphics.shapes import Drawing, String
+from reportlab.lib import colors
+
+from .motor import ETIQUETAS, MAXIMOS, PARAMETROS
+
+AZUL = colors.HexColor("#1f77b4")
+NARANJA = colors.HexColor("#ff7f0e")
+
+
+def _titulo(d: Drawing, texto: str) -> None:
+    d.add(String(d.width / 2, d.height - 14, texto, fontName="Helvetica-Bold",
+                 fontSize=11, textAnchor="middle"))
+
+
+def _leyenda(d: Drawing, x: float, y: float, series: List[Tuple[colors.Color, str]]) -> None:
+    leyenda = Legend()
+    leyenda.x, leyenda.y = x, y
+    leyenda.fontSize = 8
+    leyenda.alignment = "right"
+    leyenda.columnMaximum = 1  # en una sola fila
+    leyenda.deltax = 150
+    leyenda.colorNamePairs = series
+    d.add(leyenda)
+
+
+def barras_agrupadas(
+    categorias: Sequence[str],
+    series: List[Tuple[str, Sequence[float]]],
+    titulo: str,
+    ancho: float = 500,
+    alto: float = 250,
+) -> Drawing:
+    """Barras agrupadas (una serie por color) con eje de valores desde 0."""
+    d = Drawing(ancho, alto)
+    _titulo(d, titulo)
+
+    grafica = VerticalBarChart()
+    grafica.x, grafica.y = 45, 55
+    grafica.width, grafica.height = ancho - 70, alto - 105
+    grafica.data = [list(valores) for _, valores in series]
+    grafica.categoryAxis.categoryNames = list(categorias)
+    grafica.categoryAxis.labels.fontSize = 8
+    grafica.categoryAxis.labels.angle = 20
+    grafica.categoryAxis.labels.boxAnchor = "ne"
+    grafica.valueAxis.valueMin = 0
+    grafica.valueAxis.labels.fontSize = 8
+    grafica.barSpacing = 2
+    grafica.groupSpacing = 10
+    paleta = [AZUL, NARANJA]
+    for i in range(len(series)):
+        grafica.bars[i].fillColor = paleta[i % len(paleta)]
+        grafica.bars[i].strokeColor = None
+    d.add(grafica)
+
+    _leyenda(d, 45, alto - 30, [(paleta[i % len(paleta)], n) for i, (n, _) in enumerate(series)])
+    return d
+
+
+def grafica_filtros(tabla_filtros: Sequence[Tuple[str, float, float]]) -> Drawing:
+    """Eficiencia base y purificación estimada por filtro."""
+    return barras_agrupadas(
+        [fila[0] for fila in tabla_filtros],
+        [
+            ("Eficiencia base (%)", [fila[1] for fila in tabla_filtros]),
+            ("Purificación estimada (%)", [fila[2] for fila in tabla_filtros]),
+        ],
+        "Comparativa de filtros utilizados en México",
+    )
+
+
+def grafica_radar(antes: Dict[str, float], ancho: float = 300, alto: float = 220) -> Drawing:
+    """Perfil de contaminación antes del filtrado, normalizado a su máximo."""
+    d = Drawing(ancho, alto)
+    radar = SpiderChart()
+    radar.x, radar.y = 20, 10
+    radar.width, radar.height = ancho - 40, alto - 20
+    radar.data = [[antes[p] / MAXIMOS[p] for p in PARAMETROS]]
+    radar.labels = list(PARAMETROS)
+    radar.strands[0].fillColor = colors.Color(AZUL.red, AZUL.green, AZUL.blue, alpha=0.3)
+    radar.strands[0].strokeColor = AZUL
+    radar.strands[0].strokeWidth = 2
+    radar.strandLabels.fontSize = 0
+    d.add(radar)
+    return d
+
+
+def grafica_antes_despues(antes: Dict[str, float], despues: Dict[str, float]) -> Drawing:
+    """Contaminantes antes y después del filtro recomendado."""
+    return barras_agrupadas(
+        ETIQUETAS,
+        [
+            ("Antes", [antes[p] for p in PARAMETROS]),
+            ("Después", [despues[p] for p in PARAMETROS]),
+        ],
+        "Reducción de contaminantes tras el filtrado",
+        alto=300,
+    )
+
+
+def dibujar(d: Drawing, c, x: float, y: float) -> None:
+    """Dibuja la gráfica en el canvas con su esquina inferior izquierda en (x, y)."""
+    renderPDF.draw(d, c, x, y)
@@ -0,0 +1,352 @@
+"""
+Historial persistente de simulaciones en SQLite.
+
+Las entradas (``Resultado.entrada_historial``) se guardan en un archivo
+local en modo WAL: las escrituras solo agregan filas y las lecturas no
+bloquean a quien escribe. La vista del historial pide páginas con
+paginación por llave (``(orden, n) < cursor``) en lugar de OFFSET, y los
+filtros y el orden se resuelven en SQLite sobre índices, así que una página
+cuesta lo mismo con 10 filas que con 10 millones. Las entradas de un punto
+de muestreo llevan su ``Sitio``, y la tabla ``sitios`` guarda sus totales
+acumulados (ver ``monitoreo``); las que tienen ubicación llevan su colonia y
+coordenadas (ver ``geo``).
+
+Cada hilo (cada sesión de Streamlit) usa su propia conexión.
+"""
+
+import os
+import sqlite3
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .interpretacion import LIMITES_NOM127
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_HISTORIAL = os.path.join(_RAIZ, "historial.sqlite3")
+
+# (campo del historial, columna SQL, tipo)
+CAMPOS: List[Tuple[str, str, str]] = [
+    ("Fecha", "fecha", "TEXT NOT NULL"),
+    ("ID", "muestra_id", "TEXT NOT NULL"),
+    ("Sitio", "sitio", "TEXT"),
+    ("Colonia", "colonia", "TEXT"),
+    ("Latitud", "latitud", "REAL"),
+    ("Longitud", "longitud", "REAL"),
+    ("pH", "ph", "REAL"),
+    ("Turbidez_NTU", "turbidez", "REAL"),
+    ("Coliformes_NMP_100ml", "coliformes", "REAL"),
+    ("Metales_ppm", "metales", "REAL"),
+    ("TDS_mgL", "tds", "REAL"),
+    ("Olor", "olor", "TEXT"),
+    ("Nivel_contaminacion_%", "nivel", "REAL"),
+    ("Filtro_recomendado", "filtro", "TEXT"),
+    ("Purificacion_recomendada_%", "purificacion", "REAL"),
+    ("TDS_filtrado_mgL", "tds_filtrado", "REAL"),
+]
+NOMBRES = [campo for campo, _, _ in CAMPOS]
+_COLUMNAS_SQL = [columna for _, columna, _ in CAMPOS]
+
+# Columnas por las que se puede ordenar (todas con índice)
+ORDENES = {"fecha": "Fecha", "tds": "TDS_mgL", "nivel": "Nivel_contaminacion_%"}
+
+FORMATO_FECHA = "%Y-%m-%d %H:%M:%S"
+
+_TABLA = f"""
+CREATE TABLE IF NOT EXISTS historial (
+    n INTEGER PRIMARY KEY,
+    {", ".join(f"{columna} {tipo}" for _, columna, tipo in CAMPOS)}
+);
+"""
+
+_ESQUEMA = """
+CREATE INDEX IF NOT EXISTS idx_historial_fecha ON historial (fecha);
+CREATE INDEX IF NOT EXISTS idx_historial_tds ON historial (tds);
+CREATE INDEX IF NOT EXISTS idx_historial_nivel ON historial (nivel);
+CREATE INDEX IF NOT EXISTS idx_historial_filtro_fecha ON historial (filtro, fecha);
+CREATE INDEX IF NOT EXISTS idx_historial_filtro_tds ON historial (filtro, tds);
+CREATE INDEX IF NOT EXISTS idx_historial_sitio_fecha ON historial (sitio, fecha);
+"""
+
+# Totales acumulados por sitio, actualizados en la misma transacción que cada
+# entrada: leerlos no requiere recorrer el historial.
+_SITIOS = """
+CREATE TABLE sitios (
+    sitio TEXT PRIMARY KEY,
+    muestras INTEGER NOT NULL,
+    excedencias INTEGER NOT NULL,
+    suma_tds REAL NOT NULL,
+    primera_fecha TEXT NOT NULL,
+    ultima_fecha TEXT NOT NULL
+);
+INSERT INTO sitios
+SELECT sitio, count(*), sum(tds > {limite}), sum(tds), min(fecha), max(fecha)
+FROM historial WHERE sitio IS NOT NULL GROUP BY sitio;
+""".format(limite=LIMITES_NOM127["TDS"])
+
+_SUMAR_SITIO = """
+INSERT INTO sitios (sitio, muestras, excedencias, suma_tds, primera_fecha, ultima_fecha)
+VALUES (?, 1, ?, ?, ?, ?)
+ON CONFLICT (sitio) DO UPDATE SET
+    muestras = muestras + 1,
+    excedencias = excedencias + excluded.excedencias,
+    suma_tds = suma_tds + excluded.suma_tds,
+    primera_fecha = min(primera_fecha, excluded.primera_fecha),
+    ultima_fecha = max(ultima_fecha, excluded.ultima_fecha)
+"""
+
+# Posición de la última fila de una página: (valor de la columna de orden, n)
+Cursor = Tuple[object, int]
+
+
+@dataclass(frozen=True)
+class Consulta:
+    """Filtros y orden de la vista del historial (todos opcionales)."""
+
+    filtro: Optional[str] = None
+    sitio: Optional[str] = None
+    tds_min: Optional[float] = None
+    tds_max: Optional[float] = None
+    fecha_min: Optional[str] = None
+    fecha_max: Optional[str] = None
+    con_ubicacion: bool = False
+    orden: str = "fecha"
+    descendente: bool = True
+
+    def condiciones(self) -> Tuple[List[str], List[object]]:
+        condiciones, parametros = [], []
+        for sql, valor in (
+            ("filtro = ?", self.filtro),
+            ("sitio = ?", self.sitio),
+            ("tds >= ?", self.tds_min),
+            ("tds <= ?", self.tds_max),
+            ("fecha >= ?", self.fecha_min),
+            ("fecha <= ?", self.fecha_max),
+        ):
+            if valor is not None:
+                condiciones.append(sql)
+                parametros.append(valor)
+        if self.con_ubicacion:
+            condiciones.append("latitud IS NOT NULL AND longitud IS NOT NULL")
+        return condiciones, parametros
+
+
+class AlmacenHistorial:
+    """Historial de solo agregar sobre un archivo SQLite en modo WAL."""
+
+    def __init__(self, ruta: str = RUTA_HISTORIAL):
+        self.ruta = ruta
+        self._local = threading.local()
+        with self._conexion() as conexion:
+            conexion.executescript(_TABLA)
+            # Archivos de versiones anteriores: se agregan las columnas nuevas
+            existentes = {fila[1] for fila in conexion.execute("PRAGMA table_info(historial)")}
+            for _, columna, tipo in CAMPOS:
+                if columna not in existentes:
+                    conexion.execute(f"ALTER TABLE historial ADD COLUMN {columna} {tipo}")
+            conexion.executescript(_ESQUEMA)
+            hay_sitios = conexion.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sitios'"
+            ).fetchone()
+            if not hay_sitios:
+                conexion.executescript(_SITIOS)
+
+    def _conexion(self) -> sqlite3.Connection:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=30)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+        return conexion
+
+    # ----- escritura -----
+    def agregar(self, entrada: Dict[str, object]) -> int:
+        """Guarda una entrada del historial y devuelve su número ``n``."""
+        fila = self._fila(entrada)
+        with self._conexion() as conexion:
+            cursor = conexion.execute(self._insertar(), fila)
+            self._sumar_sitio(conexion, fila)
+        return cursor.lastrowid
+
+    def agregar_muchas(self, entradas: Iterable[Dict[str, object]]) -> None:
+        """Guarda varias entradas en una sola transacción."""
+        with self._conexion() as conexion:
+            for fila in map(self._fila, entradas):
+                conexion.execute(self._insertar(), fila)
+                self._sumar_sitio(conexion, fila)
+
+    @staticmethod
+    def _insertar() -> str:
+        marcas = ", ".join("?" for _ in CAMPOS)
+        return f"INSERT INTO historial ({', '.join(_COLUMNAS_SQL)}) VALUES ({marcas})"
+
+    @staticmethod
+    def _fila(entrada: Dict[str, object]) -> Tuple[object, ...]:
+        entrada = dict(entrada)
+        entrada.setdefault("Fecha", datetime.now().strftime(FORMATO_FECHA))
+        return tuple(entrada.get(campo) for campo in NOMBRES)
+
+    @staticmethod
+    def _sumar_sitio(conexion: sqlite3.Connection, fila: Tuple[object, ...]) -> None:
+        entrada = dict(zip(NOMBRES, fila))
+        if entrada["Sitio"] is None:
+            return
+        tds, fecha = entrada["TDS_mgL"], entrada["Fecha"]
+        conexion.execute(_SUMAR_SITIO, (entrada["Sitio"], int(tds > LIMITES_NOM127["TDS"]), tds, fecha, fecha))
+
+    # ----- lectura -----
+    def total(self) -> int:
+        """Número de entradas; como nunca se borran, es el mayor ``n`` (O(log n))."""
+        (total,) = self._conexion().execute("SELECT coalesce(max(n), 0) FROM historial").fetchone()
+        return total
+
+    def pagina(
+        self,
+        consulta: Consulta = Consulta(),
+        limite: int = 50,
+        despues_de: Optional[Cursor] = None,
+    ) -> Tuple[pd.DataFrame, Optional[Cursor]]:
+        """
+        Hasta ``limite`` entradas que cumplen ``consulta``, a partir de
+        ``despues_de`` (None para la primera página). Devuelve la página
+        (índice ``n``) y el cursor de la siguiente, o None si no hay más.
+        """
+        if consulta.orden not in ORDENES:
+            raise ValueError(f"Orden no válido: {consulta.orden}")
+        columna = consulta.orden
+        sentido = "DESC" if consulta.descendente else "ASC"
+
+        condiciones, parametros = consulta.condiciones()
+        if despues_de is not None:
+            condiciones.append(f"({columna}, n) {'<' if consulta.descendente else '>'} (?, ?)")
+            parametros.extend(despues_de)
+        donde = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+
+        filas = self._conexion().execute(
+            f"SELECT n, {', '.join(_COLUMNAS_SQL)} FROM historial {donde} "
+            f"ORDER BY {columna} {sentido}, n {sentido} LIMIT ?",
+            parametros + [limite + 1],
+        ).fetchall()
+
+        hay_mas = len(filas) > limite
+        tabla = self._tabla(filas[:limite])
+        siguiente = None
+        if hay_mas:
+            ultima = tabla.iloc[-1]
+            siguiente = (ultima[ORDENES[columna]], int(tabla.index[-1]))
+        return tabla, siguiente
+
+    def sitios(self) -> pd.DataFrame:
+        """Totales acumulados por sitio (índice ``sitio``)."""
+        return pd.read_sql_query(
+            "SELECT * FROM sitios ORDER BY sitio", self._conexion(), index_col="sitio"
+        )
+
+    def ultimas_del_sitio(self, sitio: str, limite: int) -> List[Tuple[str, float, float, float, float]]:
+        """
+        Las ``limite`` entradas más recientes del sitio como (fecha, turbidez,
+        coliformes, metales, TDS), de la más antigua a la más nueva.
+        """
+        filas = self._conexion().execute(
+            "SELECT fecha, turbidez, coliformes, metales, tds FROM historial "
+            "WHERE sitio = ? ORDER BY fecha DESC, n DESC LIMIT ?",
+            (sitio, limite),
+        ).fetchall()
+        return filas[::-1]
+
+    def entrada(self, n: int) -> Optional[Dict[str, object]]:
+        """Una entrada por su número, con los campos del historial."""
+        fila = self._conexion().execute(
+            f"SELECT {', '.join(_COLUMNAS_SQL)} FROM historial WHERE n = ?", (n,)
+        ).fetchone()
+        return None if fila is None else dict(zip(NOMBRES, fila))
+
+    def bloques(
+        self, tamano: int = 50_000, consulta: Optional[Consulta] = None
+    ) -> Iterator[pd.DataFrame]:
+        """El historial (o lo que cumple ``consulta``) en orden de llegada, por bloques."""
+        condiciones, parametros = (consulta or Consulta()).condiciones()
+        donde = "".join(f"{c} AND " for c in condiciones)
+        ultimo = 0
+        while True:
+            filas = self._conexion().execute(
+                f"SELECT n, {', '.join(_COLUMNAS_SQL)} FROM historial "
+                f"WHERE {donde}n > ? ORDER BY n LIMIT ?",
+                parametros + [ultimo, tamano],
+            ).fetchall()
+            if not filas:
+                return
+            ultimo = filas[-1][0]
+            yield self._tabla(filas)
+
+    @staticmethod
+    def _tabla(filas: List[tuple]) -> pd.DataFrame:
+        tabla = pd.DataFrame.from_records(filas, columns=["n"] + NOMBRES)
+        return tabla.set_index("n")
+
+
+# ----- exportación en flujo -----
+def csv_por_bloques(bloques: Iterable[pd.DataFrame]) -> Iterator[bytes]:
+    """CSV en trozos, uno por bloque (el primero lleva el encabezado)."""
+    primero = True
+    for bloque in bloques:
+        yield bloque.to_csv(index=False, header=primero).encode("utf-8")
+        primero = False
+
+
+class _Trozos:
+    """Destino de pyarrow que junta lo escrito hasta que se recoge."""
+
+    def __init__(self):
+        self.trozos: List[bytes] = []
+        self.closed = False
+
+    def write(self, datos) -> int:
+        self.trozos.append(bytes(datos))
+        return len(datos)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def recoger(self) -> bytes:
+        datos = b"".join(self.trozos)
+        self.trozos.clear()
+        return datos
+
+
+def esquema_parquet():
+    """
+    Esquema Parquet del historial según los tipos de CAMPOS. Se fija de
+    antemano y no con el primer bloque: en él, Sitio o Colonia pueden venir
+    vacíos y pyarrow los tomaría como columnas nulas.
+    """
+    import pyarrow as pa
+
+    tipos = {"TEXT": pa.string(), "REAL": pa.float64()}
+    return pa.schema([(campo, tipos[tipo.split()[0]]) for campo, _, tipo in CAMPOS])
+
+
+def parquet_por_bloques(bloques: Iterable[pd.DataFrame], esquema=None) -> Iterator[bytes]:
+    """
+    Parquet en trozos: un grupo de filas por bloque y el pie al final.
+    Todos los bloques se escriben con ``esquema`` (por defecto, el del
+    historial). Requiere pyarrow.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = esquema if esquema is not None else esquema_parquet()
+    destino = _Trozos()
+    escritor = pq.ParquetWriter(destino, esquema)
+    for bloque in bloques:
+        escritor.write_table(pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False))
+        yield destino.recoger()
+    escritor.close()
+    yield destino.recoger()
@@ -0,0 +1,127 @@
+"""
+Incertidumbre de la evaluación por Monte Carlo.
+
+Cada sorteo perturba las mediciones con su error relativo (lognormal: un
+valor medido nunca sale negativo) y la eficiencia del filtro elegido con
+una distribución Beta centrada en la del catálogo; luego repite la
+evaluación de ``lote`` sobre todos los sorteos a la vez. Con 100 000
+sorteos tarda una fracción de segundo, así que puede correr en cada
+interacción. Con la misma semilla los resultados son idénticos.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from .interpretacion import LIMITES_NOM127, RIESGO_ACEPTABLE
+from .lote import EFICIENCIA_BASE, MATRIZ_EFICIENCIAS, NOMBRES_FILTROS, VECTOR_MAXIMOS, evaluar_lote
+from .modelo import vector_muestra
+from .motor import PARAMETROS, Muestra
+
+SORTEOS = 100_000
+
+# Error relativo de medición (desviación estándar del logaritmo) por contaminante
+ERRORES_MEDICION: Dict[str, float] = {
+    "Turbidez": 0.10,
+    "Coliformes": 0.30,  # el NMP es un método de baja precisión
+    "Metales": 0.15,
+    "TDS": 0.05,
+}
+
+# Concentración de la Beta de las eficiencias: a mayor valor, menor dispersión
+# (con 50, una eficiencia de 0.70 tiene desviación estándar de ~0.06)
+CONCENTRACION_EFICIENCIA = 50.0
+
+# Percentiles del intervalo de confianza del 95 %
+PERCENTILES = (2.5, 50.0, 97.5)
+
+# (percentil 2.5, mediana, percentil 97.5)
+Intervalo = Tuple[float, float, float]
+
+
+@dataclass
+class Incertidumbre:
+    """Resumen de los sorteos de una muestra."""
+
+    sorteos: int
+    nivel: Intervalo
+    purificacion: Intervalo
+    despues: Dict[str, Intervalo]
+    riesgo_despues: Dict[str, Intervalo]
+    riesgo_global_despues: Intervalo
+    # Fracción de los sorteos en que se elige cada filtro (de mayor a menor)
+    filtros: Dict[str, float]
+    # Fracción de los sorteos con riesgo residual aceptable
+    prob_aceptable: float
+    # Fracción de los sorteos que cumple el límite de la NOM-127 por contaminante
+    prob_nom127: Dict[str, float]
+
+
+def _intervalo(valores: np.ndarray) -> Intervalo:
+    return tuple(float(v) for v in np.percentile(valores, PERCENTILES))
+
+
+def _intervalos(valores: np.ndarray) -> Dict[str, Intervalo]:
+    """Intervalo de cada columna (N × 4) en el orden de PARAMETROS."""
+    cortes = np.percentile(valores, PERCENTILES, axis=0)
+    return {p: tuple(float(v) for v in cortes[:, j]) for j, p in enumerate(PARAMETROS)}
+
+
+def _beta(rng: np.random.Generator, media: np.ndarray, concentracion: float) -> np.ndarray:
+    """Eficiencias ~ Beta con la media dada; 0 y 1 se quedan fijos."""
+    interior = (media > 0) & (media < 1)
+    m = np.clip(media, 1e-6, 1 - 1e-6)
+    sorteo = rng.beta(m * concentracion, (1 - m) * concentracion)
+    return np.where(interior, sorteo, media)
+
+
+def monte_carlo(
+    muestra: Muestra,
+    modelo=None,
+    sorteos: int = SORTEOS,
+    semilla: Optional[int] = None,
+    errores: Dict[str, float] = ERRORES_MEDICION,
+    concentracion: float = CONCENTRACION_EFICIENCIA,
+) -> Incertidumbre:
+    """
+    Intervalos de confianza del 95 % de la evaluación de ``muestra`` (los
+    mismos cálculos que ``evaluar``, con ``modelo`` eligiendo el filtro en
+    cada sorteo si se pasa).
+    """
+    rng = np.random.default_rng(semilla)
+
+    # Mediciones perturbadas (sorteos × 5); el olor no tiene error
+    medida = np.array(vector_muestra(muestra), dtype=float)
+    sigma = np.array([errores[p] for p in PARAMETROS])
+    x = np.empty((sorteos, 5))
+    x[:, :4] = medida[:4] * rng.lognormal(0.0, sigma, size=(sorteos, 4))
+    x[:, 4] = medida[4]
+
+    lote = evaluar_lote(x, modelo)
+    indice = lote.indice_filtro
+
+    # Eficiencias del filtro elegido en cada sorteo
+    eficiencias = _beta(rng, MATRIZ_EFICIENCIAS[indice], concentracion)
+    base = _beta(rng, EFICIENCIA_BASE[indice], concentracion)
+
+    despues = lote.antes * (1 - eficiencias)
+    riesgo_despues = np.minimum(100, despues / VECTOR_MAXIMOS * 100)
+    riesgo_global = riesgo_despues.sum(axis=1) / 4
+    purificacion = base * (100 - lote.nivel)
+
+    conteo = np.bincount(indice, minlength=len(NOMBRES_FILTROS)) / sorteos
+    orden = np.argsort(-conteo, kind="stable")
+    limites = np.array([LIMITES_NOM127[p] for p in PARAMETROS])
+
+    return Incertidumbre(
+        sorteos=sorteos,
+        nivel=_intervalo(lote.nivel),
+        purificacion=_intervalo(purificacion),
+        despues=_intervalos(despues),
+        riesgo_despues=_intervalos(riesgo_despues),
+        riesgo_global_despues=_intervalo(riesgo_global),
+        filtros={str(NOMBRES_FILTROS[i]): float(conteo[i]) for i in orden if conteo[i] > 0},
+        prob_aceptable=float((riesgo_global <= RIESGO_ACEPTABLE).mean()),
+        prob_nom127=dict(zip(PARAMETROS, (despues <= limites).mean(axis=0).tolist())),
+    )
@@ -0,0 +1,228 @@
+"""
+Reglas de interpretación de resultados.
+
+Todos los umbrales y textos están aquí, como datos: una ``Escala`` por
+contaminante (análisis experto y perfil del radar), la clasificación de TDS
+según la NOM-127, la conclusión según el riesgo residual y la recomendación
+según el contaminante dominante. ``interpretar_lote`` las evalúa para
+muchas muestras a la vez (el servicio HTTP) e ``interpretar`` es el mismo
+cálculo para una sola, así que la app, el PDF, el reporte de campaña y el
+servicio leen el mismo resultado.
+"""
+
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from typing import Dict, Tuple
+
+import numpy as np
+
+INFINITO = float("inf")
+
+
+@dataclass(frozen=True)
+class Tramo:
+    """Un intervalo de una escala: hasta dónde llega y qué se dice en él."""
+
+    hasta: float
+    nivel: str  # "success", "info", "warning" o "error" (como los avisos de Streamlit)
+    texto: str
+    breve: str = ""
+    detalle: str = ""
+
+
+@dataclass(frozen=True)
+class Escala:
+    """Tramos con límites superiores crecientes; el último llega a infinito."""
+
+    tramos: Tuple[Tramo, ...]
+    # True: el valor igual al límite cae en el tramo (valor <= hasta)
+    inclusiva: bool = False
+    _limites: np.ndarray = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "_limites", np.array(self.limites, dtype=float))
+
+    @property
+    def limites(self) -> Tuple[float, ...]:
+        return tuple(t.hasta for t in self.tramos[:-1])
+
+    def indice(self, valor: float) -> int:
+        buscar = bisect_left if self.inclusiva else bisect_right
+        return buscar(self.limites, valor)
+
+    def tramo(self, valor: float) -> Tramo:
+        return self.tramos[self.indice(valor)]
+
+    def indices(self, valores) -> np.ndarray:
+        """Índice de tramo de muchos valores a la vez."""
+        lado = "left" if self.inclusiva else "right"
+        return self._limites.searchsorted(np.asarray(valores, dtype=float), side=lado)
+
+
+# ----- contaminantes (valor < límite) -----
+ESCALAS_PARAMETROS: Dict[str, Escala] = {
+    "Turbidez": Escala((
+        Tramo(1, "success",
+              "La turbidez es excelente. El agua está visualmente limpia y permite una desinfección UV altamente eficiente.",
+              "La turbidez es muy baja. El agua está visualmente clara."),
+        Tramo(5, "info",
+              "La turbidez es aceptable, pero puede interferir ligeramente con la desinfección UV si aumenta.",
+              "La turbidez es moderada y podría afectar ligeramente la desinfección UV."),
+        Tramo(INFINITO, "error",
+              "La turbidez es alta. Refleja presencia de partículas suspendidas, arcillas o microorganismos. Se recomienda prefiltración inmediata.",
+              "Alta turbidez. Refleja partículas, sedimentos o microorganismos."),
+    )),
+    "Coliformes": Escala((
+        Tramo(1, "success",
+              "No hay coliformes fecales. El agua no presenta contaminación biológica detectable.",
+              "No se detectan coliformes fecales."),
+        Tramo(200, "warning",
+              "Hay baja presencia de coliformes fecales. Requiere desinfección UV para garantizar potabilidad.",
+              "Hay presencia leve de coliformes. Se recomienda desinfección UV."),
+        Tramo(INFINITO, "error",
+              "Alto nivel de coliformes. El agua NO es apta para consumo sin un tratamiento intensivo (UV obligatorio).",
+              "Coliformes muy altos. El agua NO es potable sin tratamiento intensivo."),
+    )),
+    "Metales": Escala((
+        Tramo(0.01, "success",
+              "Metales pesados dentro de los límites recomendados por la NOM-127.",
+              "Metales pesados dentro de límites seguros según NOM-127."),
+        Tramo(0.05, "warning",
+              "Metales moderados. Es recomendable nanofiltración o adsorción nanotecnológica.",
+              "Metales moderados. Sugiere riesgo bajo pero requiere monitoreo."),
+        Tramo(INFINITO, "error",
+              "Metales pesados elevados. El agua puede contener arsénico, plomo u otros contaminantes peligrosos.",
+              "Metales peligrosamente elevados. Podría incluir plomo o arsénico."),
+    )),
+    "TDS": Escala((
+        Tramo(300, "success",
+              "Excelente calidad mineral del agua (TDS bajo).",
+              "TDS muy bajo. Agua con excelente calidad mineral."),
+        Tramo(600, "info",
+              "Buena calidad del agua. Puede tener sabores minerales leves.",
+              "TDS moderado. Sabor mineral aceptable."),
+        Tramo(900, "warning",
+              "TDS alto. El agua puede tener sabor salado o amargo. No es ideal para consumo frecuente.",
+              "TDS elevado. Sabor salado o amargo probable."),
+        Tramo(INFINITO, "error",
+              "TDS muy alto. El agua NO es apta para consumo humano directo.",
+              "TDS extremadamente alto. Agua NO apta para consumo."),
+    )),
+}
+
+# ----- límites permisibles de la NOM-127-SSA1 (valor <= límite) -----
+LIMITES_NOM127: Dict[str, float] = {
+    "Turbidez": 4,  # UNT
+    "Coliformes": 1,  # no detectable
+    "Metales": 0.01,  # plomo / arsénico
+    "TDS": 500,  # valor recomendado
+}
+
+# ----- TDS frente a la NOM-127 (valor <= límite) -----
+TDS_NOM127 = Escala((
+    Tramo(LIMITES_NOM127["TDS"], "success", "Dentro de los valores recomendados por la NOM-127 (≤ 500 mg/L)."),
+    Tramo(900, "warning",
+          "Supera el valor recomendado (alta mineralización). Puede haber sabor salado/amargo y sedimentos."),
+    Tramo(INFINITO, "error", "Muy elevado (> 900 mg/L). No es recomendable para consumo directo."),
+), inclusiva=True)
+
+# ----- conclusión según el riesgo global tras el filtrado (valor <= límite) -----
+CONCLUSIONES = Escala((
+    Tramo(10, "success", "El agua presenta excelente calidad tras el proceso de filtrado.",
+          detalle="Puede considerarse apta para consumo humano directo siempre que se mantenga "
+                  "un mantenimiento adecuado en el sistema de filtración."),
+    Tramo(25, "info", "El agua alcanza un nivel aceptable después del filtrado.",
+          detalle="Es adecuada para la mayoría de usos domésticos, aunque se recomienda "
+                  "monitorear su calidad periódicamente."),
+    Tramo(45, "warning", "El agua sigue teniendo un riesgo moderado.",
+          detalle="Aunque la filtración mejoró notablemente la calidad, se recomienda un proceso "
+                  "adicional como carbón activado + UV o añadir ósmosis inversa."),
+    Tramo(INFINITO, "error", "El agua continúa siendo de riesgo elevado incluso después del filtrado.",
+          detalle="No es recomendable para consumo humano. Se requiere tratamiento avanzado "
+                  "(ósmosis inversa, nanofiltración o un sistema industrial)."),
+), inclusiva=True)
+
+# Riesgo residual máximo con el que el agua se considera aceptable
+RIESGO_ACEPTABLE = CONCLUSIONES.tramos[1].hasta
+
+# ----- recomendación según el contaminante con mayor riesgo residual -----
+RECOMENDACIONES: Dict[str, str] = {
+    "TDS": "Se necesita un sistema que reduzca sales disueltas: ósmosis inversa o intercambio iónico.",
+    "Metales": "Adsorción nanotecnológica (TiO2, grafeno, carbón activado modificado) o nanofiltración, "
+               "para remover arsénico, plomo o aluminio.",
+    "Coliformes": "Desinfección UV o luz UVC con posfiltrado; los microorganismos siguen siendo el mayor riesgo.",
+    "Turbidez": "Prefiltrado con zeolita o fibra sintética; la turbidez indica sedimentos y sólidos suspendidos.",
+}
+SIN_RECOMENDACION = "Sin recomendación específica."
+
+
+# Orden de las columnas en las matrices de ``interpretar_lote`` (el de ``motor.PARAMETROS``)
+CONTAMINANTES: Tuple[str, ...] = tuple(ESCALAS_PARAMETROS)
+
+
+def indice_dominante(riesgo) -> np.ndarray:
+    """Columna con mayor riesgo normalizado de cada fila; ante empate, la primera."""
+    return np.argmax(np.asarray(riesgo, dtype=float), axis=-1)
+
+
+@dataclass(frozen=True)
+class Interpretacion:
+    """Todas las lecturas de una muestra, calculadas una sola vez."""
+
+    parametros: Dict[str, Tramo]  # por contaminante, con los valores antes del filtrado
+    tds_nom127: Tramo
+    conclusion: Tramo
+    dominante: str  # contaminante con mayor riesgo tras el filtrado
+    recomendacion: str
+
+
+@dataclass(frozen=True)
+class InterpretacionLote:
+    """Índice de tramo de cada regla para N muestras."""
+
+    parametros: np.ndarray  # N × 4, columnas en el orden de CONTAMINANTES
+    tds_nom127: np.ndarray
+    conclusion: np.ndarray
+    dominante: np.ndarray  # columna de CONTAMINANTES
+
+    def __len__(self) -> int:
+        return len(self.conclusion)
+
+    def muestra(self, i: int) -> Interpretacion:
+        """La ``Interpretacion`` de la fila ``i``."""
+        dominante = CONTAMINANTES[self.dominante[i]]
+        return Interpretacion(
+            parametros={
+                p: ESCALAS_PARAMETROS[p].tramos[j] for p, j in zip(CONTAMINANTES, self.parametros[i].tolist())
+            },
+            tds_nom127=TDS_NOM127.tramos[self.tds_nom127[i]],
+            conclusion=CONCLUSIONES.tramos[self.conclusion[i]],
+            dominante=dominante,
+            recomendacion=RECOMENDACIONES.get(dominante, SIN_RECOMENDACION),
+        )
+
+
+def interpretar_lote(antes, riesgo_despues, riesgo_global_despues) -> InterpretacionLote:
+    """Evalúa todas las reglas para N muestras (``antes`` y ``riesgo_despues`` son N × 4)."""
+    antes = np.asarray(antes, dtype=float)
+    parametros = np.empty(antes.shape, dtype=np.intp)
+    for j, p in enumerate(CONTAMINANTES):
+        parametros[:, j] = ESCALAS_PARAMETROS[p].indices(antes[:, j])
+    return InterpretacionLote(
+        parametros=parametros,
+        tds_nom127=TDS_NOM127.indices(antes[:, CONTAMINANTES.index("TDS")]),
+        conclusion=CONCLUSIONES.indices(riesgo_global_despues),
+        dominante=indice_dominante(riesgo_despues),
+    )
+
+
+def interpretar(
+    antes: Dict[str, float], riesgo_despues: Dict[str, float], riesgo_global_despues: float
+) -> Interpretacion:
+    """Evalúa todas las reglas para una muestra (el mismo cálculo que ``interpretar_lote``)."""
+    lote = interpretar_lote(
+        [[antes[p] for p in CONTAMINANTES]],
+        [[riesgo_despues[p] for p in CONTAMINANTES]],
+        [riesgo_global_despues],
+    )
+    return lote.muestra(0)
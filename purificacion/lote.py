@@ -0,0 +1,109 @@
+"""
+Evaluación vectorizada de muchas muestras a la vez.
+
+Reproduce los mismos cálculos que ``motor.evaluar`` pero con operaciones de
+NumPy sobre una matriz N×5 (turbidez, coliformes, metales, tds, olor), para
+procesar miles de lecturas de campo en una sola pasada.
+"""
+
+from dataclasses import dataclass
+from typing import Dict
+
+import numpy as np
+
+from .modelo import validar_clases
+from .motor import CATALOGO, MAXIMOS, PARAMETROS
+
+# Orden de columnas esperado en la matriz de entrada
+COLUMNAS = ["turbidez", "coliformes", "metales", "tds", "olor"]
+
+NOMBRES_FILTROS = CATALOGO.nombres
+# Eficiencia base de cada filtro (F,)
+EFICIENCIA_BASE = CATALOGO.eficiencia_base
+# Eficiencia por contaminante (F × 4)
+MATRIZ_EFICIENCIAS = CATALOGO.matriz
+# Máximo de referencia de cada contaminante (4,)
+VECTOR_MAXIMOS = np.array([MAXIMOS[p] for p in PARAMETROS], dtype=float)
+# Pesos del índice global: (x / máximo) / 4, con TDS normalizado a 1000 mg/L
+PESOS_INDICE = 1.0 / (4.0 * VECTOR_MAXIMOS)
+
+
+@dataclass
+class ResultadoLote:
+    """Resultado columnar de ``evaluar_lote``; cada campo tiene N filas."""
+
+    nivel: np.ndarray  # (N,)
+    purificacion: np.ndarray  # (N, F), una columna por filtro
+    indice_filtro: np.ndarray  # (N,) índice en NOMBRES_FILTROS
+    purificacion_recomendada: np.ndarray  # (N,)
+    antes: np.ndarray  # (N, 4) en el orden de PARAMETROS
+    despues: np.ndarray  # (N, 4)
+    riesgo_antes: np.ndarray  # (N, 4)
+    riesgo_despues: np.ndarray  # (N, 4)
+    riesgo_global_antes: np.ndarray  # (N,)
+    riesgo_global_despues: np.ndarray  # (N,)
+
+    def __len__(self) -> int:
+        return len(self.nivel)
+
+    @property
+    def filtro_recomendado(self) -> np.ndarray:
+        """Nombre del filtro recomendado por muestra."""
+        return NOMBRES_FILTROS[self.indice_filtro]
+
+    def columnas(self) -> Dict[str, np.ndarray]:
+        """Campos del historial como columnas (mismo redondeo que la app)."""
+        return {
+            "Nivel_contaminacion_%": self.nivel,
+            "Filtro_recomendado": self.filtro_recomendado,
+            "Purificacion_recomendada_%": np.round(self.purificacion_recomendada, 1),
+            "TDS_filtrado_mgL": np.round(self.despues[:, 3], 2),
+        }
+
+
+def evaluar_lote(datos, modelo=None) -> ResultadoLote:
+    """
+    Evalúa una matriz N×5 (turbidez, coliformes, metales, tds, olor).
+
+    Da los mismos números que ``motor.evaluar`` muestra por muestra. La
+    columna de olor no interviene en el índice; solo la usa ``modelo`` si se
+    pasa uno para elegir el filtro recomendado.
+    """
+    x = np.asarray(datos, dtype=float)
+    # Sin modelo basta N×4; el modelo también usa la columna de olor
+    if x.ndim != 2 or x.shape[1] < 4 or (modelo is not None and x.shape[1] < 5):
+        raise ValueError("Se esperaba una matriz N×5 (turbidez, coliformes, metales, tds, olor)")
+    antes = x[:, :4]
+
+    # Índice global de contaminación
+    nivel = np.clip((antes @ PESOS_INDICE) * 100, 0.0, 100.0)
+
+    # Purificación estimada de todos los filtros: eficiencia * (100 - nivel)
+    purificacion = (100 - nivel)[:, None] * EFICIENCIA_BASE[None, :]
+    if modelo is not None:
+        # Las clases del modelo van en orden alfabético; las pasamos al orden del catálogo
+        validar_clases(modelo, CATALOGO)
+        posicion = np.array([CATALOGO.posicion_de[c] for c in modelo.clases])
+        indice = posicion[modelo.predecir_indices(x)]
+    else:
+        indice = np.argmax(purificacion, axis=1)  # ante empate gana el primero
+    filas = np.arange(len(x))
+
+    # Valores tras el filtro recomendado
+    despues = antes * (1 - MATRIZ_EFICIENCIAS[indice])
+
+    riesgo_antes = np.minimum(100, antes / VECTOR_MAXIMOS * 100)
+    riesgo_despues = np.minimum(100, despues / VECTOR_MAXIMOS * 100)
+
+    return ResultadoLote(
+        nivel=nivel,
+        purificacion=purificacion,
+        indice_filtro=indice,
+        purificacion_recomendada=purificacion[filas, indice],
+        antes=antes,
+        despues=despues,
+        riesgo_antes=riesgo_antes,
+        riesgo_despues=riesgo_despues,
+        riesgo_global_antes=riesgo_antes.sum(axis=1) / 4,
+        riesgo_global_despues=riesgo_despues.sum(axis=1) / 4,
+    )
@@ -0,0 +1,237 @@
+"""
+Modelo de recomendación de filtro entrenado con
+``dataset_filtros_entrenamiento.csv``.
+
+Es un árbol de decisión (CART con índice de Gini) implementado solo con
+NumPy. Se entrena una vez, se guarda como ``modelo_filtros.npz`` junto al
+dataset y se mantiene en memoria del proceso, así que cada predicción cuesta
+unos microsegundos y la app no reentrena en cada rerun.
+"""
+
+import os
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional
+
+import numpy as np
+
+from .catalogo import Catalogo
+from .motor import CATALOGO, Muestra
+
+CARACTERISTICAS = ["turbidez", "coliformes", "metales", "tds", "olor"]
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_DATASET = os.path.join(_RAIZ, "dataset_filtros_entrenamiento.csv")
+RUTA_MODELO = os.path.join(_RAIZ, "modelo_filtros.npz")
+
+PROFUNDIDAD_MAXIMA = 8
+MIN_MUESTRAS_HOJA = 3
+
+
+@dataclass
+class ModeloFiltros:
+    """Árbol de decisión guardado como arreglos planos (un elemento por nodo)."""
+
+    clases: np.ndarray  # nombres de filtro
+    caracteristica: np.ndarray  # -1 en las hojas
+    umbral: np.ndarray
+    izquierda: np.ndarray
+    derecha: np.ndarray
+    clase: np.ndarray  # clase mayoritaria del nodo
+
+    def predecir(self, muestra: Muestra) -> str:
+        """Filtro recomendado para una sola muestra."""
+        x = vector_muestra(muestra)
+        nodo = 0
+        caracteristica = self.caracteristica
+        while caracteristica[nodo] >= 0:
+            if x[caracteristica[nodo]] <= self.umbral[nodo]:
+                nodo = self.izquierda[nodo]
+            else:
+                nodo = self.derecha[nodo]
+        return str(self.clases[self.clase[nodo]])
+
+    def predecir_indices(self, datos) -> np.ndarray:
+        """Índice de clase para una matriz N×5, recorriendo el árbol por niveles."""
+        x = np.asarray(datos, dtype=float)
+        nodos = np.zeros(len(x), dtype=np.int64)
+        filas = np.arange(len(x))
+        while True:
+            c = self.caracteristica[nodos]
+            activos = c >= 0
+            if not activos.any():
+                break
+            f, n = filas[activos], nodos[activos]
+            va_izquierda = x[f, c[activos]] <= self.umbral[n]
+            nodos[f] = np.where(va_izquierda, self.izquierda[n], self.derecha[n])
+        return self.clase[nodos]
+
+    def predecir_lote(self, datos) -> np.ndarray:
+        """Nombre del filtro recomendado para cada fila de una matriz N×5."""
+        return self.clases[self.predecir_indices(datos)]
+
+    def guardar(self, ruta: str) -> None:
+        """
+        Escribe el artefacto en un temporal del mismo directorio y lo renombra:
+        otro proceso que lo lea al mismo tiempo ve el archivo anterior o el
+        nuevo completo, nunca un zip a medias.
+        """
+        descriptor, temporal = tempfile.mkstemp(
+            prefix=".modelo_", suffix=".npz", dir=os.path.dirname(os.path.abspath(ruta))
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as f:
+                np.savez(
+                    f,
+                    clases=self.clases,
+                    caracteristica=self.caracteristica,
+                    umbral=self.umbral,
+                    izquierda=self.izquierda,
+                    derecha=self.derecha,
+                    clase=self.clase,
+                )
+            # mkstemp lo crea con 0600; otros usuarios y servicios deben poder leerlo
+            os.chmod(temporal, 0o644)
+            os.replace(temporal, ruta)
+        except BaseException:
+            os.remove(temporal)
+            raise
+
+    @classmethod
+    def leer(cls, ruta: str) -> "ModeloFiltros":
+        with np.load(ruta, allow_pickle=False) as datos:
+            return cls(**{k: datos[k] for k in datos.files})
+
+
+def vector_muestra(muestra: Muestra) -> list:
+    """Características de una muestra en el orden de CARACTERISTICAS."""
+    olor = 1.0 if muestra.olor in ("Sí", "Si", 1, True) else 0.0
+    return [muestra.turbidez, muestra.coliformes, muestra.metales, muestra.tds, olor]
+
+
+def _mejor_division(x, y, n_clases, min_hoja):
+    """Busca la división (característica, umbral) con menor Gini ponderado."""
+    n = len(y)
+    mejor = (None, None, np.inf)
+    for j in range(x.shape[1]):
+        orden = np.argsort(x[:, j], kind="stable")
+        xs = x[orden, j]
+        conteos = np.zeros((n, n_clases))
+        conteos[np.arange(n), y[orden]] = 1
+        izq = np.cumsum(conteos, axis=0)[:-1]  # clases a la izquierda de cada corte
+        der = izq[-1] + conteos[-1] - izq
+        n_izq = np.arange(1, n)
+        n_der = n - n_izq
+
+        gini_izq = 1 - ((izq / n_izq[:, None]) ** 2).sum(axis=1)
+        gini_der = 1 - ((der / n_der[:, None]) ** 2).sum(axis=1)
+        costo = (n_izq * gini_izq + n_der * gini_der) / n
+
+        # Solo cortes entre valores distintos y con hojas suficientemente grandes
+        validos = (xs[:-1] < xs[1:]) & (n_izq >= min_hoja) & (n_der >= min_hoja)
+        if not validos.any():
+            continue
+        costo = np.where(validos, costo, np.inf)
+        i = int(np.argmin(costo))
+        if costo[i] < mejor[2]:
+            mejor = (j, (xs[i] + xs[i + 1]) / 2, costo[i])
+    return mejor
+
+
+def entrenar(
+    x,
+    etiquetas,
+    profundidad_maxima: int = PROFUNDIDAD_MAXIMA,
+    min_muestras_hoja: int = MIN_MUESTRAS_HOJA,
+) -> ModeloFiltros:
+    """Entrena el árbol de decisión sobre una matriz N×5 y sus etiquetas."""
+    x = np.asarray(x, dtype=float)
+    clases, y = np.unique(np.asarray(etiquetas), return_inverse=True)
+    n_clases = len(clases)
+
+    caracteristica, umbral, izquierda, derecha, clase = [], [], [], [], []
+
+    def nuevo_nodo(indices):
+        caracteristica.append(-1)
+        umbral.append(0.0)
+        izquierda.append(-1)
+        derecha.append(-1)
+        clase.append(int(np.bincount(y[indices], minlength=n_clases).argmax()))
+        return len(clase) - 1
+
+    pendientes = [(nuevo_nodo(np.arange(len(y))), np.arange(len(y)), 0)]
+    while pendientes:
+        nodo, indices, profundidad = pendientes.pop()
+        if profundidad >= profundidad_maxima or len(np.unique(y[indices])) == 1:
+            continue
+        j, corte, _ = _mejor_division(x[indices], y[indices], n_clases, min_muestras_hoja)
+        if j is None:
+            continue
+        va_izquierda = x[indices, j] <= corte
+        caracteristica[nodo] = j
+        umbral[nodo] = corte
+        for lado, sub in ((izquierda, indices[va_izquierda]), (derecha, indices[~va_izquierda])):
+            hijo = nuevo_nodo(sub)
+            lado[nodo] = hijo
+            pendientes.append((hijo, sub, profundidad + 1))
+
+    return ModeloFiltros(
+        clases=clases.astype(str),
+        caracteristica=np.array(caracteristica, dtype=np.int64),
+        umbral=np.array(umbral, dtype=float),
+        izquierda=np.array(izquierda, dtype=np.int64),
+        derecha=np.array(derecha, dtype=np.int64),
+        clase=np.array(clase, dtype=np.int64),
+    )
+
+
+def entrenar_desde_csv(ruta: str = RUTA_DATASET) -> ModeloFiltros:
+    """Entrena el modelo con el dataset etiquetado (columna ``filtro``)."""
+    import pandas as pd
+
+    datos = pd.read_csv(ruta)
+    return entrenar(datos[CARACTERISTICAS].to_numpy(dtype=float), datos["filtro"].to_numpy())
+
+
+def clases_fuera_del_catalogo(modelo: ModeloFiltros, catalogo: Catalogo = CATALOGO) -> List[str]:
+    """Filtros que el modelo puede recomendar y que no están en la comparativa del catálogo."""
+    return [str(c) for c in modelo.clases if c not in catalogo.posicion_de]
+
+
+def validar_clases(modelo: ModeloFiltros, catalogo: Catalogo = CATALOGO) -> None:
+    """Falla con un mensaje claro si el modelo recomienda filtros que el catálogo ya no tiene."""
+    faltan = clases_fuera_del_catalogo(modelo, catalogo)
+    if faltan:
+        raise ValueError(
+            f"El modelo de recomendación puede elegir filtros que no están en el catálogo "
+            f"(o no tienen eficiencia_base): {', '.join(faltan)}. Agrégalos a catalogo_filtros.json "
+            f"o reetiqueta {os.path.basename(RUTA_DATASET)} con los filtros del catálogo."
+        )
+
+
+@lru_cache(maxsize=None)
+def cargar_modelo(
+    ruta_dataset: str = RUTA_DATASET, ruta_modelo: Optional[str] = RUTA_MODELO
+) -> ModeloFiltros:
+    """
+    Devuelve el modelo del proceso. Lee el artefacto si existe, es más
+    reciente que el dataset y sus clases están en el catálogo; si no,
+    entrena y lo guarda. Si el modelo entrenado recomienda filtros que el
+    catálogo no tiene, falla con ``ValueError``.
+    """
+    if ruta_modelo and os.path.exists(ruta_modelo):
+        if os.path.getmtime(ruta_modelo) >= os.path.getmtime(ruta_dataset):
+            modelo = ModeloFiltros.leer(ruta_modelo)
+            if not clases_fuera_del_catalogo(modelo):
+                return modelo
+
+    modelo = entrenar_desde_csv(ruta_dataset)
+    validar_clases(modelo)
+    if ruta_modelo:
+        try:
+            modelo.guardar(ruta_modelo)
+        except OSError:
+            # Sin permisos de escritura: nos quedamos con la copia en memoria
+            pass
+    return modelo
@@ -0,0 +1,207 @@
+"""
+Monitoreo de puntos de muestreo (sitios) a lo largo del tiempo.
+
+Cada sitio lleva agregados incrementales de TDS sobre las últimas
+``VENTANA`` muestras: media, excedencias del límite de la NOM-127 y
+tendencia (pendiente de mínimos cuadrados en mg/L por día). Se mantienen
+con sumas acumuladas que se actualizan al entrar y salir cada muestra de la
+ventana, así que registrar una muestra cuesta O(1) y el tablero lee los
+agregados sin recorrer el historial. Los totales de toda la vida del sitio
+vienen de la tabla ``sitios`` del almacén.
+
+Cada muestra pasa además por los detectores de ``anomalias``: el de su
+sitio (saltos y derivas) y los que la comparan con el dataset de
+entrenamiento; ``MonitorSitios.agregar`` devuelve los avisos.
+
+Al arrancar, cada ventana (y cada detector) se llena con las últimas
+entradas del sitio (consulta por índice, no un recorrido del historial).
+"""
+
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .anomalias import (
+    CAMPOS_CONTAMINANTES,
+    MEMORIA_DERIVA,
+    Alerta,
+    DerivaEntrada,
+    DetectorSitio,
+    cargar_distribucion,
+    valores_entrada,
+)
+from .historial import FORMATO_FECHA, AlmacenHistorial, Consulta
+from .interpretacion import LIMITES_NOM127
+from .motor import PARAMETROS
+
+VENTANA = 30  # muestras por sitio
+LIMITE_TDS = LIMITES_NOM127["TDS"]
+
+SEGUNDOS_POR_DIA = 86_400
+
+
+class AgregadoSitio:
+    """Agregados de TDS de un sitio sobre una ventana móvil de muestras."""
+
+    def __init__(self, sitio: str, ventana: int = VENTANA):
+        self.sitio = sitio
+        self.ventana = ventana
+        # (días desde la primera muestra, TDS)
+        self.valores: Deque[Tuple[float, float]] = deque()
+        self.fechas: Deque[str] = deque()
+        self._origen: Optional[datetime] = None
+        self._suma = self._suma_t = self._suma_tt = self._suma_ty = 0.0
+        self.excedencias = 0
+        # Totales de toda la vida del sitio
+        self.muestras_total = 0
+        self.excedencias_total = 0
+        self.suma_total = 0.0
+        self.detector = DetectorSitio()
+        self.ultima_anomalia: Optional[str] = None
+
+    def agregar(self, fecha: str, valores, contar_total: bool = True) -> List[Alerta]:
+        """
+        Incorpora una muestra (contaminantes en el orden de PARAMETROS), saca
+        la más antigua si la ventana está llena y devuelve los avisos del
+        detector del sitio.
+        """
+        alertas = self.detector.observar(valores, self.sitio)
+        if alertas:
+            self.ultima_anomalia = f"{fecha} · " + "; ".join(f"{a.tipo} de {a.parametro}" for a in alertas)
+
+        tds = float(valores[3])
+        momento = datetime.strptime(fecha, FORMATO_FECHA)
+        if self._origen is None:
+            self._origen = momento
+        t = (momento - self._origen).total_seconds() / SEGUNDOS_POR_DIA
+        excede = tds > LIMITE_TDS
+
+        self.valores.append((t, tds))
+        self.fechas.append(fecha)
+        self._sumar(t, tds, excede, 1)
+        if len(self.valores) > self.ventana:
+            t_viejo, tds_viejo = self.valores.popleft()
+            self.fechas.popleft()
+            self._sumar(t_viejo, tds_viejo, tds_viejo > LIMITE_TDS, -1)
+
+        if contar_total:
+            self.muestras_total += 1
+            self.excedencias_total += excede
+            self.suma_total += tds
+        return alertas
+
+    def _sumar(self, t: float, tds: float, excede: bool, signo: int) -> None:
+        self._suma += signo * tds
+        self._suma_t += signo * t
+        self._suma_tt += signo * t * t
+        self._suma_ty += signo * t * tds
+        self.excedencias += signo * excede
+
+    # ----- lecturas (O(1)) -----
+    @property
+    def n(self) -> int:
+        return len(self.valores)
+
+    @property
+    def media(self) -> float:
+        return self._suma / self.n if self.n else float("nan")
+
+    @property
+    def tasa_excedencia(self) -> float:
+        return self.excedencias / self.n if self.n else float("nan")
+
+    @property
+    def tendencia(self) -> float:
+        """Pendiente del TDS en la ventana (mg/L por día); NaN si no hay variación en el tiempo."""
+        n = self.n
+        denominador = n * self._suma_tt - self._suma_t ** 2
+        if n < 2 or denominador <= 1e-12 * max(1.0, n * self._suma_tt):
+            return float("nan")
+        return (n * self._suma_ty - self._suma_t * self._suma) / denominador
+
+    def fila(self) -> Dict[str, object]:
+        return {
+            "Sitio": self.sitio,
+            "Muestras": self.muestras_total,
+            "Última muestra": self.fechas[-1] if self.fechas else None,
+            f"TDS medio (últimas {self.ventana})": self.media,
+            f"Excedencias (últimas {self.ventana})": self.excedencias,
+            "Tasa de excedencia": self.tasa_excedencia,
+            "Tendencia TDS (mg/L por día)": self.tendencia,
+            "Excedencias totales": self.excedencias_total,
+            "TDS medio histórico": self.suma_total / self.muestras_total if self.muestras_total else float("nan"),
+            "Última anomalía": self.ultima_anomalia,
+        }
+
+
+class MonitorSitios:
+    """Agregados y detectores de todos los sitios; se registra a través de él para mantenerlos al día."""
+
+    def __init__(self, almacen: AlmacenHistorial, ventana: int = VENTANA):
+        self.almacen = almacen
+        self.ventana = ventana
+        self.distribucion = cargar_distribucion()
+        self.deriva = DerivaEntrada(self.distribucion)
+        self._sitios: Dict[str, AgregadoSitio] = {}
+        self._candado = threading.Lock()
+
+        recientes, _ = almacen.pagina(Consulta(), limite=MEMORIA_DERIVA)
+        for valores in recientes[CAMPOS_CONTAMINANTES].to_numpy(dtype=float)[::-1]:
+            self.deriva.observar(valores)
+        for sitio, totales in almacen.sitios().iterrows():
+            agregado = AgregadoSitio(sitio, ventana)
+            for fecha, *valores in almacen.ultimas_del_sitio(sitio, ventana):
+                agregado.agregar(fecha, valores, contar_total=False)
+            agregado.muestras_total = int(totales["muestras"])
+            agregado.excedencias_total = int(totales["excedencias"])
+            agregado.suma_total = float(totales["suma_tds"])
+            self._sitios[sitio] = agregado
+
+    def agregar(self, entrada: Dict[str, object]) -> List[Alerta]:
+        """
+        Guarda la entrada en el historial, actualiza los agregados de su
+        sitio y devuelve los avisos: fuera del rango de entrenamiento, deriva
+        de la entrada y anomalías del sitio.
+        """
+        entrada = dict(entrada)
+        entrada.setdefault("Fecha", datetime.now().strftime(FORMATO_FECHA))
+        self.almacen.agregar(entrada)
+        valores = valores_entrada(entrada)
+        alertas = self.distribucion.alertas(valores)
+        sitio = entrada.get("Sitio")
+        with self._candado:
+            alertas += self.deriva.observar(valores)
+            if sitio is not None:
+                agregado = self._sitios.get(sitio)
+                if agregado is None:
+                    agregado = self._sitios[sitio] = AgregadoSitio(sitio, self.ventana)
+                alertas += agregado.agregar(entrada["Fecha"], valores)
+        return alertas
+
+    def psi(self) -> Dict[str, float]:
+        """PSI de cada contaminante de las muestras recientes contra el entrenamiento."""
+        with self._candado:
+            return dict(zip(PARAMETROS, self.deriva.psi().tolist()))
+
+    def sitios(self) -> List[str]:
+        return sorted(self._sitios)
+
+    def sitio(self, sitio: str) -> AgregadoSitio:
+        return self._sitios[sitio]
+
+    def resumen(self) -> pd.DataFrame:
+        """Una fila por sitio, leída de los agregados."""
+        with self._candado:
+            filas = [self._sitios[s].fila() for s in sorted(self._sitios)]
+        return pd.DataFrame(filas)
+
+    def serie(self, sitio: str) -> pd.DataFrame:
+        """TDS de la ventana del sitio, por fecha."""
+        with self._candado:
+            agregado = self._sitios[sitio]
+            fechas = list(agregado.fechas)
+            tds = [v for _, v in agregado.valores]
+        return pd.DataFrame({"TDS (mg/L)": tds}, index=pd.to_datetime(fechas, format=FORMATO_FECHA))
@@ -0,0 +1,204 @@
+"""
+Motor de evaluación de calidad del agua.
+
+Contiene el índice global de contaminación, la comparativa de filtros y el
+análisis de riesgo antes/después del filtrado. No depende de Streamlit ni de
+librerías de gráficas, así que puede usarse desde la app, procesos por lotes
+o un servidor.
+"""
+
+import hashlib
+from dataclasses import astuple, dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .catalogo import Catalogo, cargar_catalogo
+from .interpretacion import Interpretacion, indice_dominante, interpretar
+
+# ----- DATOS DE FILTROS -----
+# Vienen de catalogo_filtros.json; en la comparativa entran los que tienen eficiencia base
+CATALOGO: Catalogo = cargar_catalogo().comparables()
+
+# Eficiencia base usada para la comparativa general
+FILTROS: Dict[str, float] = {f.nombre: f.eficiencia_base for f in CATALOGO}
+
+# Eficiencias realistas por contaminante
+EFICIENCIAS_REALES: Dict[str, Dict[str, float]] = {f.nombre: f.eficiencias for f in CATALOGO}
+
+# ----- PARÁMETROS -----
+PARAMETROS: List[str] = ["Turbidez", "Coliformes", "Metales", "TDS"]
+ETIQUETAS: List[str] = ["Turbidez (NTU)", "Coliformes (NMP/100ml)", "Metales (ppm)", "TDS (mg/L)"]
+
+# Valor máximo de referencia para normalizar cada contaminante a 0–100
+MAXIMOS: Dict[str, float] = {
+    "Turbidez": 50,
+    "Coliformes": 2000,
+    "Metales": 2,
+    "TDS": 1000,
+}
+
+
+@dataclass(frozen=True)
+class Muestra:
+    """Valores medidos en una muestra de agua."""
+
+    ph: float
+    turbidez: float
+    coliformes: float
+    metales: float
+    tds: float
+    olor: str = "No"
+
+    def valores(self) -> List[float]:
+        """Contaminantes en el orden de PARAMETROS."""
+        return [self.turbidez, self.coliformes, self.metales, self.tds]
+
+    @property
+    def id(self) -> str:
+        """Identificador estable: misma muestra, mismo ID (sirve como clave de caché)."""
+        return hashlib.sha1(repr(astuple(self)).encode("utf-8")).hexdigest()[:12]
+
+    @classmethod
+    def desde_historial(cls, entrada: Dict[str, object]) -> "Muestra":
+        """Reconstruye la muestra a partir de una fila del historial."""
+        return cls(
+            entrada["pH"],
+            entrada["Turbidez_NTU"],
+            entrada["Coliformes_NMP_100ml"],
+            entrada["Metales_ppm"],
+            entrada["TDS_mgL"],
+            entrada["Olor"],
+        )
+
+
+@dataclass
+class Resultado:
+    """Resultado completo del análisis de una muestra."""
+
+    muestra: Muestra
+    nivel: float
+    # Filas (filtro, eficiencia base %, purificación estimada %)
+    tabla_filtros: List[Tuple[str, float, float]]
+    filtro_recomendado: str
+    purificacion_recomendada: float
+    antes: Dict[str, float]
+    despues: Dict[str, float]
+    riesgo_antes: Dict[str, float]
+    riesgo_despues: Dict[str, float]
+    riesgo_global_antes: float
+    riesgo_global_despues: float
+    mejoras: Dict[str, float] = field(default_factory=dict)
+    dominante_antes: str = ""
+    domina: str = ""
+    mejora_total: float = 0.0
+    interpretacion: Optional[Interpretacion] = None
+
+    def entrada_historial(self) -> Dict[str, object]:
+        """Fila con el formato usado en el historial y en Google Sheets."""
+        m = self.muestra
+        return {
+            "ID": m.id,
+            "pH": m.ph,
+            "Turbidez_NTU": m.turbidez,
+            "Coliformes_NMP_100ml": m.coliformes,
+            "Metales_ppm": m.metales,
+            "TDS_mgL": m.tds,
+            "Olor": m.olor,
+            "Nivel_contaminacion_%": self.nivel,
+            "Filtro_recomendado": self.filtro_recomendado,
+            "Purificacion_recomendada_%": round(self.purificacion_recomendada, 1),
+            "TDS_filtrado_mgL": round(self.despues["TDS"], 2),
+        }
+
+
+def nivel_contaminacion(turbidez: float, coliformes: float, metales: float, tds: float) -> float:
+    """Nivel general de contaminación (0-100) a partir de un índice normalizado."""
+    score = (turbidez / 50 + coliformes / 2000 + metales / 2 + tds / 1000) / 4
+    return max(0.0, min(score * 100, 100.0))
+
+
+def normalizar(valor: float, maximo: float) -> float:
+    """Normaliza un contaminante a un índice 0–100."""
+    return min(100, (valor / maximo) * 100)
+
+
+def comparar_filtros(nivel: float) -> List[Tuple[str, float, float]]:
+    """Eficiencia base y purificación estimada de cada filtro."""
+    eficiencia = CATALOGO.eficiencia_base
+    purificacion = eficiencia * (100 - nivel)
+    return list(zip(CATALOGO.nombres.tolist(), (eficiencia * 100).tolist(), purificacion.tolist()))
+
+
+def aplicar_filtro(muestra: Muestra, filtro: str) -> Dict[str, float]:
+    """Valores de cada contaminante tras pasar por el filtro indicado."""
+    residual = 1 - CATALOGO.matriz[CATALOGO.posicion_de[filtro]]
+    return dict(zip(PARAMETROS, (np.array(muestra.valores(), dtype=float) * residual).tolist()))
+
+
+def evaluar(muestra: Muestra, modelo=None) -> Resultado:
+    """
+    Análisis completo de una muestra: índice, filtro recomendado y riesgo.
+
+    Si se pasa ``modelo`` (ver ``purificacion.modelo``), el filtro recomendado
+    es su predicción; si no, el de mayor purificación estimada.
+    """
+    nivel = nivel_contaminacion(muestra.turbidez, muestra.coliformes, muestra.metales, muestra.tds)
+
+    tabla = comparar_filtros(nivel)
+    if modelo is not None:
+        recomendado = modelo.predecir(muestra)
+        mejor = next((fila for fila in tabla if fila[0] == recomendado), None)
+        if mejor is None:
+            raise ValueError(f"El modelo recomienda «{recomendado}», que no está en el catálogo de filtros")
+    else:
+        # Igual que idxmax: ante empate gana el primero
+        mejor = max(tabla, key=lambda fila: fila[2])
+
+    antes = dict(zip(PARAMETROS, muestra.valores()))
+    despues = aplicar_filtro(muestra, mejor[0])
+
+    riesgo_antes = {p: normalizar(antes[p], MAXIMOS[p]) for p in PARAMETROS}
+    riesgo_despues = {p: normalizar(despues[p], MAXIMOS[p]) for p in PARAMETROS}
+
+    # Reducción por contaminante
+    mejoras = {}
+    for p in PARAMETROS:
+        if antes[p] > 0:
+            reduccion = 100 * (1 - despues[p] / antes[p])
+        else:
+            reduccion = 0
+        mejoras[p] = max(0, reduccion)
+
+    lista_antes = list(antes.values())
+    lista_despues = list(despues.values())
+
+    # Mejora total del agua
+    if sum(lista_antes) > 0:
+        mejora_total = 100 * (1 - sum(lista_despues) / sum(lista_antes))
+    else:
+        mejora_total = 0
+
+    # Contaminante dominante: el de mayor riesgo (valor normalizado), no el de mayor magnitud
+    dominante_antes = PARAMETROS[indice_dominante(list(riesgo_antes.values()))]
+    riesgo_global_despues = sum(riesgo_despues.values()) / 4
+    interpretacion = interpretar(antes, riesgo_despues, riesgo_global_despues)
+
+    return Resultado(
+        muestra=muestra,
+        nivel=nivel,
+        tabla_filtros=tabla,
+        filtro_recomendado=mejor[0],
+        purificacion_recomendada=mejor[2],
+        antes=antes,
+        despues=despues,
+        riesgo_antes=riesgo_antes,
+        riesgo_despues=riesgo_despues,
+        riesgo_global_antes=sum(riesgo_antes.values()) / 4,
+        riesgo_global_despues=riesgo_global_despues,
+        mejoras=mejoras,
+        dominante_antes=dominante_antes,
+        domina=interpretacion.dominante,
+        mejora_total=mejora_total,
+        interpretacion=interpretacion,
+    )
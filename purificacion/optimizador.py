@@ -0,0 +1,156 @@
+"""
+Optimizador de trenes de tratamiento.
+
+Busca la cadena de etapas más barata (hasta ``k`` etapas del catálogo, ver
+``catalogo``) con la que cada contaminante queda dentro de los límites de la
+NOM-127. Cada etapa deja
+pasar ``1 - eficiencia`` de cada contaminante, así que en escala logarítmica
+las remociones se suman: la etapa aporta ``-log10(1 - eficiencia)`` unidades
+de remoción (LRV) y la muestra necesita ``log10(valor / límite)``.
+
+Como el producto no depende del orden, se buscan conjuntos de etapas (k!
+veces menos casos que las permutaciones) y la cadena se presenta en el orden
+de proceso de cada etapa (pretratamiento, adsorción, membranas,
+desinfección). La búsqueda es en profundidad sobre las etapas ordenadas por
+costo, con poda por costo (la mejor cadena encontrada es el tope) y por
+alcance (las etapas que quedan no bastan), y memoriza cada subproblema
+``(etapa, etapas restantes, remoción faltante)``; la memoria no depende de
+la muestra, así que se reutiliza entre consultas.
+"""
+
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .catalogo import CONTAMINANTES, Filtro, cargar_catalogo
+from .interpretacion import LIMITES_NOM127
+from .motor import PARAMETROS
+
+INFINITO = float("inf")
+
+# Remociones y faltantes se cuentan en millonésimas de log (enteros): el faltante
+# se redondea hacia arriba y la remoción hacia abajo, así que toda cadena
+# encontrada cumple aunque quede justo en el límite.
+ESCALA_LRV = 1_000_000
+EFICIENCIA_MAXIMA = 1 - 1e-9
+
+MAX_ETAPAS = 5
+MAX_SUBPROBLEMAS_EN_MEMORIA = 200_000
+
+
+@dataclass(frozen=True)
+class Cadena:
+    """Tren de tratamiento elegido y su efecto sobre la muestra."""
+
+    etapas: Tuple[str, ...]
+    costo: float
+    despues: Dict[str, float]
+
+    def __str__(self) -> str:
+        return " → ".join(self.etapas)
+
+
+def lrv(eficiencias) -> np.ndarray:
+    """Remoción logarítmica de etapas con las eficiencias dadas."""
+    return -np.log10(1 - np.minimum(eficiencias, EFICIENCIA_MAXIMA))
+
+
+class Optimizador:
+    """Búsqueda del tren más barato sobre un catálogo fijo (por defecto, el de la app)."""
+
+    def __init__(self, catalogo: Optional[Sequence[Filtro]] = None, limites: Dict[str, float] = LIMITES_NOM127):
+        # Más baratas primero: al superar el tope se puede cortar el ciclo
+        catalogo = cargar_catalogo() if catalogo is None else catalogo
+        self.etapas = sorted(catalogo, key=lambda e: (e.costo, e.nombre))
+        self.limites = limites
+        matriz = np.array([[e.eficiencias[c] for c in CONTAMINANTES] for e in self.etapas], dtype=float)
+        self._aportes = [tuple(fila) for fila in np.floor(lrv(matriz) * ESCALA_LRV).astype(int).tolist()]
+        # Mayor aporte por contaminante entre las etapas i en adelante
+        self._alcance = [(0,) * len(CONTAMINANTES)] * (len(self.etapas) + 1)
+        for i in range(len(self.etapas) - 1, -1, -1):
+            self._alcance[i] = tuple(map(max, self._aportes[i], self._alcance[i + 1]))
+        # (i, d, faltante) -> (costo, etapas) exacto, o (cota inferior, None)
+        self._memo: Dict[Tuple[int, int, Tuple[int, ...]], Tuple[float, Optional[Tuple[int, ...]]]] = {}
+
+    def faltante(self, antes: Dict[str, float]) -> Tuple[int, ...]:
+        """Remoción necesaria por contaminante, en millonésimas de log."""
+        faltante = []
+        for p in PARAMETROS:
+            valor, limite = antes[p], self.limites[p]
+            if valor <= limite:
+                faltante.append(0)
+            else:
+                faltante.append(math.ceil(math.log10(valor / limite) * ESCALA_LRV))
+        return tuple(faltante)
+
+    def mejor_cadena(self, antes: Dict[str, float], max_etapas: int = 3) -> Optional[Cadena]:
+        """
+        Cadena más barata de hasta ``max_etapas`` etapas que deja la muestra
+        dentro de los límites; None si ninguna lo logra.
+        """
+        costo, indices = self._buscar(0, max_etapas, self.faltante(antes), INFINITO)
+        if indices is None:
+            return None
+        elegidas = sorted((self.etapas[i] for i in indices), key=lambda e: e.posicion)
+        despues = dict(antes)
+        for etapa in elegidas:
+            for p, c in zip(PARAMETROS, CONTAMINANTES):
+                despues[p] *= 1 - etapa.eficiencias[c]
+        return Cadena(tuple(e.nombre for e in elegidas), costo, despues)
+
+    def _buscar(
+        self, i: int, d: int, faltante: Tuple[int, ...], tope: float
+    ) -> Tuple[float, Optional[Tuple[int, ...]]]:
+        """Mejor conjunto de etapas i.. (a lo más d) que cubre ``faltante`` con costo < tope."""
+        if not any(faltante):
+            return 0.0, ()
+        if d == 0:
+            return INFINITO, None
+
+        clave = (i, d, faltante)
+        guardado = self._memo.get(clave)
+        if guardado is not None:
+            costo, indices = guardado
+            if indices is not None:
+                return (costo, indices) if costo < tope else (INFINITO, None)
+            if costo >= tope:
+                return INFINITO, None
+
+        mejor, mejor_indices = tope, None
+        for j in range(i, len(self.etapas)):
+            costo_j = self.etapas[j].costo
+            if costo_j >= mejor:
+                break
+            # Ni con d copias de la mejor etapa restante se cubre el faltante
+            if any(f > d * a for f, a in zip(faltante, self._alcance[j])):
+                break
+            aporte = self._aportes[j]
+            if not any(f and a for f, a in zip(faltante, aporte)):
+                continue
+            resto = tuple(max(0, f - a) for f, a in zip(faltante, aporte))
+            costo, indices = self._buscar(j + 1, d - 1, resto, mejor - costo_j)
+            if indices is not None:
+                mejor, mejor_indices = costo_j + costo, (j,) + indices
+
+        if len(self._memo) >= MAX_SUBPROBLEMAS_EN_MEMORIA:
+            self._memo.clear()
+        if mejor_indices is not None:
+            self._memo[clave] = (mejor, mejor_indices)
+            return mejor, mejor_indices
+        # Sin solución por debajo del tope: el tope es cota inferior del subproblema
+        self._memo[clave] = (tope, None)
+        return INFINITO, None
+
+
+@lru_cache(maxsize=1)
+def optimizador() -> Optimizador:
+    """Optimizador sobre el catálogo por defecto (uno por proceso)."""
+    return Optimizador()
+
+
+def cadena_optima(antes: Dict[str, float], max_etapas: int = 3) -> Optional[Cadena]:
+    """Tren más barato que cumple la NOM-127 con el catálogo por defecto."""
+    return optimizador().mejor_cadena(antes, max_etapas)
@@ -0,0 +1,218 @@
+"""
+Reportes PDF con reportlab.
+
+Este módulo no importa Streamlit; lo usan la app y la línea de comandos.
+reportlab se carga solo cuando se importa este módulo, es decir, cuando
+alguien pide un PDF. Las gráficas se dibujan como vectores directamente en
+el canvas (ver ``graficas_pdf``).
+"""
+
+from io import BytesIO
+
+from .motor import Resultado
+
+# ----- PDF (opcional con reportlab) -----
+try:
+    from reportlab.lib.pagesizes import letter
+    from reportlab.pdfgen import canvas
+    from reportlab.lib import colors
+    from reportlab.lib.utils import simpleSplit
+
+    from .graficas_pdf import dibujar, grafica_antes_despues, grafica_filtros, grafica_radar
+
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+
+def generar_pdf(resultado: Resultado):
+    """Reporte de una muestra; las gráficas se dibujan como vectores."""
+    datos = resultado.entrada_historial()
+
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    # ---------- TÍTULO ----------
+    c.setFillColor(colors.darkblue)
+    c.setFont("Helvetica-Bold", 18)
+    c.drawString(50, height - 50, "Reporte de Purificación de Agua – Ecatepec")
+    c.setFillColor(colors.black)
+
+    # ---------- DATOS ----------
+    y = height - 90
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "1. Datos del agua analizada")
+    y -= 20
+    c.setFont("Helvetica", 10)
+
+    lineas = [
+        f"pH: {datos['pH']}",
+        f"Turbidez (NTU): {datos['Turbidez_NTU']}",
+        f"Coliformes (NMP/100ml): {datos['Coliformes_NMP_100ml']}",
+        f"Metales (ppm): {datos['Metales_ppm']}",
+        f"TDS (mg/L): {datos['TDS_mgL']}",
+        f"Olor desagradable: {datos['Olor']}",
+        f"Nivel de contaminación: {datos['Nivel_contaminacion_%']:.1f} %",
+    ]
+
+    for linea in lineas:
+        c.drawString(60, y, linea)
+        y -= 14
+
+    # ---------- TABLA FILTROS ----------
+    y -= 10
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "2. Comparativa de filtros utilizados")
+    y -= 20
+
+    # Encabezado
+    c.setFillColor(colors.darkblue)
+    c.rect(50, y - 15, 500, 18, fill=1)
+    c.setFillColor(colors.white)
+    c.drawString(55, y - 12, "Filtro")
+    c.drawString(220, y - 12, "Eficiencia (%)")
+    c.drawString(390, y - 12, "Purificación (%)")
+
+    c.setFillColor(colors.black)
+    y -= 25
+    c.setFont("Helvetica", 9)
+
+    for filtro, eficiencia, purificacion in resultado.tabla_filtros:
+        if y < 120:
+            c.showPage()
+            y = height - 80
+        c.drawString(55, y, str(filtro))
+        c.drawString(220, y, f"{eficiencia:.1f}")
+        c.drawString(390, y, f"{purificacion:.1f}")
+        y -= 14
+
+    # ---------- GRÁFICAS ----------
+    c.showPage()
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 50, "3. Gráficas de análisis")
+
+    dibujar(grafica_filtros(resultado.tabla_filtros), c, 50, height - 350)
+    dibujar(grafica_radar(resultado.antes), c, 150, 50)
+
+    # ---------- BEFORE / AFTER ----------
+    c.showPage()
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 50, "4. Comparativa antes/después del filtrado")
+    dibujar(grafica_antes_despues(resultado.antes, resultado.despues), c, 50, 200)
+
+   # ---------- TDS ----------
+    c.showPage()
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 50, "5. Análisis especializado de TDS")
+
+    y = height - 90
+    c.setFont("Helvetica", 10)
+
+    tds_before = resultado.antes["TDS"]
+    tds_after = resultado.despues["TDS"]
+    reduccion = resultado.mejoras["TDS"]  # 0 si la muestra no trae TDS
+
+    tds_lineas = [
+        f"TDS inicial: {tds_before:.2f} mg/L",
+        f"TDS tras filtrado: {tds_after:.2f} mg/L",
+        f"Reducción estimada: {reduccion:.1f} %",
+    ]
+
+    for l in tds_lineas:
+        c.drawString(60, y, l)
+        y -= 16
+
+
+    # ---------- CONCLUSIÓN FINAL ----------
+    c.showPage()
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, height - 50, "6. Conclusión final del análisis")
+
+    y = height - 90
+    c.setFont("Helvetica", 10)
+
+    interpretacion = resultado.interpretacion
+    conclusion = interpretacion.conclusion
+    lineas_conclusion = [conclusion.texto] + simpleSplit(conclusion.detalle, "Helvetica", 10, 480)
+
+    # Escribir texto línea por línea
+    for linea in lineas_conclusion:
+        c.drawString(60, y, linea)
+        y -= 16
+        if y < 100:
+            c.showPage()
+            y = height - 80
+
+    y -= 10
+    c.setFont("Helvetica-Bold", 10)
+    c.drawString(60, y, f"Contaminante residual dominante: {resultado.domina}")
+    y -= 20
+
+    # Recomendación específica por contaminante
+    c.setFont("Helvetica", 10)
+    for linea in simpleSplit(f"Recomendación final: {interpretacion.recomendacion}", "Helvetica", 10, 480):
+        c.drawString(60, y, linea)
+        y -= 14
+
+    # ---------- FIN ----------
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
+
+
+def generar_pdf_lote(df_lote, titulo="Reporte de lote – Purificación de Agua Ecatepec") -> bytes:
+    """Tabla resumen de un lote de muestras ya evaluadas (una fila por muestra)."""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=letter)
+    width, height = letter
+
+    def encabezado(y):
+        c.setFillColor(colors.darkblue)
+        c.rect(40, y - 15, 530, 18, fill=1)
+        c.setFillColor(colors.white)
+        c.setFont("Helvetica-Bold", 9)
+        for x, texto in zip(columnas_x, encabezados):
+            c.drawString(x, y - 11, texto)
+        c.setFillColor(colors.black)
+        c.setFont("Helvetica", 8)
+        return y - 30
+
+    columnas_x = [45, 85, 145, 210, 260, 320, 380, 480]
+    encabezados = ["#", "Turbidez", "Coliformes", "Metales", "TDS", "Nivel %", "Filtro", "TDS filt."]
+
+    c.setFillColor(colors.darkblue)
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(40, height - 50, titulo)
+    c.setFillColor(colors.black)
+    c.setFont("Helvetica", 10)
+    c.drawString(40, height - 70, f"Muestras en el lote: {len(df_lote)}")
+
+    y = encabezado(height - 95)
+    for n, (_, fila) in enumerate(df_lote.iterrows(), start=1):
+        if y < 50:
+            c.showPage()
+            y = encabezado(height - 50)
+        valores = [
+            str(n),
+            f"{fila['turbidez']:.2f}",
+            f"{fila['coliformes']:.0f}",
+            f"{fila['metales']:.3f}",
+            f"{fila['tds']:.0f}",
+            f"{fila['Nivel_contaminacion_%']:.1f}",
+            str(fila["Filtro_recomendado"]),
+            f"{fila['TDS_filtrado_mgL']:.2f}",
+        ]
+        for x, texto in zip(columnas_x, valores):
+            c.drawString(x, y, texto)
+        y -= 12
+
+    c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def pdf_resultado(resultado: Resultado) -> bytes:
+    """PDF completo de una muestra como bytes."""
+    return generar_pdf(resultado).getvalue()
@@ -0,0 +1,85 @@
+"""
+Barrido de sensibilidad sobre dos parámetros.
+
+Evalúa una malla densa (200 × 200 por defecto) de dos contaminantes en todo
+el rango de los controles de la app, con los otros dos fijos, en una sola
+llamada a ``evaluar_lote``. El resultado depende solo de los ejes, los
+valores fijos y el olor, así que la app puede guardarlo en caché con esa
+clave: mover un control que está en un eje no recalcula nada.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+from .lote import NOMBRES_FILTROS, evaluar_lote
+from .motor import PARAMETROS
+
+# Rango de cada parámetro (el de los controles de la app)
+RANGOS: Dict[str, Tuple[float, float]] = {
+    "Turbidez": (0.1, 50.0),
+    "Coliformes": (0.0, 2000.0),
+    "Metales": (0.0, 2.0),
+    "TDS": (50.0, 1500.0),
+}
+
+RESOLUCION = 200
+
+
+@dataclass
+class Barrido:
+    """Malla evaluada; las matrices son (len(y), len(x)), filas en el eje y."""
+
+    eje_x: str
+    eje_y: str
+    x: np.ndarray
+    y: np.ndarray
+    nivel: np.ndarray
+    indice_filtro: np.ndarray  # índice en NOMBRES_FILTROS
+    riesgo_global_despues: np.ndarray
+
+    @property
+    def filtros(self) -> np.ndarray:
+        return NOMBRES_FILTROS
+
+
+def barrer(
+    eje_x: str,
+    eje_y: str,
+    fijos: Dict[str, float],
+    olor: float = 0.0,
+    modelo=None,
+    resolucion: int = RESOLUCION,
+) -> Barrido:
+    """
+    Evalúa ``resolucion`` × ``resolucion`` muestras variando ``eje_x`` y
+    ``eje_y`` en su rango; los demás parámetros toman su valor en ``fijos``.
+    """
+    if eje_x == eje_y or eje_x not in RANGOS or eje_y not in RANGOS:
+        raise ValueError("Se necesitan dos parámetros distintos de: " + ", ".join(PARAMETROS))
+    x = np.linspace(*RANGOS[eje_x], resolucion)
+    y = np.linspace(*RANGOS[eje_y], resolucion)
+    malla_x, malla_y = np.meshgrid(x, y)
+
+    datos = np.empty((malla_x.size, 5))
+    for j, p in enumerate(PARAMETROS):
+        if p == eje_x:
+            datos[:, j] = malla_x.ravel()
+        elif p == eje_y:
+            datos[:, j] = malla_y.ravel()
+        else:
+            datos[:, j] = fijos[p]
+    datos[:, 4] = olor
+
+    lote = evaluar_lote(datos, modelo)
+    forma = malla_x.shape
+    return Barrido(
+        eje_x=eje_x,
+        eje_y=eje_y,
+        x=x,
+        y=y,
+        nivel=lote.nivel.reshape(forma),
+        indice_filtro=lote.indice_filtro.reshape(forma),
+        riesgo_global_despues=lote.riesgo_global_despues.reshape(forma),
+    )
@@ -0,0 +1,359 @@
+"""
+Servicio HTTP/JSON local con la evaluación de muestras.
+
+    python -m purificacion.servidor --puerto 8502
+
+Solo usa la biblioteca estándar (``asyncio``) y el motor; no importa
+Streamlit ni librerías de gráficas. Rutas:
+
+* ``GET /salud``: estado y estadísticas de agrupación.
+* ``POST /evaluar``: una muestra, ``{"turbidez": 10, "coliformes": 500,
+  "metales": 0.4, "tds": 650, "olor": "No"}`` (``olor`` es opcional).
+* ``POST /lote``: ``{"muestras": [...]}``, hasta ``MAX_MUESTRAS_POR_SOLICITUD``.
+
+Cada muestra se responde con el índice de contaminación, el filtro
+recomendado y la comparativa de filtros, los valores y el riesgo antes y
+después del filtrado y la interpretación (los mismos textos que la app).
+
+Las solicitudes que llegan juntas se agrupan: cada una deja sus filas en el
+``Agrupador``, que al juntar ``MAX_LOTE`` filas o pasar ``ESPERA_MAXIMA_MS``
+desde la primera las evalúa con una sola llamada a ``evaluar_lote`` (en un
+hilo aparte, para no detener el loop) y reparte los resultados. Con muchos clientes a la vez, cada muestra cuesta
+lo que una fila del cálculo vectorizado y no una evaluación suelta.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from .interpretacion import Interpretacion, Tramo, interpretar_lote
+from .lote import EFICIENCIA_BASE, NOMBRES_FILTROS, ResultadoLote, evaluar_lote
+from .modelo import cargar_modelo
+from .motor import PARAMETROS
+
+HOST = "127.0.0.1"
+PUERTO = 8502
+
+MAX_LOTE = 4096  # filas por llamada a evaluar_lote
+ESPERA_MAXIMA_MS = 1.0  # lo más que espera una fila a que se junten otras
+MAX_MUESTRAS_POR_SOLICITUD = 100_000
+MAX_CUERPO = 32 * 1024 * 1024  # bytes
+CONEXIONES_EN_ESPERA = 2048  # backlog del socket
+
+CAMPOS_MUESTRA = ["turbidez", "coliformes", "metales", "tds"]
+VALORES_OLOR = {"sí": 1.0, "si": 1.0, "no": 0.0}
+
+# La purificación es eficiencia × (100 - nivel): el orden de la comparativa
+# es el de la eficiencia base y no depende de la muestra
+ORDEN_COMPARATIVA = np.argsort(-EFICIENCIA_BASE, kind="stable")
+_NOMBRES_COMPARATIVA = NOMBRES_FILTROS[ORDEN_COMPARATIVA].tolist()
+_EFICIENCIAS_COMPARATIVA = (EFICIENCIA_BASE[ORDEN_COMPARATIVA] * 100).round(1).tolist()
+
+logger = logging.getLogger(__name__)
+
+
+class SolicitudInvalida(ValueError):
+    """Error del cliente: se responde con 400 y el mensaje."""
+
+
+# ----- entrada y salida -----
+def _numero(muestra: Dict[str, object], campo: str, i: int) -> float:
+    valor = muestra.get(campo)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float)):
+        raise SolicitudInvalida(f"muestra {i}: '{campo}' debe ser un número")
+    if not math.isfinite(valor) or valor < 0:
+        raise SolicitudInvalida(f"muestra {i}: '{campo}' debe ser un número no negativo")
+    return float(valor)
+
+
+def _olor(valor: object, i: int) -> float:
+    if valor is None:
+        return 0.0
+    if isinstance(valor, bool) or valor in (0, 1):
+        return float(valor)
+    if isinstance(valor, str) and valor.strip().lower() in VALORES_OLOR:
+        return VALORES_OLOR[valor.strip().lower()]
+    raise SolicitudInvalida(f"muestra {i}: 'olor' debe ser \"Sí\", \"No\", 0 o 1")
+
+
+def filas_de(muestras: List[object]) -> np.ndarray:
+    """Matriz N×5 (turbidez, coliformes, metales, tds, olor) validada."""
+    if not muestras:
+        raise SolicitudInvalida("No hay muestras")
+    if len(muestras) > MAX_MUESTRAS_POR_SOLICITUD:
+        raise SolicitudInvalida(f"Máximo {MAX_MUESTRAS_POR_SOLICITUD:,} muestras por solicitud")
+    filas = np.empty((len(muestras), 5))
+    for i, muestra in enumerate(muestras):
+        if not isinstance(muestra, dict):
+            raise SolicitudInvalida(f"muestra {i}: se esperaba un objeto")
+        filas[i, :4] = [_numero(muestra, campo, i) for campo in CAMPOS_MUESTRA]
+        filas[i, 4] = _olor(muestra.get("olor"), i)
+    return filas
+
+
+def _tramo(tramo: Tramo) -> Dict[str, str]:
+    return {"nivel": tramo.nivel, "texto": tramo.texto}
+
+
+def _interpretacion(interpretacion: Interpretacion) -> Dict[str, object]:
+    return {
+        "parametros": {p: _tramo(t) for p, t in interpretacion.parametros.items()},
+        "tds_nom127": _tramo(interpretacion.tds_nom127),
+        "conclusion": _tramo(interpretacion.conclusion),
+        "contaminante_dominante": interpretacion.dominante,
+        "recomendacion": interpretacion.recomendacion,
+    }
+
+
+def respuestas(lote: ResultadoLote) -> List[Dict[str, object]]:
+    """Un objeto JSON por muestra con el análisis completo (mismos números que ``evaluar``)."""
+    antes = lote.antes.tolist()
+    despues = lote.despues.round(4).tolist()
+    riesgo_antes = lote.riesgo_antes.round(2).tolist()
+    riesgo_despues = lote.riesgo_despues.round(2).tolist()
+    purificacion = lote.purificacion[:, ORDEN_COMPARATIVA].round(2).tolist()
+
+    # Las mismas reglas que ``evaluar``, para todas las muestras a la vez
+    interpretacion = interpretar_lote(lote.antes, lote.riesgo_despues, lote.riesgo_global_despues)
+
+    return [
+        {
+            "nivel": nivel,
+            "filtro_recomendado": filtro,
+            "purificacion_recomendada": recomendada,
+            "comparativa": [
+                {"filtro": nombre, "eficiencia_base": eficiencia, "purificacion": valor}
+                for nombre, eficiencia, valor in zip(_NOMBRES_COMPARATIVA, _EFICIENCIAS_COMPARATIVA, purificacion[i])
+            ],
+            "antes": dict(zip(PARAMETROS, antes[i])),
+            "despues": dict(zip(PARAMETROS, despues[i])),
+            "riesgo_antes": dict(zip(PARAMETROS, riesgo_antes[i])),
+            "riesgo_despues": dict(zip(PARAMETROS, riesgo_despues[i])),
+            "riesgo_global_antes": global_antes,
+            "riesgo_global_despues": global_despues,
+            "interpretacion": _interpretacion(interpretacion.muestra(i)),
+        }
+        for i, (nivel, filtro, recomendada, global_antes, global_despues) in enumerate(zip(
+            lote.nivel.round(2).tolist(),
+            lote.filtro_recomendado.tolist(),
+            lote.purificacion_recomendada.round(2).tolist(),
+            lote.riesgo_global_antes.round(2).tolist(),
+            lote.riesgo_global_despues.round(2).tolist(),
+        ))
+    ]
+
+
+# ----- agrupación en microlotes -----
+class Agrupador:
+    """Junta las filas de solicitudes concurrentes y las evalúa en una sola pasada."""
+
+    def __init__(self, modelo=None, max_lote: int = MAX_LOTE, espera_ms: float = ESPERA_MAXIMA_MS):
+        self.modelo = modelo
+        self.max_lote = max_lote
+        self.espera = espera_ms / 1000
+        self._pendientes: List[Tuple[np.ndarray, asyncio.Future]] = []
+        self._filas = 0
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        # Un solo hilo: los microlotes se evalúan en orden y sin competir entre sí por el GIL
+        self._ejecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="evaluar")
+        self._tareas: Set[asyncio.Task] = set()
+        # Estadísticas
+        self.lotes = 0
+        self.muestras = 0
+
+    def evaluar(self, filas: np.ndarray) -> "asyncio.Future[List[Dict[str, object]]]":
+        """Encola las filas; el futuro se resuelve con una respuesta por fila."""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendientes.append((filas, futuro))
+        self._filas += len(filas)
+        if self._filas >= self.max_lote:
+            self._vaciar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.espera, self._vaciar)
+        return futuro
+
+    def _vaciar(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        pendientes, self._pendientes, self._filas = self._pendientes, [], 0
+        if pendientes:
+            tarea = asyncio.get_running_loop().create_task(self._resolver(pendientes))
+            # El loop solo guarda referencias débiles a las tareas
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    def _calcular(self, filas: np.ndarray) -> List[Dict[str, object]]:
+        return respuestas(evaluar_lote(filas, self.modelo))
+
+    async def _resolver(self, pendientes: List[Tuple[np.ndarray, asyncio.Future]]) -> None:
+        """Evalúa el microlote en el hilo de cálculo y reparte los resultados."""
+        todas = np.concatenate([f for f, _ in pendientes])
+        try:
+            # Fuera del loop: mientras tanto se siguen leyendo solicitudes y juntando el siguiente lote
+            resultado = await asyncio.get_running_loop().run_in_executor(self._ejecutor, self._calcular, todas)
+        except Exception as e:
+            for _, futuro in pendientes:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        self.lotes += 1
+        self.muestras += len(resultado)
+        inicio = 0
+        for filas, futuro in pendientes:
+            if not futuro.done():  # el cliente pudo haberse ido
+                futuro.set_result(resultado[inicio:inicio + len(filas)])
+            inicio += len(filas)
+
+    def cerrar(self) -> None:
+        """Libera el hilo de cálculo (los lotes en curso terminan antes)."""
+        self._ejecutor.shutdown(wait=True)
+
+
+# ----- HTTP -----
+class Servidor:
+    """HTTP/1.1 mínimo (con keep-alive) sobre ``asyncio``."""
+
+    def __init__(self, agrupador: Agrupador):
+        self.agrupador = agrupador
+
+    async def _rutear(self, metodo: str, ruta: str, cuerpo: bytes) -> Tuple[HTTPStatus, object]:
+        ruta = ruta.split("?", 1)[0]
+        if ruta == "/salud":
+            if metodo != "GET":
+                return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Usa GET"}
+            lotes = self.agrupador.lotes
+            return HTTPStatus.OK, {
+                "estado": "ok",
+                "lotes": lotes,
+                "muestras": self.agrupador.muestras,
+                "muestras_por_lote": self.agrupador.muestras / lotes if lotes else 0.0,
+            }
+        if ruta not in ("/evaluar", "/lote"):
+            return HTTPStatus.NOT_FOUND, {"error": f"No existe {ruta}"}
+        if metodo != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Usa POST con un cuerpo JSON"}
+
+        try:
+            datos = json.loads(cuerpo)
+        except (UnicodeDecodeError, json.JSONDecodeError):
+            raise SolicitudInvalida("El cuerpo no es JSON válido")
+        if ruta == "/evaluar":
+            (resultado,) = await self.agrupador.evaluar(filas_de([datos]))
+            return HTTPStatus.OK, resultado
+        muestras = datos.get("muestras") if isinstance(datos, dict) else datos
+        if not isinstance(muestras, list):
+            raise SolicitudInvalida('Se esperaba {"muestras": [...]}')
+        return HTTPStatus.OK, {"resultados": await self.agrupador.evaluar(filas_de(muestras))}
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                linea = await lector.readline()
+                if not linea:
+                    break
+                partes = linea.decode("latin-1").split()
+                if len(partes) != 3:
+                    await self._responder(escritor, HTTPStatus.BAD_REQUEST, {"error": "Solicitud mal formada"}, False)
+                    break
+                metodo, ruta, version = partes
+
+                encabezados = {}
+                while True:
+                    linea = await lector.readline()
+                    if linea in (b"\r\n", b"\n", b""):
+                        break
+                    nombre, _, valor = linea.decode("latin-1").partition(":")
+                    encabezados[nombre.strip().lower()] = valor.strip()
+                conexion = encabezados.get("connection", "").lower()
+                mantener = conexion != "close" if version == "HTTP/1.1" else conexion == "keep-alive"
+
+                try:
+                    largo = int(encabezados.get("content-length", 0))
+                except ValueError:
+                    largo = -1
+                if not 0 <= largo <= MAX_CUERPO:
+                    estado = HTTPStatus.REQUEST_ENTITY_TOO_LARGE if largo > MAX_CUERPO else HTTPStatus.BAD_REQUEST
+                    await self._responder(escritor, estado, {"error": "Content-Length no válido"}, False)
+                    break
+                cuerpo = await lector.readexactly(largo) if largo else b""
+
+                try:
+                    estado, respuesta = await self._rutear(metodo, ruta, cuerpo)
+                except SolicitudInvalida as e:
+                    estado, respuesta = HTTPStatus.BAD_REQUEST, {"error": str(e)}
+                except Exception:
+                    logger.exception("Error al atender %s %s", metodo, ruta)
+                    estado, respuesta = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "Error interno"}
+                await self._responder(escritor, estado, respuesta, mantener)
+                if not mantener:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            # Cliente que se fue a media solicitud, o una línea más larga que el límite del lector
+            pass
+        finally:
+            escritor.close()
+
+    @staticmethod
+    async def _responder(escritor: asyncio.StreamWriter, estado: HTTPStatus, cuerpo: object, mantener: bool) -> None:
+        datos = json.dumps(cuerpo, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        escritor.write(
+            f"HTTP/1.1 {estado.value} {estado.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(datos)}\r\n"
+            f"Connection: {'keep-alive' if mantener else 'close'}\r\n\r\n".encode("latin-1")
+            + datos
+        )
+        await escritor.drain()
+
+
+async def servir(
+    host: str = HOST,
+    puerto: int = PUERTO,
+    max_lote: int = MAX_LOTE,
+    espera_ms: float = ESPERA_MAXIMA_MS,
+) -> None:
+    agrupador = Agrupador(cargar_modelo(), max_lote, espera_ms)
+    servidor = Servidor(agrupador)
+    red = await asyncio.start_server(servidor.atender, host, puerto, backlog=CONEXIONES_EN_ESPERA)
+    direcciones = ", ".join(str(s.getsockname()) for s in red.sockets)
+    logger.info("Escuchando en %s (lotes de hasta %d filas, espera %.1f ms)", direcciones, max_lote, espera_ms)
+    try:
+        async with red:
+            await red.serve_forever()
+    finally:
+        agrupador.cerrar()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m purificacion.servidor",
+        description="Servicio HTTP/JSON local para evaluar muestras de agua.",
+    )
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--puerto", type=int, default=PUERTO)
+    parser.add_argument("--max-lote", type=int, default=MAX_LOTE, help="filas por microlote (1 = sin agrupar)")
+    parser.add_argument("--espera-ms", type=float, default=ESPERA_MAXIMA_MS, help="espera máxima para juntar un microlote")
+    args = parser.parse_args(argv)
+    if args.max_lote < 1 or args.espera_ms < 0:
+        parser.error("--max-lote debe ser al menos 1 y --espera-ms no negativo")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    try:
+        asyncio.run(servir(args.host, args.puerto, args.max_lote, args.espera_ms))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
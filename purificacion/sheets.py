@@ -0,0 +1,199 @@
+"""
+Registro en Google Sheets en segundo plano.
+
+Un único ``EscritorSheets`` por proceso mantiene el cliente autorizado y la
+hoja abiertos, encola las filas y las envía con ``append_rows`` por lotes
+(por tamaño o por tiempo) desde un hilo aparte, con reintentos y espera
+exponencial. Si el servicio no responde, las filas se guardan en un archivo
+local de respaldo y se reenvían en el siguiente envío exitoso.
+
+La hoja se obtiene de una función ``abrir_hoja`` que se inyecta al crear el
+escritor, así puede probarse con un cliente falso que tenga ``append_rows``.
+gspread y oauth2client se importan al abrir la hoja, ya en el hilo del
+escritor, así que importar este módulo no los carga.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from importlib.util import find_spec
+from typing import Callable, Dict, List, Optional
+
+GSPREAD_AVAILABLE = find_spec("gspread") is not None and find_spec("oauth2client") is not None
+
+log = logging.getLogger(__name__)
+
+NOMBRE_HOJA = "Historial_Purificacion_Ecatepec"
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+]
+
+# Orden de columnas en la hoja
+COLUMNAS = [
+    "pH",
+    "Turbidez_NTU",
+    "Coliformes_NMP_100ml",
+    "Metales_ppm",
+    "TDS_mgL",
+    "Olor",
+    "Nivel_contaminacion_%",
+    "Filtro_recomendado",
+    "Purificacion_recomendada_%",
+    "TDS_filtrado_mgL",
+]
+
+_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUTA_RESPALDO = os.path.join(_RAIZ, "sheets_pendientes.jsonl")
+
+
+def fila_sheets(row_dict: Dict[str, object]) -> List[object]:
+    """Fila en el orden de COLUMNAS (vacío si falta un campo)."""
+    return [row_dict.get(col, "") for col in COLUMNAS]
+
+
+def hoja_google(credenciales: Dict[str, str], nombre: str = NOMBRE_HOJA):
+    """Autoriza un cliente de gspread con un Service Account y abre la hoja."""
+    import gspread
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    creds = ServiceAccountCredentials.from_json_keyfile_dict(credenciales, SCOPE)
+    client = gspread.authorize(creds)
+    return client.open(nombre).sheet1
+
+
+class EscritorSheets:
+    """Cola de filas que un hilo en segundo plano envía por lotes a la hoja."""
+
+    def __init__(
+        self,
+        abrir_hoja: Callable[[], object],
+        tam_lote: int = 50,
+        intervalo: float = 5.0,
+        max_reintentos: int = 4,
+        espera_base: float = 1.0,
+        espera_maxima: float = 30.0,
+        ruta_respaldo: Optional[str] = RUTA_RESPALDO,
+    ):
+        self._abrir_hoja = abrir_hoja
+        self.tam_lote = tam_lote
+        self.intervalo = intervalo
+        self.max_reintentos = max_reintentos
+        self.espera_base = espera_base
+        self.espera_maxima = espera_maxima
+        self.ruta_respaldo = ruta_respaldo
+
+        self._cola: "queue.Queue" = queue.Queue()
+        self._hoja = None
+        self._hilo: Optional[threading.Thread] = None
+        self._candado = threading.Lock()
+        self._detener = threading.Event()
+
+    # ----- API pública -----
+    def encolar(self, row_dict: Dict[str, object]) -> None:
+        """Agrega una fila; no bloquea al llamador."""
+        self._iniciar()
+        self._cola.put(fila_sheets(row_dict))
+
+    def vaciar(self, timeout: Optional[float] = None) -> bool:
+        """Espera a que todo lo encolado se haya enviado o respaldado."""
+        if self._hilo is None or not self._hilo.is_alive():
+            return True
+        marca = threading.Event()
+        self._cola.put(marca)
+        return marca.wait(timeout)
+
+    def cerrar(self, timeout: float = 10.0) -> None:
+        """Envía lo pendiente y detiene el hilo (una segunda llamada no hace nada)."""
+        if self._hilo is None or self._detener.is_set():
+            return
+        self.vaciar(timeout)
+        self._detener.set()
+        self._cola.put(None)
+        self._hilo.join(timeout)
+
+    # ----- hilo de envío -----
+    def _iniciar(self) -> None:
+        with self._candado:
+            if self._hilo is None:
+                self._hilo = threading.Thread(
+                    target=self._bucle, name="escritor-sheets", daemon=True
+                )
+                self._hilo.start()
+                atexit.register(self.cerrar)
+
+    def _bucle(self) -> None:
+        while not self._detener.is_set():
+            lote: List[List[object]] = []
+            marcas: List[threading.Event] = []
+            limite = None
+
+            # Juntamos filas hasta llenar el lote o cumplir el intervalo
+            while len(lote) < self.tam_lote:
+                espera = None if limite is None else max(0.0, limite - time.monotonic())
+                try:
+                    item = self._cola.get(timeout=espera)
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                if isinstance(item, threading.Event):
+                    marcas.append(item)
+                    break
+                lote.append(item)
+                if limite is None:
+                    limite = time.monotonic() + self.intervalo
+
+            if lote:
+                self._enviar(lote)
+            for marca in marcas:
+                marca.set()
+
+    def _hoja_abierta(self):
+        if self._hoja is None:
+            self._hoja = self._abrir_hoja()
+        return self._hoja
+
+    def _enviar(self, filas: List[List[object]]) -> None:
+        pendientes = self._leer_respaldo()
+        todas = pendientes + filas
+
+        for intento in range(self.max_reintentos + 1):
+            try:
+                self._hoja_abierta().append_rows(todas, value_input_option="USER_ENTERED")
+            except Exception as e:
+                # Forzamos reabrir la hoja por si expiró la sesión
+                self._hoja = None
+                if intento == self.max_reintentos:
+                    log.warning("Google Sheets no disponible (%s); %d filas a respaldo", e, len(filas))
+                    self._respaldar(filas)
+                    return
+                time.sleep(min(self.espera_base * 2 ** intento, self.espera_maxima))
+            else:
+                if pendientes:
+                    self._borrar_respaldo()
+                return
+
+    # ----- archivo de respaldo -----
+    def _leer_respaldo(self) -> List[List[object]]:
+        if not self.ruta_respaldo or not os.path.exists(self.ruta_respaldo):
+            return []
+        with open(self.ruta_respaldo, encoding="utf-8") as f:
+            return [json.loads(linea) for linea in f if linea.strip()]
+
+    def _respaldar(self, filas: List[List[object]]) -> None:
+        if not self.ruta_respaldo:
+            return
+        with open(self.ruta_respaldo, "a", encoding="utf-8") as f:
+            for fila in filas:
+                f.write(json.dumps(fila, ensure_ascii=False) + "\n")
+
+    def _borrar_respaldo(self) -> None:
+        try:
+            os.remove(self.ruta_respaldo)
+        except OSError:
+            pass
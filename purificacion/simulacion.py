@@ -0,0 +1,65 @@
+"""
+Simulación por etapas del proceso de purificación.
+
+Las eficiencias de cada etapa se calculan de una vez y de forma
+reproducible (con semilla); la animación en la interfaz solo decide cuántas
+etapas mostrar según el tiempo transcurrido, sin dormir el hilo del script.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# (nombre, duración en pasos, mensaje)
+ETAPAS: List[Tuple[str, int, str]] = [
+    ("Pre-filtración", 2, "Eliminando sólidos grandes y residuos visibles…"),
+    ("Sedimentación", 3, "Separando partículas suspendidas…"),
+    ("Adsorción nanotecnológica", 4, "Capturando metales pesados…"),
+    ("Desinfección UV", 4, "Inactivando bacterias, virus y coliformes…"),
+    ("Pulido final", 2, "Mejorando olor, color y sabor…"),
+]
+
+# Duración de cada paso de la animación (s)
+SEGUNDOS_POR_PASO = 0.7
+
+
+@dataclass(frozen=True)
+class EtapaSimulada:
+    nombre: str
+    pasos: int
+    mensaje: str
+    eficiencia: float  # %
+
+
+def simular(semilla: Optional[int] = None) -> List[EtapaSimulada]:
+    """Eficiencia de cada etapa ~ N(85, 10) recortada a [60, 99.9]."""
+    rng = np.random.default_rng(semilla)
+    eficiencias = np.clip(rng.normal(85, 10, size=len(ETAPAS)), 60, 99.9)
+    return [
+        EtapaSimulada(nombre, pasos, mensaje, float(ef))
+        for (nombre, pasos, mensaje), ef in zip(ETAPAS, eficiencias)
+    ]
+
+
+def avance(
+    etapas: List[EtapaSimulada],
+    transcurrido: float,
+    segundos_por_paso: float = SEGUNDOS_POR_PASO,
+) -> Tuple[float, int]:
+    """
+    Progreso de la animación tras ``transcurrido`` segundos: fracción total
+    (0–1) y número de etapas ya completadas.
+    """
+    total = sum(e.pasos for e in etapas)
+    if segundos_por_paso <= 0 or total == 0:
+        return 1.0, len(etapas)
+
+    pasos = transcurrido / segundos_por_paso
+    completadas = 0
+    acumulado = 0
+    for etapa in etapas:
+        acumulado += etapa.pasos
+        if pasos >= acumulado:
+            completadas += 1
+    return min(pasos / total, 1.0), completadas
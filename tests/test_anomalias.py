@@ -0,0 +1,125 @@
+"""
+Pruebas de los detectores de anomalías: umbrales del salto, del CUSUM y del PSI.
+
+Uso: python -m pytest tests/test_anomalias.py
+"""
+
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.anomalias import (  # noqa: E402
+    MIN_MUESTRAS,
+    MIN_MUESTRAS_DERIVA,
+    PSI_DERIVA,
+    SIGMA_MINIMA,
+    Z_SALTO,
+    DerivaEntrada,
+    DetectorSitio,
+    DistribucionEntrenamiento,
+)
+
+BASE = np.array([10.0, 500.0, 0.4, 650.0])
+
+
+def con_desvio(sigmas, j=3):
+    """La muestra base con el contaminante ``j`` a ``sigmas`` desviaciones mínimas (en log1p)."""
+    valores = BASE.copy()
+    valores[j] = np.expm1(np.log1p(BASE[j]) + sigmas * SIGMA_MINIMA)
+    return valores
+
+
+def detector_estable(n=20):
+    # Serie constante: la varianza se queda en cero y la desviación es SIGMA_MINIMA
+    detector = DetectorSitio()
+    for _ in range(n):
+        assert detector.observar(BASE) == []
+    return detector
+
+
+def test_salto_solo_por_encima_del_umbral():
+    assert detector_estable().observar(con_desvio(Z_SALTO - 0.1)) == []
+    (alerta,) = detector_estable().observar(con_desvio(Z_SALTO + 0.1), "S1")
+    assert (alerta.tipo, alerta.parametro, alerta.sitio) == ("salto", "TDS", "S1")
+    assert alerta.referencia == pytest.approx(BASE[3])
+    (alerta,) = detector_estable().observar(con_desvio(-Z_SALTO - 0.1, j=1))
+    assert (alerta.tipo, alerta.parametro) == ("salto", "Coliformes")
+
+
+def test_no_avisa_mientras_aprende():
+    detector = DetectorSitio()
+    for _ in range(MIN_MUESTRAS - 1):
+        detector.observar(BASE)
+    assert detector.observar(con_desvio(10 * Z_SALTO)) == []
+
+
+def test_cusum_acumula_desvios_pequenos_y_se_reinicia():
+    detector = detector_estable()
+    # 3σ no es un salto; el CUSUM suma 3 - holgura = 2.5 y luego menos, porque la
+    # media va alcanzando al desvío: 2.5, 4.7 y 6.6 cruza el umbral de 5
+    for acumulado in (2.5, 4.7):
+        assert detector.observar(con_desvio(3)) == []
+        assert detector.cusum_alto[3] == pytest.approx(acumulado, abs=0.05)
+    (alerta,) = detector.observar(con_desvio(3))
+    assert (alerta.tipo, alerta.parametro) == ("deriva al alza", "TDS")
+    assert detector.cusum_alto[3] == 0.0
+    # Un desvío dentro de la holgura nunca acumula
+    detector = detector_estable()
+    for _ in range(200):
+        assert detector.observar(con_desvio(0.4)) == []
+
+
+def test_cusum_a_la_baja():
+    detector = detector_estable()
+    alertas = [a for _ in range(3) for a in detector.observar(con_desvio(-3, j=0))]
+    assert [(a.tipo, a.parametro) for a in alertas] == [("deriva a la baja", "Turbidez")]
+
+
+def distribucion(semilla=0):
+    rng = np.random.default_rng(semilla)
+    return DistribucionEntrenamiento(rng.uniform(0, 1, (2000, 4)) * [50, 2000, 2, 1500])
+
+
+def psi_directo(deriva, muestras):
+    """PSI recalculado con los pesos de olvido de cada muestra."""
+    d = deriva.distribucion
+    pesos = deriva.olvido ** np.arange(len(muestras))[::-1]
+    reciente = np.array([
+        np.bincount(d.cuantil(muestras[:, j], j), weights=pesos, minlength=len(d.esperado[j])) / pesos.sum()
+        for j in range(4)
+    ])
+    reciente = np.maximum(reciente, 1e-4)
+    esperado = np.maximum(d.esperado, 1e-4)
+    return ((reciente - esperado) * np.log(reciente / esperado)).sum(axis=1)
+
+
+def test_psi_igual_al_recalculo_y_nan_con_pocas_muestras():
+    deriva = DerivaEntrada(distribucion())
+    rng = np.random.default_rng(1)
+    muestras = rng.uniform(0, 1, (300, 4)) * [50, 2000, 2, 1500]
+    for i, valores in enumerate(muestras, 1):
+        deriva.observar(valores)
+        if i < MIN_MUESTRAS_DERIVA:
+            assert all(math.isnan(v) for v in deriva.psi())
+    assert deriva.psi() == pytest.approx(psi_directo(deriva, muestras))
+    # Muestras de la misma distribución que el entrenamiento: sin deriva
+    assert (deriva.psi() < PSI_DERIVA).all()
+
+
+def test_deriva_de_la_entrada_avisa_una_vez_al_cruzar_el_umbral():
+    deriva = DerivaEntrada(distribucion())
+    rng = np.random.default_rng(2)
+    alertas = []
+    # Solo el TDS se va al decil más alto
+    for _ in range(400):
+        valores = rng.uniform(0, 1, 4) * [50, 2000, 2, 1500]
+        valores[3] = 1450
+        alertas += deriva.observar(valores)
+    assert [(a.tipo, a.parametro) for a in alertas] == [("deriva de la entrada", "TDS")]
+    assert alertas[0].valor > PSI_DERIVA == alertas[0].referencia
+    assert deriva.en_deriva.tolist() == [False, False, False, True]
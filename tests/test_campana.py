@@ -0,0 +1,91 @@
+"""
+Pruebas del reporte de campaña y de la unión en flujo de sus partes.
+
+Uso: python -m pytest tests/test_campana.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("reportlab")
+pypdf = pytest.importorskip("pypdf")
+
+from reportlab.lib.pagesizes import letter  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+from purificacion.campana import generar_pdf_campana, unir_pdfs  # noqa: E402
+
+FUENTES = ["Helvetica", "Times-Roman", "Courier-Bold"]
+
+
+def parte(ruta, numero, paginas):
+    """PDF de prueba con una fuente distinta por parte y una línea de texto por página."""
+    c = canvas.Canvas(str(ruta), pagesize=letter)
+    for i in range(paginas):
+        c.setFont(FUENTES[numero % len(FUENTES)], 12)
+        c.drawString(72, 720, f"parte {numero} pagina {i}")
+        c.rect(72, 600, 100, 50, fill=1)
+        c.showPage()
+    c.save()
+    return str(ruta)
+
+
+def revisar_paginas(lector):
+    """Cada página resuelve su contenido, sus recursos y sus fuentes."""
+    for pagina in lector.pages:
+        assert pagina["/Parent"].get_object()["/Type"] == "/Pages"
+        recursos = pagina["/Resources"].get_object()
+        for fuente in recursos["/Font"].get_object().values():
+            assert fuente.get_object()["/Type"] == "/Font"
+            assert fuente.get_object()["/BaseFont"]
+        assert pagina.get_contents() is not None
+
+
+def test_unir_partes_y_releer(tmp_path):
+    rutas = [parte(tmp_path / f"p{n}.pdf", n, paginas) for n, paginas in enumerate([2, 3, 1])]
+    destino = tmp_path / "unido.pdf"
+    assert unir_pdfs(rutas, str(destino)) == 6
+
+    lector = pypdf.PdfReader(str(destino), strict=True)
+    assert len(lector.pages) == 6
+    revisar_paginas(lector)
+    textos = [pagina.extract_text() for pagina in lector.pages]
+    esperados = [f"parte {n} pagina {i}" for n, paginas in enumerate([2, 3, 1]) for i in range(paginas)]
+    assert [t.strip() for t in textos] == esperados
+    bases = {
+        str(f.get_object()["/BaseFont"])
+        for p in lector.pages for f in p["/Resources"]["/Font"].values()
+    }
+    assert bases == {"/" + f for f in FUENTES}
+
+
+def test_unir_en_archivo_abierto(tmp_path):
+    rutas = [parte(tmp_path / "p.pdf", 0, 1)]
+    with open(tmp_path / "unido.pdf", "wb") as f:
+        assert unir_pdfs(rutas, f) == 1
+    assert len(pypdf.PdfReader(str(tmp_path / "unido.pdf"), strict=True).pages) == 1
+
+
+def test_reporte_de_campana_con_varias_partes(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 7
+    tabla = pd.DataFrame({
+        "turbidez": rng.uniform(0.1, 50, n), "coliformes": rng.uniform(0, 2000, n),
+        "metales": rng.uniform(0, 2, n), "tds": rng.uniform(50, 1500, n),
+        "colonia": ["Ciudad Azteca"] * 4 + ["Las Américas"] * 3,
+    })
+    destino = tmp_path / "campana.pdf"
+    # Tres partes de 3, 3 y 1 muestras, en un solo proceso
+    assert generar_pdf_campana(tabla, str(destino), procesos=1, muestras_por_parte=3) == n
+    lector = pypdf.PdfReader(str(destino), strict=True)
+    revisar_paginas(lector)
+    textos = [p.extract_text() for p in lector.pages]
+    # Resumen al principio y después una página por muestra
+    assert len(lector.pages) > n
+    assert sum("Ciudad Azteca" in t for t in textos[-n:]) == 4
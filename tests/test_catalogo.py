@@ -0,0 +1,98 @@
+"""
+Pruebas del catálogo de filtros y de su acuerdo con el modelo de recomendación.
+
+Uso: python -m pytest tests/test_catalogo.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.catalogo import Catalogo, Filtro, cargar_catalogo  # noqa: E402
+from purificacion.lote import evaluar_lote  # noqa: E402
+from purificacion.modelo import cargar_modelo, clases_fuera_del_catalogo, validar_clases  # noqa: E402
+from purificacion.motor import CATALOGO, Muestra, evaluar  # noqa: E402
+
+EFICIENCIAS = {"turbidez": 0.5, "coliformes": 0.5, "metales": 0.5, "tds": 0.5}
+
+
+def filtro(**datos):
+    return Filtro.desde_dict({"nombre": "Prueba", "eficiencias": EFICIENCIAS, **datos})
+
+
+class ModeloFijo:
+    """Modelo falso que siempre recomienda la misma clase."""
+
+    def __init__(self, clase):
+        self.clases = np.array([clase])
+
+    def predecir(self, muestra):
+        return str(self.clases[0])
+
+    def predecir_indices(self, datos):
+        return np.zeros(len(datos), dtype=np.int64)
+
+
+def test_eficiencia_base_se_valida_y_convierte():
+    assert filtro(eficiencia_base=1).eficiencia_base == 1.0
+    assert isinstance(filtro(eficiencia_base=1).eficiencia_base, float)
+    assert filtro().eficiencia_base is None
+    with pytest.raises(ValueError, match="eficiencia base debe ser un número"):
+        filtro(eficiencia_base="0.8")
+    with pytest.raises(ValueError, match="eficiencia base está fuera de 0–1"):
+        filtro(eficiencia_base=80)
+
+
+def test_eficiencias_deben_ser_numeros():
+    with pytest.raises(ValueError, match="eficiencia de tds debe ser un número"):
+        filtro(eficiencias={**EFICIENCIAS, "tds": "alta"})
+    with pytest.raises(ValueError, match="fuera de 0–1"):
+        filtro(eficiencias={**EFICIENCIAS, "metales": 1.5})
+
+
+def test_el_modelo_del_proceso_coincide_con_el_catalogo():
+    assert clases_fuera_del_catalogo(cargar_modelo()) == []
+
+
+def test_modelo_con_filtro_quitado_del_catalogo():
+    modelo = cargar_modelo()
+    quitado = str(modelo.clases[0])
+    reducido = Catalogo([f for f in cargar_catalogo().comparables() if f.nombre != quitado])
+    assert clases_fuera_del_catalogo(modelo, reducido) == [quitado]
+    with pytest.raises(ValueError, match=quitado):
+        validar_clases(modelo, reducido)
+
+
+def test_evaluar_con_clase_desconocida_da_error_claro():
+    modelo = ModeloFijo("Filtro renombrado")
+    with pytest.raises(ValueError, match="Filtro renombrado"):
+        evaluar(Muestra(7.0, 10, 500, 0.4, 650), modelo)
+    with pytest.raises(ValueError, match="Filtro renombrado"):
+        evaluar_lote([[10, 500, 0.4, 650, 0]], modelo)
+
+
+def test_lote_igual_a_evaluar_con_el_modelo():
+    rng = np.random.default_rng(0)
+    x = np.column_stack([
+        rng.uniform(0.1, 50, 200), rng.uniform(0, 2000, 200), rng.uniform(0, 2, 200),
+        rng.uniform(0, 1500, 200), rng.integers(0, 2, 200),
+    ])
+    modelo = cargar_modelo()
+    lote = evaluar_lote(x, modelo)
+    for i in range(0, len(x), 20):
+        t, c, m, tds, olor = x[i]
+        r = evaluar(Muestra(7.0, t, c, m, tds, "Sí" if olor else "No"), modelo)
+        assert CATALOGO.nombres[lote.indice_filtro[i]] == r.filtro_recomendado
+        assert lote.nivel[i] == pytest.approx(r.nivel)
+        assert lote.despues[i] == pytest.approx([r.despues[p] for p in r.despues])
+
+
+def test_lote_con_modelo_exige_la_columna_de_olor():
+    x = [[10, 500, 0.4, 650]]
+    assert len(evaluar_lote(x).nivel) == 1  # sin modelo, N×4 basta
+    with pytest.raises(ValueError, match="N×5"):
+        evaluar_lote(x, cargar_modelo())
@@ -0,0 +1,58 @@
+"""
+Pruebas de la línea de comandos (``python -m purificacion``).
+
+Uso: python -m pytest tests/test_cli.py
+"""
+
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.cli import escribir_pdfs, main  # noqa: E402
+
+CSV = """ph,turbidez,coliformes,metales,tds,olor,nota
+7,10,500,0,600,No,
+7,10,500,0,600,No,
+7.5,10.5,500,0.4,600.5,Sí,revisar
+"""
+
+
+def test_parquet_con_tipos_distintos_entre_bloques(tmp_path):
+    pytest.importorskip("pyarrow")
+    entrada = tmp_path / "muestras.csv"
+    entrada.write_text(CSV, encoding="utf-8")
+    salida = tmp_path / "resultados.parquet"
+    # El primer bloque trae solo enteros y la nota vacía; el segundo, decimales y texto
+    assert main([str(entrada), "-o", str(salida), "--bloque", "2", "--procesos", "1"]) == 0
+    tabla = pd.read_parquet(salida)
+    assert len(tabla) == 3
+    assert tabla["tds"].tolist() == [600.0, 600.0, 600.5]
+    assert tabla["nota"].tolist()[2] == "revisar"
+
+
+def test_pdf_por_muestra_con_tds_cero(tmp_path):
+    pytest.importorskip("reportlab")
+    entrada = tmp_path / "muestras.csv"
+    entrada.write_text("turbidez,coliformes,metales,tds,olor\n10,500,0.4,0,No\n", encoding="utf-8")
+    directorio = tmp_path / "pdf"
+    argumentos = [str(entrada), "-o", str(tmp_path / "r.csv"), "--procesos", "1",
+                  "--pdf", "muestra", "--dir-pdf", str(directorio)]
+    assert main(argumentos) == 0
+    assert len(os.listdir(directorio)) == 1
+
+
+def test_pdf_que_falla_no_deja_archivo(tmp_path, monkeypatch):
+    reporte = pytest.importorskip("purificacion.reporte")
+
+    def fallar(resultado):
+        raise RuntimeError("falla al dibujar")
+
+    monkeypatch.setattr(reporte, "pdf_resultado", fallar)
+    bloque = pd.DataFrame({"turbidez": [10.0], "coliformes": [500.0], "metales": [0.4], "tds": [0.0]})
+    with pytest.raises(RuntimeError):
+        escribir_pdfs(bloque, 1, "muestra", str(tmp_path))
+    assert os.listdir(tmp_path) == []
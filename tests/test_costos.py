@@ -0,0 +1,83 @@
+"""
+Pruebas del costo por litro con un catálogo de dos filtros calculado a mano.
+
+Uso: python -m pytest tests/test_costos.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.catalogo import Catalogo, Filtro  # noqa: E402
+from purificacion.costos import VIDA_EQUIPO_DIAS, costos_por_litro  # noqa: E402
+
+MUESTRA = [30, 1500, 1, 800]  # turbidez, coliformes, metales, tds
+
+
+def catalogo():
+    return Catalogo([
+        # Se satura por TDS: retiene 800 × 0.5 mg/L = 0.4 g por litro, 10 g de capacidad → 25 L
+        Filtro.desde_dict({
+            "nombre": "Completo",
+            "eficiencias": {"turbidez": 0.9, "coliformes": 0.99, "metales": 0.9, "tds": 0.5},
+            "precio_cartucho": 100, "vida_litros": 1000, "capacidad_g": {"tds": 10},
+            "caudal_lpm": 1, "precio_equipo": 3650, "costo_operacion_litro": 0.01,
+        }),
+        # No remueve nada, sin límite de capacidad ni de caudal: dura su vida nominal
+        Filtro.desde_dict({
+            "nombre": "Barato",
+            "eficiencias": {"turbidez": 0, "coliformes": 0, "metales": 0, "tds": 0},
+            "precio_cartucho": 50, "vida_litros": 2000,
+        }),
+    ])
+
+
+def test_costo_calculado_a_mano():
+    ranking = costos_por_litro(MUESTRA, 2400, catalogo())
+    # 2400 L/día con 1 L/min durante 20 h (1200 L/día por equipo): dos equipos
+    assert ranking.unidades.tolist() == [2, 1]
+    assert ranking.litros_por_cartucho[0].tolist() == pytest.approx([25, 2000])
+    assert ranking.dias_por_cartucho[0].tolist() == pytest.approx([25 / 1200, 2000 / 2400])
+    amortizacion = 2 * 3650 / (VIDA_EQUIPO_DIAS * 2400)
+    assert ranking.costo_litro[0].tolist() == pytest.approx([100 / 25 + 0.01 + amortizacion, 50 / 2000])
+
+    # Riesgo global tras cada filtro: (6 + 0.75 + 5 + 40) / 4 y el de la muestra sin tratar
+    assert ranking.riesgo_despues[0].tolist() == pytest.approx([12.9375, 66.25])
+    assert ranking.cumple[0].tolist() == [True, False]
+    # El que cumple va primero aunque cueste más
+    assert ranking.orden[0].tolist() == [0, 1]
+    assert ranking.mejor.tolist() == [0]
+    assert ranking.tabla()["Filtro"].tolist() == ["Completo", "Barato"]
+
+
+def test_ninguno_cumple_se_ordena_por_costo():
+    ranking = costos_por_litro(MUESTRA, 2400, catalogo(), riesgo_objetivo=1)
+    assert ranking.orden[0].tolist() == [1, 0]
+    assert ranking.mejor.tolist() == [-1]
+
+
+def test_los_coliformes_no_saturan_el_cartucho():
+    solo_coliformes = costos_por_litro([0, 1e6, 0, 0], 100, catalogo())
+    assert solo_coliformes.litros_por_cartucho[0].tolist() == [1000, 2000]
+
+
+def test_matriz_igual_a_muestra_por_muestra():
+    rng = np.random.default_rng(0)
+    antes = rng.uniform(0, 1, (20, 4)) * [50, 2000, 2, 1000]
+    ranking = costos_por_litro(antes, 500, catalogo())
+    assert len(ranking) == 20
+    for i, fila in enumerate(antes):
+        sola = costos_por_litro(fila, 500, catalogo())
+        assert ranking.costo_litro[i].tolist() == pytest.approx(sola.costo_litro[0].tolist())
+        assert ranking.orden[i].tolist() == sola.orden[0].tolist()
+
+
+def test_volumen_no_positivo():
+    with pytest.raises(ValueError, match="volumen diario"):
+        costos_por_litro(MUESTRA, 0, catalogo())
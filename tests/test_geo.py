@@ -0,0 +1,88 @@
+"""
+Pruebas del índice espacial contra la búsqueda por fuerza bruta.
+
+Uso: python -m pytest tests/test_geo.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.geo import CENTRO, IndiceGeo, a_km, rectangulo  # noqa: E402
+
+
+def tabla_aleatoria(n, semilla=0, dispersion=0.05):
+    """Puntos alrededor de ``CENTRO``: la mitad en un cúmulo denso y la otra mitad dispersos."""
+    rng = np.random.default_rng(semilla)
+    lat = CENTRO[0] + np.concatenate([rng.normal(0, 0.003, n // 2), rng.uniform(-1, 1, n - n // 2) * dispersion])
+    lon = CENTRO[1] + np.concatenate([rng.normal(0, 0.003, n // 2), rng.uniform(-1, 1, n - n // 2) * dispersion])
+    return pd.DataFrame({"Latitud": lat, "Longitud": lon, "Nivel_contaminacion_%": rng.uniform(0, 100, n)})
+
+
+def distancias(tabla, lat, lon):
+    x, y = a_km(tabla["Latitud"].to_numpy(), tabla["Longitud"].to_numpy())
+    px, py = a_km(lat, lon)
+    return np.hypot(x - px, y - py)
+
+
+# Dispersión normal y puntos tan separados que la malla agranda sus celdas
+@pytest.mark.parametrize("dispersion", [0.05, 20.0])
+def test_cercanos_igual_a_fuerza_bruta(dispersion):
+    tabla = tabla_aleatoria(2000, dispersion=dispersion)
+    indice = IndiceGeo(tabla)
+    rng = np.random.default_rng(1)
+    consultas = [CENTRO, (CENTRO[0] + 5 * dispersion, CENTRO[1] - 5 * dispersion)]  # dentro y muy fuera de la malla
+    consultas += [(CENTRO[0] + a * dispersion, CENTRO[1] + b * dispersion) for a, b in rng.uniform(-1, 1, (30, 2))]
+    for lat, lon in consultas:
+        todas = distancias(tabla, lat, lon)
+        for k in (1, 7, 50):
+            filas, d = indice.cercanos(lat, lon, k)
+            assert d.tolist() == pytest.approx(np.sort(todas)[:k].tolist())
+            assert todas[filas].tolist() == pytest.approx(d.tolist())
+            assert len(set(filas.tolist())) == k
+
+
+def test_cercanos_con_pocos_puntos():
+    tabla = tabla_aleatoria(5)
+    filas, d = IndiceGeo(tabla).cercanos(*CENTRO, k=10)
+    assert sorted(filas.tolist()) == list(range(5))
+    assert (np.diff(d) >= 0).all()
+    filas, d = IndiceGeo(tabla.iloc[:0]).cercanos(*CENTRO)
+    assert len(filas) == len(d) == 0
+
+
+def test_en_vista_igual_a_fuerza_bruta():
+    tabla = tabla_aleatoria(3000, semilla=2)
+    indice = IndiceGeo(tabla)
+    lat, lon = tabla["Latitud"].to_numpy(), tabla["Longitud"].to_numpy()
+    rng = np.random.default_rng(3)
+    vistas = [rectangulo(CENTRO[0] + a, CENTRO[1] + b, r) for a, b, r in zip(
+        rng.uniform(-0.06, 0.06, 40), rng.uniform(-0.06, 0.06, 40), rng.uniform(0.05, 8, 40)
+    )]
+    vistas.append(rectangulo(CENTRO[0] + 1, CENTRO[1], 1))  # fuera de todos los puntos
+    for lat_min, lat_max, lon_min, lon_max in vistas:
+        esperadas = np.flatnonzero((lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max))
+        assert sorted(indice.en_vista(lat_min, lat_max, lon_min, lon_max).tolist()) == esperadas.tolist()
+
+
+def test_celdas_agregan_todas_las_filas():
+    tabla = tabla_aleatoria(1000, semilla=4)
+    tabla.loc[::10, "Nivel_contaminacion_%"] = np.nan
+    indice = IndiceGeo(tabla)
+    celdas = indice.celdas(1.0, columnas=["Nivel_contaminacion_%"])
+    assert celdas["Muestras"].sum() == len(tabla)
+
+    # Cada celda tiene la media de las filas cuyo punto cae en ella (los NaN no cuentan)
+    x, y = a_km(tabla["Latitud"].to_numpy(), tabla["Longitud"].to_numpy())
+    grupos = tabla.groupby([np.floor(x), np.floor(y)])["Nivel_contaminacion_%"]
+    cx, cy = a_km(celdas["Latitud"].to_numpy(), celdas["Longitud"].to_numpy())
+    for (gx, gy), media, muestras in zip(zip(np.floor(cx), np.floor(cy)), celdas["Nivel_contaminacion_%"],
+                                         celdas["Muestras"]):
+        assert muestras == grupos.size()[(gx, gy)]
+        assert media == pytest.approx(grupos.mean()[(gx, gy)], nan_ok=True)
@@ -0,0 +1,111 @@
+"""
+Pruebas del almacén del historial: paginación por cursor y exportación por bloques.
+
+Uso: python -m pytest tests/test_historial.py
+"""
+
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.historial import (  # noqa: E402
+    ORDENES,
+    AlmacenHistorial,
+    Consulta,
+    csv_por_bloques,
+    parquet_por_bloques,
+)
+
+ENTRADA = {
+    "Fecha": "2026-01-01 00:00:00", "ID": "abc", "pH": 7.0, "Turbidez_NTU": 10.0,
+    "Coliformes_NMP_100ml": 500.0, "Metales_ppm": 0.4, "TDS_mgL": 650.0, "Olor": "No",
+    "Nivel_contaminacion_%": 32.5, "Filtro_recomendado": "Zeolita",
+    "Purificacion_recomendada_%": 54.0, "TDS_filtrado_mgL": 520.0,
+}
+
+
+@pytest.fixture
+def almacen(tmp_path):
+    """Cinco entradas sin sitio ni ubicación y cinco con ellos, como una base anterior a esas columnas."""
+    almacen = AlmacenHistorial(str(tmp_path / "historial.sqlite3"))
+    for i in range(10):
+        entrada = dict(ENTRADA, TDS_mgL=600.0 + i)
+        if i >= 5:
+            entrada.update(Sitio="ECA-014", Colonia="Ciudad Azteca", Latitud=19.5345, Longitud=-99.0275)
+        almacen.agregar(entrada)
+    return almacen
+
+
+def test_parquet_con_columnas_vacias_en_el_primer_bloque(almacen):
+    pq = pytest.importorskip("pyarrow.parquet")
+    datos = b"".join(parquet_por_bloques(almacen.bloques(5, Consulta())))
+    tabla = pq.read_table(io.BytesIO(datos)).to_pandas()
+    assert len(tabla) == 10
+    assert tabla["Sitio"].isna().sum() == 5
+    assert tabla["Latitud"].dropna().tolist() == [19.5345] * 5
+
+
+def test_parquet_sin_filas_es_un_archivo_valido(almacen):
+    pq = pytest.importorskip("pyarrow.parquet")
+    datos = b"".join(parquet_por_bloques(almacen.bloques(5, Consulta(sitio="no-existe"))))
+    assert pq.read_table(io.BytesIO(datos)).num_rows == 0
+
+
+def test_csv_por_bloques_lleva_un_solo_encabezado(almacen):
+    texto = b"".join(csv_por_bloques(almacen.bloques(3, Consulta()))).decode("utf-8")
+    lineas = texto.splitlines()
+    assert len(lineas) == 11
+    assert lineas[0].startswith("Fecha,ID,Sitio")
+
+
+@pytest.fixture
+def con_empates(tmp_path):
+    """23 entradas con fecha, TDS y nivel repetidos, para que el orden dependa del desempate por ``n``."""
+    almacen = AlmacenHistorial(str(tmp_path / "historial.sqlite3"))
+    almacen.agregar_muchas(
+        dict(
+            ENTRADA,
+            Fecha=f"2026-01-0{1 + i % 4} 00:00:00",
+            TDS_mgL=[600.0, 650.0, 700.0][i % 3],
+            **{"Nivel_contaminacion_%": [10.0, 20.0][i % 2]},
+            Filtro_recomendado="Zeolita" if i % 5 else "Ósmosis inversa",
+        )
+        for i in range(23)
+    )
+    return almacen
+
+
+def paginar(almacen, consulta, limite):
+    filas, cursor = [], None
+    while True:
+        tabla, cursor = almacen.pagina(consulta, limite, cursor)
+        assert len(tabla) <= limite
+        filas += tabla.index.tolist()
+        if cursor is None:
+            return filas
+
+
+@pytest.mark.parametrize("orden", list(ORDENES))
+@pytest.mark.parametrize("descendente", [True, False])
+@pytest.mark.parametrize("filtro", [None, "Zeolita"])
+def test_paginas_sin_saltar_ni_repetir_filas(con_empates, orden, descendente, filtro):
+    consulta = Consulta(filtro=filtro, orden=orden, descendente=descendente)
+    todas, _ = con_empates.pagina(consulta, limite=1000)
+    # Orden esperado: la columna y, entre empates, el número de entrada
+    esperado = sorted(
+        todas.index, key=lambda n: (todas.loc[n, ORDENES[orden]], n), reverse=descendente
+    )
+    for limite in (1, 4, 7, 23):
+        assert paginar(con_empates, consulta, limite) == esperado
+    assert len(esperado) == (23 if filtro is None else 18)
+
+
+def test_total_es_el_numero_de_entradas(con_empates, tmp_path):
+    assert con_empates.total() == 23
+    con_empates.agregar(ENTRADA)
+    assert con_empates.total() == 24
+    assert AlmacenHistorial(str(tmp_path / "vacio.sqlite3")).total() == 0
@@ -0,0 +1,50 @@
+"""
+Pruebas del Monte Carlo de incertidumbre: reproducible con semilla y centrado en ``evaluar``.
+
+Uso: python -m pytest tests/test_incertidumbre.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.incertidumbre import monte_carlo  # noqa: E402
+from purificacion.modelo import cargar_modelo  # noqa: E402
+from purificacion.motor import PARAMETROS, Muestra, evaluar  # noqa: E402
+
+MUESTRA = Muestra(7.0, 10, 500, 0.4, 650, "Sí")
+
+
+@pytest.mark.parametrize("con_modelo", [False, True])
+def test_misma_semilla_mismos_resultados(con_modelo):
+    modelo = cargar_modelo() if con_modelo else None
+    a = monte_carlo(MUESTRA, modelo, sorteos=5000, semilla=7)
+    b = monte_carlo(MUESTRA, modelo, sorteos=5000, semilla=7)
+    assert a == b
+    assert monte_carlo(MUESTRA, modelo, sorteos=5000, semilla=8) != a
+
+
+def test_intervalos_ordenados_y_fracciones():
+    r = monte_carlo(MUESTRA, sorteos=5000, semilla=0)
+    assert r.sorteos == 5000
+    intervalos = [r.nivel, r.purificacion, r.riesgo_global_despues, *r.despues.values(), *r.riesgo_despues.values()]
+    assert all(bajo <= medio <= alto for bajo, medio, alto in intervalos)
+    assert sum(r.filtros.values()) == pytest.approx(1.0)
+    assert list(r.filtros.values()) == sorted(r.filtros.values(), reverse=True)
+    assert 0 <= r.prob_aceptable <= 1
+    assert set(r.prob_nom127) == set(PARAMETROS)
+
+
+def test_sin_error_coincide_con_evaluar():
+    # Sin error de medición y eficiencias casi fijas, todos los sorteos son la evaluación puntual
+    r = monte_carlo(MUESTRA, sorteos=2000, semilla=0, errores=dict.fromkeys(PARAMETROS, 0.0), concentracion=1e9)
+    e = evaluar(MUESTRA)
+    assert r.filtros == {e.filtro_recomendado: 1.0}
+    assert r.nivel == pytest.approx((e.nivel,) * 3)
+    assert r.purificacion == pytest.approx((e.purificacion_recomendada,) * 3, rel=1e-3)
+    assert r.riesgo_global_despues == pytest.approx((e.riesgo_global_despues,) * 3, rel=1e-3)
+    for p in PARAMETROS:
+        assert r.despues[p] == pytest.approx((e.despues[p],) * 3, rel=1e-3, abs=1e-6)
@@ -0,0 +1,66 @@
+"""
+Pruebas de la evaluación vectorizada: ``evaluar_lote`` contra ``evaluar`` campo por campo.
+
+Uso: python -m pytest tests/test_lote.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.lote import evaluar_lote  # noqa: E402
+from purificacion.modelo import cargar_modelo  # noqa: E402
+from purificacion.motor import PARAMETROS, Muestra, evaluar  # noqa: E402
+
+
+def filas_aleatorias(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    filas = np.column_stack([
+        rng.uniform(0, 60, n),  # por encima de los máximos: el riesgo se recorta a 100
+        rng.uniform(0, 2500, n),
+        rng.uniform(0, 2.5, n),
+        rng.uniform(0, 1500, n),
+        rng.integers(0, 2, n),
+    ])
+    filas[0] = 0  # sin contaminantes
+    filas[1] = [200, 10_000, 10, 5000, 1]  # índice recortado a 100
+    return filas
+
+
+@pytest.mark.parametrize("con_modelo", [False, True])
+def test_lote_igual_a_evaluar(con_modelo):
+    modelo = cargar_modelo() if con_modelo else None
+    filas = filas_aleatorias(300)
+    lote = evaluar_lote(filas, modelo)
+    assert len(lote) == len(filas)
+    columnas = lote.columnas()
+
+    for i, (t, c, m, tds, olor) in enumerate(filas.tolist()):
+        r = evaluar(Muestra(7.0, t, c, m, tds, "Sí" if olor else "No"), modelo)
+        assert lote.nivel[i] == pytest.approx(r.nivel)
+        assert lote.filtro_recomendado[i] == r.filtro_recomendado
+        assert lote.purificacion_recomendada[i] == pytest.approx(r.purificacion_recomendada)
+        assert lote.purificacion[i].tolist() == pytest.approx([fila[2] for fila in r.tabla_filtros])
+        assert lote.antes[i].tolist() == [r.antes[p] for p in PARAMETROS]
+        assert lote.despues[i].tolist() == pytest.approx([r.despues[p] for p in PARAMETROS])
+        assert lote.riesgo_antes[i].tolist() == pytest.approx([r.riesgo_antes[p] for p in PARAMETROS])
+        assert lote.riesgo_despues[i].tolist() == pytest.approx([r.riesgo_despues[p] for p in PARAMETROS])
+        assert lote.riesgo_global_antes[i] == pytest.approx(r.riesgo_global_antes)
+        assert lote.riesgo_global_despues[i] == pytest.approx(r.riesgo_global_despues)
+
+        entrada = r.entrada_historial()
+        assert columnas["Filtro_recomendado"][i] == entrada["Filtro_recomendado"]
+        for campo in ("Nivel_contaminacion_%", "Purificacion_recomendada_%", "TDS_filtrado_mgL"):
+            assert columnas[campo][i] == pytest.approx(entrada[campo])
+
+
+def test_sin_modelo_basta_n_por_4():
+    filas = filas_aleatorias(5)
+    sin_olor = evaluar_lote(filas[:, :4])
+    assert sin_olor.nivel.tolist() == evaluar_lote(filas).nivel.tolist()
+    with pytest.raises(ValueError, match="N×5"):
+        evaluar_lote(filas[:, :3])
@@ -0,0 +1,34 @@
+"""
+Pruebas del artefacto del modelo de recomendación.
+
+Uso: python -m pytest tests/test_modelo.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.modelo import RUTA_DATASET, ModeloFiltros, cargar_modelo  # noqa: E402
+
+
+def test_guardar_y_leer(tmp_path):
+    modelo = cargar_modelo()
+    ruta = str(tmp_path / "modelo.npz")
+    modelo.guardar(ruta)
+    # Se escribe por un temporal que se renombra: no queda nada más en el directorio
+    assert os.listdir(tmp_path) == ["modelo.npz"]
+    # Legible para otros usuarios, aunque mkstemp crea el temporal con 0600
+    assert os.stat(ruta).st_mode & 0o777 == 0o644
+    leido = ModeloFiltros.leer(ruta)
+    x = np.array([[10, 500, 0.4, 650, 0], [1, 0, 0, 100, 1]], dtype=float)
+    assert leido.predecir_lote(x).tolist() == modelo.predecir_lote(x).tolist()
+
+
+def test_entrena_y_guarda_si_no_hay_artefacto(tmp_path):
+    ruta = str(tmp_path / "modelo.npz")
+    modelo = cargar_modelo.__wrapped__(RUTA_DATASET, ruta)
+    assert os.path.exists(ruta)
+    assert ModeloFiltros.leer(ruta).clases.tolist() == modelo.clases.tolist()
@@ -0,0 +1,96 @@
+"""
+Pruebas de los agregados por sitio: las sumas móviles contra un recálculo de la ventana.
+
+Uso: python -m pytest tests/test_monitoreo.py
+"""
+
+import math
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.historial import FORMATO_FECHA, AlmacenHistorial  # noqa: E402
+from purificacion.monitoreo import LIMITE_TDS, AgregadoSitio, MonitorSitios  # noqa: E402
+
+INICIO = datetime(2026, 1, 1)
+
+
+def serie(n, semilla=0):
+    """(fecha, contaminantes) con TDS alrededor del límite y fechas irregulares."""
+    rng = np.random.default_rng(semilla)
+    horas = np.cumsum(rng.uniform(1, 48, n))
+    tds = LIMITE_TDS + rng.normal(0, 150, n) + 2 * np.arange(n)
+    return [
+        ((INICIO + timedelta(hours=float(h))).strftime(FORMATO_FECHA), [10.0, 500.0, 0.4, float(t)])
+        for h, t in zip(horas, tds)
+    ]
+
+
+def comparar_con_la_ventana(agregado, muestras, ventana):
+    """Media, excedencias y pendiente recalculadas desde cero sobre las últimas ``ventana`` muestras."""
+    ultimas = muestras[-ventana:]
+    dias = np.array([
+        (datetime.strptime(fecha, FORMATO_FECHA) - datetime.strptime(muestras[0][0], FORMATO_FECHA)).total_seconds()
+        / 86_400
+        for fecha, _ in ultimas
+    ])
+    tds = np.array([valores[3] for _, valores in ultimas])
+    assert agregado.n == len(ultimas)
+    assert list(agregado.fechas) == [fecha for fecha, _ in ultimas]
+    assert agregado.media == pytest.approx(tds.mean())
+    assert agregado.excedencias == int((tds > LIMITE_TDS).sum())
+    assert agregado.tasa_excedencia == pytest.approx((tds > LIMITE_TDS).mean())
+    if len(ultimas) >= 2:
+        assert agregado.tendencia == pytest.approx(np.polyfit(dias, tds, 1)[0], rel=1e-6)
+
+
+def test_sumas_moviles_tras_sacar_muestras():
+    ventana = 10
+    muestras = serie(75)
+    agregado = AgregadoSitio("S1", ventana)
+    for i, (fecha, valores) in enumerate(muestras, 1):
+        agregado.agregar(fecha, valores)
+        comparar_con_la_ventana(agregado, muestras[:i], ventana)
+
+    tds = [valores[3] for _, valores in muestras]
+    assert agregado.muestras_total == 75
+    assert agregado.excedencias_total == sum(t > LIMITE_TDS for t in tds)
+    assert agregado.fila()["TDS medio histórico"] == pytest.approx(np.mean(tds))
+
+
+def test_tendencia_sin_variacion_en_el_tiempo():
+    agregado = AgregadoSitio("S1")
+    assert math.isnan(agregado.media) and math.isnan(agregado.tendencia)
+    for tds in (400.0, 700.0):
+        agregado.agregar("2026-01-01 00:00:00", [1.0, 1.0, 0.0, tds])
+    assert agregado.media == 550.0
+    assert math.isnan(agregado.tendencia)
+
+
+def test_al_arrancar_se_recupera_la_ventana(tmp_path):
+    ruta = str(tmp_path / "historial.sqlite3")
+    muestras = serie(40, semilla=1)
+    monitor = MonitorSitios(AlmacenHistorial(ruta), ventana=12)
+    for fecha, (turbidez, coliformes, metales, tds) in muestras:
+        monitor.agregar({
+            "Fecha": fecha, "ID": "x", "pH": 7.0, "Turbidez_NTU": turbidez, "Coliformes_NMP_100ml": coliformes,
+            "Metales_ppm": metales, "TDS_mgL": tds, "Olor": "No", "Sitio": "S1",
+        })
+
+    reabierto = MonitorSitios(AlmacenHistorial(ruta), ventana=12)
+    assert reabierto.sitios() == ["S1"]
+    antes, despues = monitor.sitio("S1"), reabierto.sitio("S1")
+    assert list(despues.fechas) == list(antes.fechas)
+    for campo in ("n", "excedencias", "muestras_total", "excedencias_total"):
+        assert getattr(despues, campo) == getattr(antes, campo)
+    assert despues.media == pytest.approx(antes.media)
+    assert despues.suma_total == pytest.approx(antes.suma_total)
+    # La pendiente no depende del origen de tiempo de cada agregado
+    assert despues.tendencia == pytest.approx(antes.tendencia, rel=1e-6)
@@ -0,0 +1,38 @@
+"""
+Pruebas del análisis de una muestra (``motor.evaluar``).
+
+Uso: python -m pytest tests/test_motor.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.motor import MAXIMOS, PARAMETROS, Muestra, evaluar  # noqa: E402
+
+
+def test_dominante_es_el_de_mayor_riesgo_normalizado():
+    # Por magnitud ganan los coliformes (500 NMP/100 ml contra 400 mg/L de TDS),
+    # pero en riesgo normalizado el TDS está en 40 % y los coliformes en 25 %
+    muestra = Muestra(7.0, 1.0, 500, 0.1, 400)
+    resultado = evaluar(muestra)
+    crudo = PARAMETROS[muestra.valores().index(max(muestra.valores()))]
+    assert crudo == "Coliformes"
+    assert resultado.dominante_antes == "TDS"
+    assert resultado.riesgo_antes["TDS"] == pytest.approx(100 * 400 / MAXIMOS["TDS"])
+    assert resultado.domina == max(PARAMETROS, key=resultado.riesgo_despues.get)
+
+
+def test_dominante_ante_empate_es_el_primero():
+    # Todos al 50 % de su máximo
+    resultado = evaluar(Muestra(7.0, *(MAXIMOS[p] / 2 for p in PARAMETROS)))
+    assert resultado.dominante_antes == PARAMETROS[0]
+
+
+def test_mejoras_con_contaminantes_en_cero():
+    resultado = evaluar(Muestra(7.0, 0, 0, 0, 0))
+    assert resultado.mejoras == {p: 0 for p in PARAMETROS}
+    assert resultado.mejora_total == 0
@@ -0,0 +1,101 @@
+"""
+Pruebas del optimizador de trenes contra una búsqueda exhaustiva.
+
+Uso: python -m pytest tests/test_optimizador.py
+"""
+
+import os
+import sys
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.catalogo import CONTAMINANTES, Filtro, cargar_catalogo  # noqa: E402
+from purificacion.interpretacion import LIMITES_NOM127  # noqa: E402
+from purificacion.motor import PARAMETROS  # noqa: E402
+from purificacion.optimizador import Optimizador  # noqa: E402
+
+
+def aplicar(antes, etapas):
+    despues = dict(antes)
+    for etapa in etapas:
+        for p, c in zip(PARAMETROS, CONTAMINANTES):
+            despues[p] *= 1 - etapa.eficiencias[c]
+    return despues
+
+
+def cumple(despues):
+    return all(despues[p] <= LIMITES_NOM127[p] for p in PARAMETROS)
+
+
+def exhaustiva(catalogo, antes, max_etapas):
+    """Costo del conjunto más barato de hasta ``max_etapas`` etapas distintas que cumple; None si no hay."""
+    costos = [
+        sum(e.costo for e in etapas)
+        for k in range(max_etapas + 1)
+        for etapas in combinations(catalogo, k)
+        if cumple(aplicar(antes, etapas))
+    ]
+    return min(costos, default=None)
+
+
+def muestras(n, semilla=0):
+    # De 0.1 a 1000 veces el límite de cada contaminante
+    rng = np.random.default_rng(semilla)
+    return [
+        {p: LIMITES_NOM127[p] * 10 ** rng.uniform(-1, 3) for p in PARAMETROS}
+        for _ in range(n)
+    ]
+
+
+def comprobar(optimizador, catalogo, antes, max_etapas):
+    esperado = exhaustiva(catalogo, antes, max_etapas)
+    cadena = optimizador.mejor_cadena(antes, max_etapas)
+    if esperado is None:
+        assert cadena is None
+        return False
+    assert cadena is not None
+    assert cadena.costo == pytest.approx(esperado)
+    por_nombre = {e.nombre: e for e in catalogo}
+    etapas = [por_nombre[nombre] for nombre in cadena.etapas]
+    assert len(set(cadena.etapas)) == len(etapas) <= max_etapas
+    assert [e.posicion for e in etapas] == sorted(e.posicion for e in etapas)
+    assert sum(e.costo for e in etapas) == pytest.approx(cadena.costo)
+    assert cadena.despues == pytest.approx(aplicar(antes, etapas))
+    assert cumple(cadena.despues)
+    return True
+
+
+@pytest.mark.parametrize("max_etapas", [1, 2, 3])
+def test_igual_a_la_busqueda_exhaustiva(max_etapas):
+    catalogo = list(cargar_catalogo())
+    # Un solo optimizador para todas las muestras: la memoria se reutiliza entre consultas
+    optimizador = Optimizador(catalogo)
+    resueltas = [comprobar(optimizador, catalogo, antes, max_etapas) for antes in muestras(150)]
+    # La prueba cubre muestras con y sin solución
+    assert any(resueltas) and not all(resueltas)
+
+
+def test_catalogo_pequeno_con_empates_de_costo():
+    def etapa(nombre, costo, posicion, turbidez, coliformes, metales, tds):
+        eficiencias = dict(zip(CONTAMINANTES, (turbidez, coliformes, metales, tds)))
+        return Filtro(nombre, eficiencias, costo, posicion)
+
+    catalogo = [
+        etapa("Sedimentos", 1, 0, 0.9, 0.1, 0.1, 0.0),
+        etapa("UV", 1, 3, 0.0, 0.9999, 0.0, 0.0),
+        etapa("Adsorción", 2, 1, 0.5, 0.5, 0.99, 0.2),
+        etapa("Ósmosis", 4, 2, 0.99, 0.99, 0.99, 0.95),
+        etapa("Caro", 10, 2, 1.0, 1.0, 1.0, 1.0),
+    ]
+    optimizador = Optimizador(catalogo)
+    for max_etapas in (1, 2, 3, 4):
+        for antes in muestras(60, semilla=max_etapas):
+            comprobar(optimizador, catalogo, antes, max_etapas)
+
+    # Sin contaminantes por encima del límite no hace falta ninguna etapa
+    limpia = optimizador.mejor_cadena({p: LIMITES_NOM127[p] for p in PARAMETROS})
+    assert limpia.etapas == () and limpia.costo == 0
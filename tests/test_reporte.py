@@ -0,0 +1,26 @@
+"""
+Pruebas de los reportes PDF con muestras en los bordes de lo que acepta el motor.
+
+Uso: python -m pytest tests/test_reporte.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("reportlab")
+
+from purificacion.motor import Muestra, evaluar  # noqa: E402
+from purificacion.reporte import pdf_resultado  # noqa: E402
+
+
+@pytest.mark.parametrize("valores", [
+    (7.0, 10, 500, 0.4, 0),  # sin TDS
+    (7.0, 0, 0, 0, 0),  # agua limpia
+])
+def test_pdf_con_contaminantes_en_cero(valores):
+    datos = pdf_resultado(evaluar(Muestra(*valores)))
+    assert datos.startswith(b"%PDF")
@@ -0,0 +1,48 @@
+"""
+Pruebas del barrido de sensibilidad: cada celda de la malla es la evaluación de esa muestra.
+
+Uso: python -m pytest tests/test_sensibilidad.py
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.modelo import cargar_modelo  # noqa: E402
+from purificacion.motor import Muestra, evaluar  # noqa: E402
+from purificacion.sensibilidad import RANGOS, barrer  # noqa: E402
+
+FIJOS = {"Turbidez": 10, "Coliformes": 500, "Metales": 0.4, "TDS": 650}
+
+
+@pytest.mark.parametrize("con_modelo", [False, True])
+def test_celdas_iguales_a_evaluar(con_modelo):
+    modelo = cargar_modelo() if con_modelo else None
+    b = barrer("TDS", "Coliformes", FIJOS, olor=1.0, modelo=modelo, resolucion=12)
+    assert b.nivel.shape == b.indice_filtro.shape == b.riesgo_global_despues.shape == (12, 12)
+    assert (b.x[0], b.x[-1]) == RANGOS["TDS"]
+    assert (b.y[0], b.y[-1]) == RANGOS["Coliformes"]
+
+    # Filas en el eje y, columnas en el eje x; los demás parámetros quedan fijos
+    for fila in (0, 5, 11):
+        for columna in (0, 7, 11):
+            muestra = Muestra(7.0, FIJOS["Turbidez"], b.y[fila], FIJOS["Metales"], b.x[columna], "Sí")
+            r = evaluar(muestra, modelo)
+            assert b.nivel[fila, columna] == pytest.approx(r.nivel)
+            assert b.filtros[b.indice_filtro[fila, columna]] == r.filtro_recomendado
+            assert b.riesgo_global_despues[fila, columna] == pytest.approx(r.riesgo_global_despues)
+
+
+def test_nivel_crece_en_cada_eje():
+    b = barrer("Turbidez", "Metales", FIJOS, resolucion=20)
+    assert (b.nivel[:, 1:] >= b.nivel[:, :-1]).all()
+    assert (b.nivel[1:, :] >= b.nivel[:-1, :]).all()
+
+
+@pytest.mark.parametrize("ejes", [("TDS", "TDS"), ("TDS", "pH")])
+def test_ejes_no_validos(ejes):
+    with pytest.raises(ValueError, match="dos parámetros distintos"):
+        barrer(*ejes, FIJOS)
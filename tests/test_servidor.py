@@ -0,0 +1,121 @@
+"""
+Pruebas del servicio HTTP: sus respuestas contra ``evaluar`` para las mismas muestras.
+
+Uso: python -m pytest tests/test_servidor.py
+"""
+
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.interpretacion import CONTAMINANTES  # noqa: E402
+from purificacion.lote import evaluar_lote  # noqa: E402
+from purificacion.modelo import cargar_modelo  # noqa: E402
+from purificacion.motor import PARAMETROS, Muestra, evaluar  # noqa: E402
+from purificacion.servidor import Agrupador, Servidor, respuestas  # noqa: E402
+
+
+def filas_aleatorias(n, semilla=0):
+    rng = np.random.default_rng(semilla)
+    filas = np.column_stack([
+        rng.uniform(0, 60, n),
+        rng.uniform(0, 2500, n),
+        rng.uniform(0, 2.5, n),
+        rng.uniform(0, 1500, n),
+        rng.integers(0, 2, n),
+    ])
+    # Valores justo en los límites de las escalas y una muestra sin contaminantes
+    filas[:4] = [[1, 1, 0.01, 300, 0], [5, 200, 0.05, 500, 1], [0, 0, 0, 900, 0], [0, 0, 0, 0, 0]]
+    return filas
+
+
+def muestra_de(fila):
+    return Muestra(7.0, *fila[:4].tolist(), "Sí" if fila[4] else "No")
+
+
+def comparar(respuesta, resultado):
+    """La respuesta JSON dice lo mismo que el ``Resultado`` de ``evaluar``."""
+    assert respuesta["nivel"] == pytest.approx(resultado.nivel, abs=0.01)
+    assert respuesta["filtro_recomendado"] == resultado.filtro_recomendado
+    assert respuesta["purificacion_recomendada"] == pytest.approx(resultado.purificacion_recomendada, abs=0.01)
+    tabla = sorted(resultado.tabla_filtros, key=lambda fila: -fila[1])
+    assert [c["filtro"] for c in respuesta["comparativa"]] == [fila[0] for fila in tabla]
+    assert [c["purificacion"] for c in respuesta["comparativa"]] == pytest.approx([f[2] for f in tabla], abs=0.01)
+    for p in PARAMETROS:
+        assert respuesta["antes"][p] == resultado.antes[p]
+        assert respuesta["despues"][p] == pytest.approx(resultado.despues[p], abs=1e-4)
+        assert respuesta["riesgo_antes"][p] == pytest.approx(resultado.riesgo_antes[p], abs=0.01)
+        assert respuesta["riesgo_despues"][p] == pytest.approx(resultado.riesgo_despues[p], abs=0.01)
+    assert respuesta["riesgo_global_despues"] == pytest.approx(resultado.riesgo_global_despues, abs=0.01)
+
+    interpretacion = respuesta["interpretacion"]
+    esperada = resultado.interpretacion
+    for p, tramo in esperada.parametros.items():
+        assert interpretacion["parametros"][p] == {"nivel": tramo.nivel, "texto": tramo.texto}
+    assert interpretacion["tds_nom127"]["texto"] == esperada.tds_nom127.texto
+    assert interpretacion["conclusion"]["texto"] == esperada.conclusion.texto
+    assert interpretacion["contaminante_dominante"] == resultado.domina
+    assert interpretacion["recomendacion"] == esperada.recomendacion
+
+
+def test_columnas_en_el_orden_del_motor():
+    assert list(CONTAMINANTES) == PARAMETROS
+
+
+@pytest.mark.parametrize("con_modelo", [False, True])
+def test_respuestas_iguales_a_evaluar(con_modelo):
+    modelo = cargar_modelo() if con_modelo else None
+    filas = filas_aleatorias(300)
+    for fila, respuesta in zip(filas, respuestas(evaluar_lote(filas, modelo))):
+        comparar(respuesta, evaluar(muestra_de(fila), modelo))
+
+
+async def solicitar(puerto, ruta, cuerpo):
+    lector, escritor = await asyncio.open_connection("127.0.0.1", puerto)
+    datos = json.dumps(cuerpo).encode("utf-8")
+    escritor.write(
+        f"POST {ruta} HTTP/1.1\r\nContent-Length: {len(datos)}\r\nConnection: close\r\n\r\n".encode("latin-1")
+        + datos
+    )
+    await escritor.drain()
+    estado = (await lector.readline()).split()[1]
+    respuesta = await lector.read()
+    escritor.close()
+    return int(estado), json.loads(respuesta.partition(b"\r\n\r\n")[2])
+
+
+def test_solicitudes_concurrentes_por_http():
+    modelo = cargar_modelo()
+    filas = filas_aleatorias(40, semilla=1)
+    muestras = [
+        {"turbidez": t, "coliformes": c, "metales": m, "tds": d, "olor": "Sí" if o else "No"}
+        for t, c, m, d, o in filas.tolist()
+    ]
+
+    async def escenario():
+        agrupador = Agrupador(modelo, max_lote=64, espera_ms=20)
+        red = await asyncio.start_server(Servidor(agrupador).atender, "127.0.0.1", 0)
+        puerto = red.sockets[0].getsockname()[1]
+        try:
+            sueltas = await asyncio.gather(*(solicitar(puerto, "/evaluar", m) for m in muestras[:30]))
+            lote = await solicitar(puerto, "/lote", {"muestras": muestras[30:]})
+        finally:
+            red.close()
+            await red.wait_closed()
+            agrupador.cerrar()
+        return sueltas, lote, agrupador
+
+    sueltas, (estado, lote), agrupador = asyncio.run(escenario())
+    assert [e for e, _ in sueltas] == [200] * 30 and estado == 200
+    obtenidas = [r for _, r in sueltas] + lote["resultados"]
+    for fila, respuesta in zip(filas, obtenidas):
+        comparar(respuesta, evaluar(muestra_de(fila), modelo))
+    # Las solicitudes simultáneas se evaluaron en menos lotes que solicitudes
+    assert agrupador.muestras == 40
+    assert agrupador.lotes < 31
@@ -0,0 +1,161 @@
+"""
+Pruebas del escritor de Google Sheets con una hoja falsa (sin red ni gspread).
+
+Uso: python -m pytest tests/test_sheets.py
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion import sheets  # noqa: E402
+from purificacion.sheets import COLUMNAS, EscritorSheets, fila_sheets  # noqa: E402
+
+
+class HojaFalsa:
+    """Hoja con ``append_rows`` que guarda cada lote y puede fallar las primeras ``fallas`` veces."""
+
+    def __init__(self, fallas: int = 0):
+        self.fallas = fallas
+        self.intentos = 0
+        self.lotes = []
+        self.candado = threading.Lock()
+
+    def append_rows(self, filas, value_input_option=None):
+        with self.candado:
+            self.intentos += 1
+            if self.intentos <= self.fallas:
+                raise ConnectionError("servicio no disponible")
+            self.lotes.append([list(f) for f in filas])
+
+
+def entrada(i):
+    return {"pH": 7.0, "TDS_mgL": 100 + i, "Olor": "No"}
+
+
+@pytest.fixture
+def esperas(monkeypatch):
+    """Registra las esperas entre reintentos en lugar de dormir."""
+    registro = []
+    monkeypatch.setattr(sheets.time, "sleep", registro.append)
+    return registro
+
+
+@pytest.fixture
+def respaldo(tmp_path):
+    return str(tmp_path / "pendientes.jsonl")
+
+
+def escritor(hoja, respaldo, **opciones):
+    opciones = {"tam_lote": 50, "intervalo": 60.0, "ruta_respaldo": respaldo, **opciones}
+    return EscritorSheets(lambda: hoja, **opciones)
+
+
+def test_fila_en_el_orden_de_las_columnas():
+    fila = fila_sheets({"TDS_mgL": 650, "pH": 7.0, "Otra": 1})
+    assert len(fila) == len(COLUMNAS)
+    assert fila[COLUMNAS.index("pH")] == 7.0
+    assert fila[COLUMNAS.index("TDS_mgL")] == 650
+    assert fila[COLUMNAS.index("Olor")] == ""
+
+
+def test_lotes_por_tamano(respaldo):
+    hoja = HojaFalsa()
+    e = escritor(hoja, respaldo, tam_lote=3)
+    for i in range(7):
+        e.encolar(entrada(i))
+    assert e.vaciar(timeout=5)
+    # Dos lotes llenos; la última fila sale al vaciar, sin esperar el intervalo
+    assert [len(lote) for lote in hoja.lotes] == [3, 3, 1]
+    enviados = [fila[COLUMNAS.index("TDS_mgL")] for lote in hoja.lotes for fila in lote]
+    assert enviados == [100 + i for i in range(7)]
+    e.cerrar()
+
+
+def test_lote_por_intervalo(respaldo):
+    hoja = HojaFalsa()
+    e = escritor(hoja, respaldo, tam_lote=100, intervalo=0.2)
+    for i in range(4):
+        e.encolar(entrada(i))
+    # Sin llenar el lote: se envía cuando vence el intervalo
+    for _ in range(50):
+        if hoja.lotes:
+            break
+        time.sleep(0.1)
+    assert [len(lote) for lote in hoja.lotes] == [4]
+    e.cerrar()
+
+
+def test_reintentos_con_espera_exponencial(respaldo, esperas):
+    hoja = HojaFalsa(fallas=3)
+    e = escritor(hoja, respaldo, max_reintentos=4, espera_base=1.0, espera_maxima=3.0)
+    e.encolar(entrada(0))
+    assert e.vaciar(timeout=5)
+    assert esperas == [1.0, 2.0, 3.0]  # la tercera se recorta a espera_maxima
+    assert hoja.intentos == 4
+    assert len(hoja.lotes) == 1
+    assert not os.path.exists(respaldo)
+    e.cerrar()
+
+
+def test_respaldo_y_reenvio_al_recuperarse(respaldo, esperas):
+    hoja = HojaFalsa(fallas=2)
+    e = escritor(hoja, respaldo, max_reintentos=1)
+    e.encolar(entrada(0))
+    e.encolar(entrada(1))
+    assert e.vaciar(timeout=5)
+
+    # Se agotaron los reintentos: las filas quedan en el archivo de respaldo
+    assert hoja.lotes == []
+    with open(respaldo, encoding="utf-8") as f:
+        guardadas = [json.loads(linea) for linea in f]
+    assert guardadas == [fila_sheets(entrada(0)), fila_sheets(entrada(1))]
+
+    # El siguiente envío exitoso incluye lo respaldado y borra el archivo
+    e.encolar(entrada(2))
+    assert e.vaciar(timeout=5)
+    assert hoja.lotes == [[fila_sheets(entrada(i)) for i in range(3)]]
+    assert not os.path.exists(respaldo)
+    e.cerrar()
+
+
+def test_reabre_la_hoja_tras_un_error(respaldo, esperas):
+    aperturas = []
+    hoja = HojaFalsa(fallas=1)
+
+    def abrir():
+        aperturas.append(1)
+        return hoja
+
+    e = EscritorSheets(abrir, intervalo=60.0, ruta_respaldo=respaldo)
+    e.encolar(entrada(0))
+    assert e.vaciar(timeout=5)
+    assert len(aperturas) == 2
+    assert len(hoja.lotes) == 1
+    e.cerrar()
+
+
+def test_cerrar_envia_lo_pendiente(respaldo):
+    hoja = HojaFalsa()
+    e = escritor(hoja, respaldo)
+    for i in range(5):
+        e.encolar(entrada(i))
+    e.cerrar()
+    assert sum(len(lote) for lote in hoja.lotes) == 5
+
+
+def test_cerrar_dos_veces_no_espera(respaldo):
+    # atexit vuelve a llamar a cerrar() sobre un escritor ya cerrado
+    e = escritor(HojaFalsa(), respaldo)
+    e.encolar(entrada(0))
+    e.cerrar()
+    inicio = time.monotonic()
+    e.cerrar()
+    assert e.vaciar(timeout=5)
+    assert time.monotonic() - inicio < 1.0
@@ -0,0 +1,65 @@
+"""
+Pruebas de la simulación por etapas: reproducible por muestra y con avance monótono.
+
+Uso: python -m pytest tests/test_simulacion.py
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from purificacion.motor import Muestra  # noqa: E402
+from purificacion.simulacion import ETAPAS, SEGUNDOS_POR_PASO, avance, simular  # noqa: E402
+
+
+def semilla(muestra):
+    # La que usa la app: el ID de la muestra
+    return int(muestra.id, 16)
+
+
+def test_misma_muestra_mismas_eficiencias():
+    a = Muestra(7.0, 10, 500, 0.4, 650)
+    b = Muestra(7.0, 10, 500, 0.4, 650)
+    assert simular(semilla(a)) == simular(semilla(b))
+    assert simular(semilla(a)) != simular(semilla(Muestra(7.0, 10, 500, 0.4, 651)))
+
+
+def test_etapas_y_eficiencias_en_rango():
+    for i in range(50):
+        etapas = simular(i)
+        assert [(e.nombre, e.pasos, e.mensaje) for e in etapas] == ETAPAS
+        assert all(60 <= e.eficiencia <= 99.9 for e in etapas)
+
+
+def test_avance_monotono_hasta_completar():
+    etapas = simular(0)
+    total = sum(e.pasos for e in etapas) * SEGUNDOS_POR_PASO
+    anterior = (0.0, 0)
+    for t in np.linspace(0, total * 1.5, 301):
+        fraccion, completadas = avance(etapas, t)
+        assert 0 <= fraccion <= 1 and 0 <= completadas <= len(etapas)
+        assert fraccion >= anterior[0] and completadas >= anterior[1]
+        anterior = (fraccion, completadas)
+    assert avance(etapas, 0) == (0.0, 0)
+    assert avance(etapas, total) == (1.0, len(etapas))
+    assert avance(etapas, total * 10) == (1.0, len(etapas))
+
+
+def test_cada_etapa_se_completa_al_acabar_sus_pasos():
+    etapas = simular(0)
+    acumulado = 0
+    for i, etapa in enumerate(etapas, 1):
+        acumulado += etapa.pasos
+        assert avance(etapas, acumulado * SEGUNDOS_POR_PASO - 0.01)[1] == i - 1
+        assert avance(etapas, acumulado * SEGUNDOS_POR_PASO)[1] == i
+
+
+@pytest.mark.parametrize("segundos_por_paso", [0, -1])
+def test_sin_animacion_termina_de_inmediato(segundos_por_paso):
+    etapas = simular(0)
+    assert avance(etapas, 0, segundos_por_paso) == (1.0, len(etapas))
+    assert avance([], 5) == (1.0, 0)